@@ -4,8 +4,11 @@
 import werkzeug
 
 from odoo import _, api, exceptions, fields, models
+from odoo.http import Response
 from odoo.tools import safe_eval
 
+from odoo.addons.edi_oca.models.edi_metrics import PROMETHEUS_CONTENT_TYPE
+
 
 class EDIEndpoint(models.Model):
     """EDI endpoint.
@@ -55,6 +58,21 @@ class EDIEndpoint(models.Model):
             else:
                 raise exceptions.UserError(msg)
 
+    def _get_metrics_response(self):
+        """Return EDI metrics in Prometheus text format.
+
+        Metrics are limited to the endpoint backend if any,
+        otherwise to the backends of the endpoint backend type.
+        Use it from the code snippet, eg:
+
+            result = {"response": endpoint._get_metrics_response()}
+        """
+        backends = self.backend_id or self.env["edi.backend"].search(
+            [("backend_type_id", "=", self.backend_type_id.id)]
+        )
+        content = self.env["edi.metrics"].sudo()._render_prometheus(backends.sudo())
+        return Response(content, content_type=PROMETHEUS_CONTENT_TYPE)
+
     @api.constrains("exchange_type_id", "backend_type_id")
     def _check_backend_type(self):
         for rec in self:
@@ -53,3 +53,16 @@ class TestEndpoint(CommonEndpoint):
     def test_sync(self):
         # FIXME: just testing if the method here is available on GH
         self.endpoint._handle_registry_sync()
+
+    def test_metrics(self):
+        self.endpoint.create_exchange_record()
+        endpoint = self.env.ref("edi_endpoint_oca.edi_endpoint_demo_metrics")
+        response = endpoint._get_metrics_response()
+        self.assertIn("text/plain", response.content_type)
+        content = response.get_data(as_text=True)
+        self.assertIn("# TYPE edi_exchange_records gauge", content)
+        self.assertIn(
+            'edi_exchange_records{backend="EDI backend with endpoints DEMO",'
+            'type="demo_endpoint",state="new"}',
+            content,
+        )
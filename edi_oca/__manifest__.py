@@ -9,7 +9,7 @@
     Define backends, exchange types, exchange records,
     basic automation and views for handling EDI exchanges.
     """,
-    "version": "14.0.1.22.4",
+    "version": "14.0.1.24.0",
     "website": "https://github.com/OCA/edi",
     "development_status": "Beta",
     "license": "LGPL-3",
@@ -34,6 +34,9 @@
         "views/edi_backend_views.xml",
         "views/edi_backend_type_views.xml",
         "views/edi_exchange_record_views.xml",
+        "views/edi_exchange_record_archive_views.xml",
+        "views/edi_exchange_record_counter_views.xml",
+        "views/edi_exchange_record_timing_views.xml",
         "views/edi_exchange_type_views.xml",
         "views/edi_exchange_type_rule_views.xml",
         "views/menuitems.xml",
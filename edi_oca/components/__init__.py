@@ -2,3 +2,4 @@ from . import base
 from . import base_output
 from . import base_input
 from . import base_validate
+from . import listener
@@ -22,3 +22,20 @@ class EDIBackendReceiveComponentMixin(AbstractComponent):
 
     def receive(self):
         raise NotImplementedError()
+
+
+class EDIBackendSplitComponentMixin(AbstractComponent):
+    """Split input content into documents."""
+
+    _name = "edi.component.split.mixin"
+    _inherit = "edi.component.mixin"
+
+    def split(self):
+        """Yield a `(content, values)` tuple per document of the input file.
+
+        `values` are additional values for the record created for the document
+        (eg: its external identifier).
+        Read the file via `self.exchange_record._open_file_content()`
+        to not load it in memory at once.
+        """
+        raise NotImplementedError()
@@ -15,6 +15,17 @@ class EDIBackendOutputComponentMixin(AbstractComponent):
     def generate(self):
         raise NotImplementedError()
 
+    def generate_to_stream(self, fd):
+        """Write output content into the file object `fd`.
+
+        Used by pass-through exchange types.
+        Override to write large contents by chunks:
+        by default the whole output of `generate` is written at once.
+        """
+        output = self.generate()
+        if output:
+            fd.write(output if isinstance(output, bytes) else output.encode())
+
 
 class EDIBackendSendComponentMixin(AbstractComponent):
     """Send output records."""
@@ -26,6 +37,13 @@ class EDIBackendSendComponentMixin(AbstractComponent):
     def send(self):
         raise NotImplementedError()
 
+    def _get_output_stream(self):
+        """Return the stream of content to send for pass-through types.
+
+        When available, read from it instead of the exchange file.
+        """
+        return getattr(self.work, "output_stream", None)
+
 
 class EDIBackendCheckComponentMixin(AbstractComponent):
 
@@ -0,0 +1,49 @@
+# Copyright 2026 Camptocamp SA (http://www.camptocamp.com)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from odoo.addons.component.core import AbstractComponent
+
+
+class EDIBatchEventListener(AbstractComponent):
+    """Base listener for events of EDI consumer records handled in batch.
+
+    Consumers notify their events w/ the whole recordset
+    (eg: all the invoices posted at once).
+    Listeners inheriting from this component accept recordsets
+    and create all the exchange records at once, eg::
+
+        def on_post_account_move(self, moves):
+            self._edi_create_exchange_records(moves)
+
+    Rules and exchange types are evaluated once for the whole recordset
+    and exchange records are created in a single multi-create.
+    """
+
+    _name = "edi.component.batch.listener"
+    _inherit = "base.event.listener"
+    # Kind of the rules enabling exchange types for consumer records
+    _edi_rule_kind = "custom"
+
+    def _edi_filter_records(self, records):
+        """Return records to handle."""
+        return records.filtered(lambda x: not x.disable_edi_auto)
+
+    def _edi_create_exchange_records(
+        self, records, backend=None, vals=None, skip_existing=True
+    ):
+        """Create exchange records for all the enabled exchange types.
+
+        :param records: consumer records
+        :param backend: backend to use for types w/o backend
+        :param vals: extra values for all exchange records
+        :param skip_existing: do not create exchange records of a type
+            for records having one already
+        :return: created edi.exchange.record recordset
+        """
+        records = self._edi_filter_records(records)
+        exchange_types = records._edi_get_enabled_exchange_types(
+            kind=self._edi_rule_kind, skip_existing=skip_existing
+        )
+        return records._edi_create_exchange_records(
+            exchange_types, backend=backend, vals=vals
+        )
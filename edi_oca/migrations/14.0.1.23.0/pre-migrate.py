@@ -0,0 +1,24 @@
+# Copyright 2026 Camptocamp SA (http://www.camptocamp.com)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import logging
+
+from odoo import tools
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if not version or tools.sql.column_exists(cr, "edi_exchange_record", "direction"):
+        return
+    # Fill the new stored related field via SQL to avoid a slow ORM recompute
+    tools.sql.create_column(cr, "edi_exchange_record", "direction", "varchar")
+    cr.execute(
+        """
+        UPDATE edi_exchange_record rec
+        SET direction = type.direction
+        FROM edi_exchange_type type
+        WHERE rec.type_id = type.id
+        """
+    )
+    _logger.info("edi_exchange_record: direction set on %d records", cr.rowcount)
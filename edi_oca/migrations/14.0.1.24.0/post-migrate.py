@@ -0,0 +1,43 @@
+# Copyright 2026 Camptocamp SA (http://www.camptocamp.com)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import hashlib
+import logging
+
+from odoo import SUPERUSER_ID, api
+from odoo.tools import split_every
+
+_logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    # Checksums used to be the MD5 of the base64 value.
+    # Recompute the SHA-256 of the raw content for input records,
+    # the only ones looked up to skip duplicate input.
+    model = env["edi.exchange.record"]
+    ids = model.search(
+        [("direction", "=", "input"), ("exchange_file", "!=", False)]
+    ).ids
+    for batch_ids in split_every(500, ids):
+        for rec in model.browse(batch_ids):
+            hasher = hashlib.sha256()
+            size = 0
+            with rec._open_file_content() as fd:
+                for chunk in iter(lambda: fd.read(CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+                    size += len(chunk)
+            cr.execute(
+                """
+                UPDATE edi_exchange_record
+                SET exchange_filechecksum = %s, exchange_file_size = %s
+                WHERE id = %s
+                """,
+                (hasher.hexdigest(), size, rec.id),
+            )
+        model.invalidate_cache()
+    _logger.info("edi_exchange_record: checksum recomputed on %d records", len(ids))
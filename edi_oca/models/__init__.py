@@ -5,3 +5,10 @@ from . import edi_exchange_consumer_mixin
 from . import edi_exchange_type
 from . import edi_exchange_type_rule
 from . import edi_id_mixin
+from . import edi_exchange_record_archive
+from . import edi_exchange_record_counter
+from . import edi_exchange_record_state_log
+from . import edi_exchange_notification
+from . import edi_exchange_record_timing
+from . import edi_exchange_action_metric
+from . import edi_metrics
@@ -6,19 +6,35 @@
 
 
 import base64
+import functools
 import logging
+import shutil
+import tempfile
+import time
 import traceback
+from contextlib import contextmanager
+from datetime import timedelta
 from io import StringIO
 
+import psycopg2
+
 from odoo import _, exceptions, fields, models, tools
+from odoo.osv import expression
+from odoo.tools import groupby, split_every
 
 from odoo.addons.component.exception import NoComponentError
 from odoo.addons.queue_job.exception import RetryableJobError
 
 from ..exceptions import EDIValidationError
+from ..utils import HashingWriter
 
 _logger = logging.getLogger(__name__)
 
+# Pass-through content bigger than this (bytes) is spooled to disk
+PASSTHROUGH_SPOOL_SIZE = 4 * 1024 * 1024
+# Number of records created at once when splitting input files
+SPLIT_CHUNK_SIZE = 500
+
 
 def _get_exception_msg():
     buff = StringIO()
@@ -28,6 +44,23 @@ def _get_exception_msg():
     return traceback_txt
 
 
+def _timed(action):
+    """Collect timings of the decorated action, if enabled on the backend.
+
+    See `edi.exchange.record.timing`.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, exchange_record, *args, **kw):
+            with self._exchange_timing(exchange_record, action):
+                return method(self, exchange_record, *args, **kw)
+
+        return wrapper
+
+    return decorator
+
+
 class EDIBackend(models.Model):
     """Generic backend to control EDI exchanges.
 
@@ -57,8 +90,48 @@ class EDIBackend(models.Model):
     """
     )
     active = fields.Boolean(default=True)
+    exchange_dispatch_mode = fields.Selection(
+        selection=[
+            ("job", "One job per exchange"),
+            ("claim", "Claim pending exchanges"),
+        ],
+        default="job",
+        required=True,
+        help="""
+    How crons dispatch pending exchanges.
+
+    * One job per exchange: a job is created for each pending record
+      (or each chunk of records if the exchange type has a batch size).
+    * Claim pending exchanges: crons start parallel consumer jobs.
+      Each consumer locks a batch of pending records straight from the database
+      (skipping records locked by other consumers) and processes them.
+    """,
+    )
+    claim_batch_size = fields.Integer(
+        default=100, help="Max number of records claimed at once by a consumer."
+    )
+    claim_worker_count = fields.Integer(
+        default=1, help="Number of parallel consumers started by the crons."
+    )
+    claim_retry_delay = fields.Integer(
+        string="Claim retry delay (minutes)",
+        default=60,
+        help="Records failed in a consumer are rescheduled in their own job: "
+        "consumers do not claim them again during this delay.",
+    )
+    exchange_timing_enabled = fields.Boolean(
+        string="Collect timings",
+        help="Record duration, number of queries and payload size "
+        "of each action run on exchange records.",
+    )
+
+    def write(self, vals):
+        res = super().write(vals)
+        # Components lookup might depend on backend configuration
+        self.clear_caches()
+        return res
 
-    def _get_component(self, exchange_record, key):
+    def _get_component(self, exchange_record, key, work_ctx=None):
         record_conf = self._get_component_conf_for_record(exchange_record, key)
         # Load additional ctx keys if any
         collection = self
@@ -66,9 +139,11 @@ class EDIBackend(models.Model):
         env_ctx = self._get_component_env_ctx(record_conf, key)
         collection = collection.with_context(**env_ctx)
         exchange_record = exchange_record.with_context(**env_ctx)
+        extra_work_ctx = work_ctx or {}
         work_ctx = {"exchange_record": exchange_record}
         # Inject work context from advanced settings
         work_ctx.update(record_conf.get("work_ctx", {}))
+        work_ctx.update(extra_work_ctx)
         # Model is not granted to be there
         model = exchange_record.model or self._name
         candidates = self._get_component_usage_candidates(exchange_record, key)
@@ -81,7 +156,8 @@ class EDIBackend(models.Model):
         )
 
     def _get_component_env_ctx(self, record_conf, key):
-        env_ctx = record_conf.get("env_ctx", {})
+        # Copy to not alter type settings
+        env_ctx = dict(record_conf.get("env_ctx", {}))
         # You can use `edi_session` down in the stack to control logics.
         env_ctx.update(dict(edi_framework_action=key))
         return env_ctx
@@ -121,25 +197,60 @@ class EDIBackend(models.Model):
         if "backend" not in work_ctx:
             work_ctx["backend"] = self
         with self.work_on(model, **work_ctx) as work:
-            for usage in usage_candidates:
-                components, c_work_ctx = work._matching_components(usage=usage, **kw)
-                if not components:
-                    continue
-                # Sort components and pick the 1st one matching.
-                # In this way we support generic components registration
-                # and specific components registrations
-                components = sorted(
-                    components, key=lambda x: self._component_sort_key(x), reverse=True
+            match_key = tuple(sorted(kw.items()))
+            try:
+                hash(match_key)
+            except TypeError:
+                # Cannot cache lookups by unhashable values
+                component_class = self._lookup_component_class(
+                    work, usage_candidates, **kw
+                )
+            else:
+                component_class = self._get_component_class(
+                    work,
+                    work.components_registry,
+                    model,
+                    tuple(usage_candidates),
+                    match_key,
                 )
-                component = components[0](c_work_ctx)
+            if component_class:
+                component = component_class(work)
                 _logger.debug("using component %s", component._name)
-                break
         if not component and not safe:
             raise NoComponentError(
                 "No component found matching any of: {}".format(usage_candidates)
             )
         return component or None
 
+    @tools.ormcache(
+        "self.id", "components_registry", "model", "usage_candidates", "match_key"
+    )
+    def _get_component_class(
+        self, work, components_registry, model, usage_candidates, match_key
+    ):
+        """Cached lookup of the component class.
+
+        Matching depends only on the registry, the model, the usages
+        and the match attributes: there's no need to repeat it
+        for every exchange. The cache is cleared when backends
+        or exchange types change and on registry reload.
+        """
+        return self._lookup_component_class(work, usage_candidates, **dict(match_key))
+
+    def _lookup_component_class(self, work, usage_candidates, **kw):
+        for usage in usage_candidates:
+            components, __ = work._matching_components(usage=usage, **kw)
+            if not components:
+                continue
+            # Sort components and pick the 1st one matching.
+            # In this way we support generic components registration
+            # and specific components registrations
+            components = sorted(
+                components, key=lambda x: self._component_sort_key(x), reverse=True
+            )
+            return components[0]
+        return None
+
     def _get_component_usage_candidates(self, exchange_record, key):
         """Retrieve usage candidates for components."""
         # fmt:off
@@ -171,15 +282,39 @@ class EDIBackend(models.Model):
         :return: edi.exchange.record record
         """
         self.ensure_one()
-        _values = self._create_record_prepare_values(type_code, values)
-        return self.exchange_record_model.create(_values)
+        return self.create_records(type_code, [values])
 
-    def _create_record_prepare_values(self, type_code, values):
-        res = values.copy()  # do not pollute original dict
+    def create_records(self, type_code, vals_list):
+        """Create exchange records of the same type for current backend.
+
+        Identifiers are reserved in one block
+        and quick execution runs once for the whole batch.
+
+        :param type_code: edi.exchange.type code
+        :param vals_list: list of edi.exchange.record values
+        :return: edi.exchange.record recordset
+        """
+        self.ensure_one()
+        exchange_type = self._get_exchange_type(type_code)
+        return self.exchange_record_model.create(
+            [
+                self._create_record_prepare_values(
+                    type_code, values, exchange_type=exchange_type
+                )
+                for values in vals_list
+            ]
+        )
+
+    def _get_exchange_type(self, type_code):
         exchange_type = self.env["edi.exchange.type"].search(
             self._get_exchange_type_domain(type_code), limit=1
         )
         assert exchange_type, f"Exchange type not found: {type_code}"
+        return exchange_type
+
+    def _create_record_prepare_values(self, type_code, values, exchange_type=None):
+        res = values.copy()  # do not pollute original dict
+        exchange_type = exchange_type or self._get_exchange_type(type_code)
         res["type_id"] = exchange_type.id
         res["backend_id"] = self.id
         return res
@@ -202,6 +337,7 @@ class EDIBackend(models.Model):
         )
         return self.with_delay(**rec._job_delay_params())
 
+    @_timed("generate")
     def exchange_generate(self, exchange_record, store=True, force=False, **kw):
         """Generate output content for given exchange record.
 
@@ -212,17 +348,19 @@ class EDIBackend(models.Model):
         """
         self.ensure_one()
         self._check_exchange_generate(exchange_record, force=force)
+        if exchange_record.type_id.output_passthrough:
+            # Content is generated straight into the transport when sending
+            exchange_record.edi_exchange_state = "output_pending"
+            message = exchange_record._exchange_status_message("generate_deferred")
+            exchange_record.notify_action_complete("generate", message=message)
+            return message
         output = self._exchange_generate(exchange_record, **kw)
         message = None
         if output and store:
             if not isinstance(output, bytes):
                 output = output.encode()
-            exchange_record.update(
-                {
-                    "exchange_file": base64.b64encode(output),
-                    "edi_exchange_state": "output_pending",
-                }
-            )
+            exchange_record._set_file_content(output)
+            exchange_record.edi_exchange_state = "output_pending"
         try:
             # TODO: Remove this on 15.0, we will keep it in order to not break current
             # installations
@@ -282,8 +420,10 @@ class EDIBackend(models.Model):
     def _validate_data(self, exchange_record, value=None, **kw):
         component = self._get_component(exchange_record, "validate")
         if component:
-            return component.validate(value)
+            with self._exchange_timing(exchange_record, "validate"):
+                return component.validate(value)
 
+    @_timed("send")
     def exchange_send(self, exchange_record):
         """Send exchange file."""
         self.ensure_one()
@@ -292,12 +432,18 @@ class EDIBackend(models.Model):
         check = self._output_check_send(exchange_record)
         if not check:
             return "Nothing to do. Likely already sent."
+        if exchange_record.type_id.output_passthrough:
+            return self._exchange_send_passthrough(exchange_record)
+        return self._exchange_send_and_update(exchange_record)
+
+    def _exchange_send_and_update(self, exchange_record, output_stream=None):
+        """Send exchange file and update the record state accordingly."""
         state = exchange_record.edi_exchange_state
         error = False
         message = None
         res = ""
         try:
-            self._exchange_send(exchange_record)
+            self._exchange_send(exchange_record, output_stream=output_stream)
             _logger.debug("%s sent", exchange_record.identifier)
         except self._send_retryable_exceptions() as err:
             error = _get_exception_msg()
@@ -338,6 +484,56 @@ class EDIBackend(models.Model):
         exchange_record.notify_action_complete("send", message=message)
         return res
 
+    @contextmanager
+    def _exchange_timing(self, exchange_record, action):
+        """Measure given action.
+
+        Aggregated metrics are always collected and written once per transaction,
+        detailed timings only if enabled on the backend.
+        """
+        cr = self.env.cr
+        query_count = cr.sql_log_count
+        started_on = fields.Datetime.now()
+        # Read upfront: the DB might not be usable if the action fails
+        backend_id = exchange_record.backend_id.id
+        type_id = exchange_record.type_id.id
+        metric_model = self.env["edi.exchange.action.metric"]
+        start = time.perf_counter()
+        try:
+            yield
+        except psycopg2.Error:
+            # The transaction is broken: nothing can be recorded
+            raise
+        except Exception:
+            # The transaction might be broken as well (eg: DB error wrapped
+            # in another exception): only buffer metrics, w/o querying the DB
+            try:
+                metric_model._add(
+                    backend_id, type_id, action, time.perf_counter() - start, True
+                )
+            except Exception:
+                _logger.warning(
+                    "EDI Exchange record ID=%d: cannot collect metrics of %s.",
+                    exchange_record.id,
+                    action,
+                    exc_info=True,
+                )
+            raise
+        duration = time.perf_counter() - start
+        failed = (
+            exchange_record.edi_exchange_state in exchange_record._get_error_states()
+        )
+        metric_model._add(backend_id, type_id, action, duration, failed)
+        if self.exchange_timing_enabled:
+            self.env["edi.exchange.record.timing"]._log(
+                exchange_record,
+                action,
+                started_on,
+                duration,
+                cr.sql_log_count - query_count,
+                failed,
+            )
+
     def _swallable_exceptions(self):
         # TODO: improve this list
         return (
@@ -358,7 +554,10 @@ class EDIBackend(models.Model):
             raise exceptions.UserError(
                 _("Record ID=%d is not meant to be sent!") % exchange_record.id
             )
-        if not exchange_record.exchange_file:
+        if (
+            not exchange_record.exchange_file
+            and not exchange_record.type_id.output_passthrough
+        ):
             raise exceptions.UserError(
                 _("Record ID=%d has no file to send!") % exchange_record.id
             )
@@ -367,14 +566,116 @@ class EDIBackend(models.Model):
             "output_error_on_send",
         ]
 
-    def _exchange_send(self, exchange_record):
-        component = self._get_component(exchange_record, "send")
+    def _exchange_send(self, exchange_record, output_stream=None):
+        work_ctx = {"output_stream": output_stream} if output_stream else None
+        component = self._get_component(exchange_record, "send", work_ctx=work_ctx)
         if component:
             return component.send()
         raise NotImplementedError("No handler for `_exchange_send`")
 
+    def _exchange_send_passthrough(self, exchange_record):
+        """Generate the content into a stream consumed by the send handler.
+
+        The content is spooled to a temporary file:
+        it is not encoded to base64 and it is written to disk when large.
+        Only its checksum and size are stored,
+        plus a copy of the content if the type keeps it.
+        """
+        if exchange_record.exchange_file:
+            # Retry: resend the copy kept at first attempt
+            with exchange_record._open_file_content() as fd:
+                return self._exchange_send_and_update(exchange_record, fd)
+        with tempfile.SpooledTemporaryFile(
+            max_size=PASSTHROUGH_SPOOL_SIZE, prefix="edi-"
+        ) as fd:
+            message = self._exchange_generate_passthrough(exchange_record, fd)
+            if message:
+                # Not generated or not valid
+                return message
+            fd.seek(0)
+            return self._exchange_send_and_update(exchange_record, fd)
+
+    def _exchange_generate_passthrough(self, exchange_record, fd):
+        """Generate and validate pass-through content into `fd`.
+
+        Failures are reported like validation errors of regular output:
+        the record is not sent.
+
+        :return: error message if the content cannot be sent
+        """
+        writer = HashingWriter(fd, algorithms=("sha256",))
+        try:
+            with self._exchange_timing(exchange_record, "generate"):
+                self._exchange_generate_to_stream(exchange_record, writer)
+            exchange_record.write(
+                {
+                    "exchange_filechecksum": writer.hexdigest("sha256"),
+                    "exchange_file_size": writer.size,
+                }
+            )
+            self._validate_output_stream(exchange_record, fd)
+        except EDIValidationError:
+            error = _get_exception_msg()
+            message_key = "validate_ko"
+        except self._swallable_exceptions():
+            if self.env.context.get("_edi_send_break_on_error"):
+                raise
+            error = _get_exception_msg()
+            message_key = "generate_ko"
+        else:
+            if exchange_record.type_id.output_passthrough_keep_copy:
+                fd.seek(0)
+                with exchange_record._open_file_content(mode="w") as copy:
+                    shutil.copyfileobj(fd, copy)
+            return None
+        exchange_record.write(
+            {
+                "edi_exchange_state": "validate_error",
+                "exchange_error": error,
+            }
+        )
+        message = exchange_record._exchange_status_message(message_key)
+        exchange_record.notify_action_complete("generate", message=message)
+        return message
+
+    def _validate_output_stream(self, exchange_record, fd):
+        """Validate pass-through content, if the type has a validator.
+
+        Validators work on the whole value:
+        only in this case the content is loaded in memory.
+        """
+        if not self._get_component(exchange_record, "validate"):
+            return
+        fd.seek(0)
+        self._validate_data(exchange_record, fd.read())
+
+    def _exchange_generate_to_stream(self, exchange_record, fd, **kw):
+        component = self._get_component(exchange_record, "generate")
+        if component:
+            return component.generate_to_stream(fd)
+        # Generation not handled by a component (eg: templates)
+        output = self._exchange_generate(exchange_record, **kw)
+        if output:
+            fd.write(output if isinstance(output, bytes) else output.encode())
+
     def _cron_check_output_exchange_sync(self, **kw):
-        for backend in self:
+        backends = self
+        if not kw.get("record_ids"):
+            backends = self._filter_with_pending_exchanges(
+                "output", skip_sent=kw.get("skip_sent", True)
+            )
+        for backend in backends:
+            # Given records are handled by the default path
+            if backend.exchange_dispatch_mode == "claim" and not kw.get("record_ids"):
+                backend._exchange_claim_start(
+                    "output",
+                    skip_send=kw.get("skip_send", False),
+                    skip_sent=kw.get("skip_sent", True),
+                )
+                backend._check_output_exchange_state_sync(
+                    skip_sent=kw.get("skip_sent", True)
+                )
+                continue
             backend._check_output_exchange_sync(**kw)
 
     def _check_output_exchange_sync(
@@ -396,7 +697,9 @@ class EDIBackend(models.Model):
             "EDI Exchange output sync: found %d new records to process.",
             len(new_records),
         )
-        for rec in new_records:
+        actions = ("generate",) if skip_send else ("generate", "send")
+        batched = self._delay_exchange_records_batch(new_records, actions)
+        for rec in new_records - batched:
             job1 = rec.delayable().action_exchange_generate()
             if not skip_send:
                 # Chain send job.
@@ -415,19 +718,123 @@ class EDIBackend(models.Model):
             "EDI Exchange output sync: found %d pending records to process.",
             len(pending_records),
         )
-        for rec in pending_records:
+        batched = self._delay_exchange_records_batch(
+            pending_records.filtered(
+                lambda x: x.edi_exchange_state == "output_pending"
+            ),
+            ("send",),
+        )
+        for rec in pending_records - batched:
             if rec.edi_exchange_state == "output_pending":
                 rec.with_delay().action_exchange_send()
             else:
                 # TODO: run in job as well?
                 self._exchange_output_check_state(rec)
 
+    def _get_pending_states(self, direction, skip_sent=True):
+        """States of records the sync crons have to take care of."""
+        if direction == "output":
+            states = ("new", "output_pending", "output_sent_and_error")
+            if not skip_sent:
+                states += ("output_sent",)
+            return states
+        return ("input_pending", "input_received")
+
+    def _filter_with_pending_exchanges(self, direction, skip_sent=True):
+        """Return backends having pending records according to counters.
+
+        Avoids looking up records for idle backends.
+        Counters might drift if records are changed w/o the ORM (eg: via SQL):
+        backends counted as idle are checked w/ a cheap `EXISTS` query
+        and counters are rebuilt if they are wrong.
+        """
+        states = self._get_pending_states(direction, skip_sent=skip_sent)
+        counts = self.env["edi.exchange.record.counter"]._get_counts(
+            backend_ids=self.ids, states=states, group_by=("backend_id",)
+        )
+        backends = self.filtered(lambda x: counts.get((x.id,), 0) > 0)
+        idle = self - backends
+        if not idle:
+            return backends
+        missed = idle._filter_with_pending_records(direction, states)
+        if missed:
+            _logger.warning(
+                "EDI Exchange %s sync: counters out of sync for backends %s. "
+                "Rebuilding counters.",
+                direction,
+                missed.ids,
+            )
+            self.env["edi.exchange.record.counter"].with_delay(
+                identity_key="edi_exchange_record_counter_rebuild"
+            )._rebuild()
+            backends |= missed
+        if len(backends) < len(self):
+            _logger.debug(
+                "EDI Exchange %s sync: skip backends w/o pending records: %s",
+                direction,
+                (self - backends).ids,
+            )
+        return backends
+
+    def _filter_with_pending_records(self, direction, states):
+        """Return backends having records of given direction and states."""
+        self.exchange_record_model.flush(
+            ["backend_id", "direction", "edi_exchange_state"]
+        )
+        self.env.cr.execute(
+            """
+            SELECT backend.id FROM edi_backend backend
+            WHERE backend.id IN %s
+                AND EXISTS (
+                    SELECT 1 FROM edi_exchange_record rec
+                    WHERE rec.backend_id = backend.id
+                        AND rec.direction = %s
+                        AND rec.edi_exchange_state IN %s
+                )
+            """,
+            (tuple(self.ids), direction, tuple(states)),
+        )
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _delay_exchange_records_batch(self, exchange_records, actions):
+        """Delay one job per chunk of records for types having a batch size.
+
+        :param exchange_records: edi.exchange.record recordset
+        :param actions: tuple of actions to run on each record of the chunk
+        :return: edi.exchange.record recordset of the records delayed in batch
+        """
+        batched = exchange_records.browse()
+        for exc_type, records in groupby(exchange_records, lambda x: x.type_id):
+            batch_size = exc_type.job_batch_size
+            if batch_size <= 0:
+                continue
+            records = exchange_records.browse([x.id for x in records])
+            for chunk in split_every(batch_size, records.ids, records.browse):
+                chunk.with_delay().action_exchange_batch(actions)
+            _logger.info(
+                "EDI Exchange %s: %d records delayed in batches of %d.",
+                exc_type.code,
+                len(records),
+                batch_size,
+            )
+            batched |= records
+        return batched
+
+    def _check_output_exchange_state_sync(self, skip_sent=True, record_ids=None):
+        """Update the state of records already sent via `check` components."""
+        domain = self._output_pending_records_domain(
+            skip_sent=skip_sent, record_ids=record_ids
+        )
+        domain.append(("edi_exchange_state", "!=", "output_pending"))
+        for rec in self.exchange_record_model.search(domain):
+            self._exchange_output_check_state(rec)
+
     def _output_new_records_domain(self, record_ids=None):
         """Domain for output records needing output content generation."""
         domain = [
             ("backend_id", "=", self.id),
             ("type_id.exchange_file_auto_generate", "=", True),
-            ("type_id.direction", "=", "output"),
+            ("direction", "=", "output"),
             ("edi_exchange_state", "=", "new"),
             ("exchange_file", "=", False),
         ]
@@ -445,7 +852,7 @@ class EDIBackend(models.Model):
             # you'll have to provide a `check` component.
             states += ("output_sent",)
         domain = [
-            ("type_id.direction", "=", "output"),
+            ("direction", "=", "output"),
             ("backend_id", "=", self.id),
             ("edi_exchange_state", "in", states),
         ]
@@ -453,6 +860,7 @@ class EDIBackend(models.Model):
             domain.append(("id", "in", record_ids))
         return domain
 
+    @_timed("check")
     def _exchange_output_check_state(self, exchange_record):
         component = self._get_component(exchange_record, "check")
         if component:
@@ -473,6 +881,7 @@ class EDIBackend(models.Model):
             "input_processed_error",
         ]
 
+    @_timed("process")
     def exchange_process(self, exchange_record):
         """Process an incoming document."""
         self.ensure_one()
@@ -481,11 +890,21 @@ class EDIBackend(models.Model):
         check = self._exchange_process_check(exchange_record)
         if not check:
             return "Nothing to do. Likely already processed."
+        duplicate = self._get_input_duplicate(exchange_record)
+        if duplicate:
+            return self._exchange_input_mark_duplicate(
+                exchange_record, duplicate, "process"
+            )
         old_state = state = exchange_record.edi_exchange_state
         error = False
         message = None
+        children = None
         try:
-            res = self._exchange_process(exchange_record)
+            if exchange_record.type_id.split_type_id:
+                children = self._exchange_split(exchange_record)
+                res = "Split into %d records." % len(children)
+            else:
+                res = self._exchange_process(exchange_record)
         except self._swallable_exceptions():
             if self.env.context.get("_edi_process_break_on_error"):
                 raise
@@ -494,7 +913,8 @@ class EDIBackend(models.Model):
             res = f"Error: {error}"
         else:
             error = None
-            state = "input_processed"
+            # Split records get their final state from their children
+            state = "input_split" if children else "input_processed"
         finally:
             exchange_record.write(
                 {
@@ -521,6 +941,55 @@ class EDIBackend(models.Model):
             return component.process()
         raise NotImplementedError()
 
+    def _exchange_split(self, exchange_record):
+        """Split the input file into one child record per document.
+
+        Children are created by chunks and processed on their own.
+        The whole split runs in a savepoint: if it fails partway,
+        no child is kept and the file is split again on retry.
+        Hence, having children means the split completed:
+        when retrying, failed children are retried instead.
+
+        :return: edi.exchange.record recordset of children
+        """
+        children = exchange_record._get_split_children()
+        if children:
+            children.filtered("retryable").action_retry()
+            return children
+        component = self._get_component(exchange_record, "split")
+        if not component:
+            raise NotImplementedError("No handler for `_exchange_split`")
+        split_type = exchange_record.type_id.split_type_id
+        with self.env.cr.savepoint():
+            for chunk in split_every(SPLIT_CHUNK_SIZE, component.split()):
+                children |= self.exchange_record_model.create(
+                    [
+                        self._create_record_prepare_values(
+                            split_type.code,
+                            self._split_child_values(
+                                exchange_record, content, values
+                            ),
+                            exchange_type=split_type,
+                        )
+                        for content, values in chunk
+                    ]
+                )
+        _logger.debug(
+            "%s split into %d records", exchange_record.identifier, len(children)
+        )
+        return children
+
+    def _split_child_values(self, exchange_record, content, values):
+        if not isinstance(content, bytes):
+            content = content.encode()
+        return dict(
+            values or {},
+            parent_id=exchange_record.id,
+            edi_exchange_state="input_received",
+            exchange_file=base64.b64encode(content),
+        )
+
+    @_timed("receive")
     def exchange_receive(self, exchange_record):
         """Retrieve an incoming document."""
         self.ensure_one()
@@ -533,11 +1002,14 @@ class EDIBackend(models.Model):
         error = False
         message = None
         content = None
+        duplicate = None
         try:
             content = self._exchange_receive(exchange_record)
             if content:
                 exchange_record._set_file_content(content)
-                self._validate_data(exchange_record)
+                duplicate = self._get_input_duplicate(exchange_record)
+                if not duplicate:
+                    self._validate_data(exchange_record)
         except EDIValidationError:
             error = _get_exception_msg()
             state = "validate_error"
@@ -565,9 +1037,69 @@ class EDIBackend(models.Model):
                     "exchanged_on": fields.Datetime.now(),
                 }
             )
+        if duplicate and state == "input_received":
+            return self._exchange_input_mark_duplicate(
+                exchange_record, duplicate, "receive"
+            )
+        if state == "input_received":
+            # The reference might be known only once received
+            exchange_record._filter_orphan_acks()._resolve_ack_parents()
         exchange_record.notify_action_complete("receive", message=message)
         return res
 
+    def _get_input_duplicate(self, exchange_record):
+        """Return the older record w/ the same content, if any.
+
+        Lookup happens only if the exchange type asks for it.
+        Only records processed successfully (or being split) are considered:
+        records not processed yet or failed do not make the content a duplicate.
+
+        The check is serialized by locking the current record
+        and the older ones w/ the same content: if one of them is being
+        worked on by a concurrent job, the current one waits for it
+        and fails on concurrent update, to be retried once its outcome is known.
+        """
+        checksum = exchange_record.exchange_filechecksum
+        if not exchange_record.type_id.deduplicate_input or not checksum:
+            return exchange_record.browse()
+        model = self.exchange_record_model
+        model.flush(
+            ["backend_id", "type_id", "exchange_filechecksum", "edi_exchange_state"]
+        )
+        self.env.cr.execute(
+            "SELECT id FROM edi_exchange_record WHERE id = %s FOR UPDATE",
+            (exchange_record.id,),
+        )
+        self.env.cr.execute(
+            """
+            SELECT id, edi_exchange_state FROM edi_exchange_record
+            WHERE backend_id = %s
+                AND type_id = %s
+                AND exchange_filechecksum = %s
+                AND id < %s
+            ORDER BY id
+            FOR UPDATE
+            """,
+            (self.id, exchange_record.type_id.id, checksum, exchange_record.id),
+        )
+        done_states = model._get_input_duplicate_states()
+        for record_id, state in self.env.cr.fetchall():
+            if state in done_states:
+                return model.browse(record_id)
+        return model.browse()
+
+    def _exchange_input_mark_duplicate(self, exchange_record, duplicate, action):
+        message = exchange_record._exchange_status_message("duplicate")
+        exchange_record.write(
+            {
+                "edi_exchange_state": "input_duplicate",
+                "duplicate_of_id": duplicate.id,
+                "exchange_error": None,
+            }
+        )
+        exchange_record.notify_action_complete(action, message=message)
+        return message
+
     def _exchange_receive_check(self, exchange_record):
         # TODO: use `filtered_domain` + _input_pending_records_domain
         # and raise one single error
@@ -588,7 +1120,14 @@ class EDIBackend(models.Model):
         raise NotImplementedError()
 
     def _cron_check_input_exchange_sync(self, **kw):
-        for backend in self:
+        backends = self
+        if not kw.get("record_ids"):
+            backends = self._filter_with_pending_exchanges("input")
+        for backend in backends:
+            # Given records are handled by the default path
+            if backend.exchange_dispatch_mode == "claim" and not kw.get("record_ids"):
+                backend._exchange_claim_start("input")
+                continue
             backend._check_input_exchange_sync(**kw)
 
     # TODO: add tests
@@ -606,7 +1145,8 @@ class EDIBackend(models.Model):
             "EDI Exchange input sync: found %d pending records to receive.",
             len(pending_records),
         )
-        for rec in pending_records:
+        batched = self._delay_exchange_records_batch(pending_records, ("receive",))
+        for rec in pending_records - batched:
             rec.with_delay().action_exchange_receive()
 
         pending_process_records = self.exchange_record_model.search(
@@ -616,13 +1156,16 @@ class EDIBackend(models.Model):
             "EDI Exchange input sync: found %d pending records to process.",
             len(pending_process_records),
         )
-        for rec in pending_process_records:
+        batched = self._delay_exchange_records_batch(
+            pending_process_records, ("process",)
+        )
+        for rec in pending_process_records - batched:
             rec.with_delay().action_exchange_process()
 
     def _input_pending_records_domain(self, record_ids=None):
         domain = [
             ("backend_id", "=", self.id),
-            ("type_id.direction", "=", "input"),
+            ("direction", "=", "input"),
             ("edi_exchange_state", "=", "input_pending"),
             ("exchange_file", "=", False),
         ]
@@ -634,13 +1177,140 @@ class EDIBackend(models.Model):
         states = ("input_received",)
         domain = [
             ("backend_id", "=", self.id),
-            ("type_id.direction", "=", "input"),
+            ("direction", "=", "input"),
             ("edi_exchange_state", "in", states),
         ]
         if record_ids:
             domain.append(("id", "in", record_ids))
         return domain
 
+    def _exchange_claim_start(self, direction, skip_send=False, skip_sent=True):
+        """Start parallel consumers claiming pending records.
+
+        Each consumer is a chain of jobs w/ its own identity key:
+        crons do not start new ones while previous ones are pending.
+        """
+        self.ensure_one()
+        for slot in range(max(self.claim_worker_count, 1)):
+            self._exchange_claim_delay(
+                direction, slot, skip_send=skip_send, skip_sent=skip_sent
+            )
+
+    def _exchange_claim_delay(self, direction, slot, **kw):
+        identity_key = "edi_claim_{}_{}_{}".format(self.id, direction, slot)
+        self.with_delay(identity_key=identity_key)._exchange_claim_dispatch(
+            direction, slot=slot, **kw
+        )
+
+    def _exchange_claim_dispatch(
+        self, direction, slot=0, skip_send=False, skip_sent=True
+    ):
+        """Claim a batch of pending records and run their next actions.
+
+        Records are locked with `FOR UPDATE SKIP LOCKED`
+        hence parallel consumers never work on the same records.
+        If the batch was full, the consumer reschedules itself
+        to claim the next one.
+        Failed records are rescheduled in their own job:
+        they are not claimed again before `claim_retry_delay`.
+
+        :param direction: "input" or "output"
+        :param slot: index of the consumer
+        :param skip_send: only generate missing output.
+        :param skip_sent: kept for compatibility w/ cron kwargs.
+        """
+        self.ensure_one()
+        records = self._exchange_claim_records(direction, self.claim_batch_size)
+        _logger.info(
+            "EDI Exchange %s claim: %d records claimed.", direction, len(records)
+        )
+        failed = records.browse()
+        for actions, recs in self._exchange_claim_group_by_actions(
+            records, skip_send=skip_send
+        ):
+            recs_failed = recs._exchange_batch_run(actions)
+            recs_failed._delay_exchange_actions(actions)
+            failed |= recs_failed
+        if failed:
+            failed.write(
+                {
+                    "claimed_until": fields.Datetime.now()
+                    + timedelta(minutes=self.claim_retry_delay)
+                }
+            )
+        if records and len(records) >= self.claim_batch_size:
+            self._exchange_claim_delay(
+                direction, slot, skip_send=skip_send, skip_sent=skip_sent
+            )
+        return _("%(done)d records done, %(failed)d rescheduled.") % {
+            "done": len(records) - len(failed),
+            "failed": len(failed),
+        }
+
+    def _exchange_claim_domain(self, direction):
+        return expression.AND(
+            [
+                self._exchange_claim_pending_domain(direction),
+                [
+                    "|",
+                    ("claimed_until", "=", False),
+                    ("claimed_until", "<", fields.Datetime.now()),
+                ],
+            ]
+        )
+
+    def _exchange_claim_pending_domain(self, direction):
+        if direction == "output":
+            return expression.OR(
+                [
+                    self._output_new_records_domain(),
+                    [
+                        ("backend_id", "=", self.id),
+                        ("direction", "=", "output"),
+                        ("edi_exchange_state", "=", "output_pending"),
+                    ],
+                ]
+            )
+        return expression.OR(
+            [
+                self._input_pending_records_domain(),
+                self._input_pending_process_records_domain(),
+            ]
+        )
+
+    def _exchange_claim_records(self, direction, limit):
+        """Lock and return pending records not locked by other transactions.
+
+        Oldest records come first.
+        """
+        domain = self._exchange_claim_domain(direction)
+        model = self.exchange_record_model
+        query = model._where_calc(domain)
+        query.order = '"{}"."id"'.format(model._table)
+        query.limit = limit
+        query_str, params = query.select('"{}"."id"'.format(model._table))
+        self.env.cr.execute(
+            query_str + ' FOR UPDATE OF "{}" SKIP LOCKED'.format(model._table),
+            params,
+        )
+        return model.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _exchange_claim_group_by_actions(self, exchange_records, skip_send=False):
+        """Group claimed records by the actions they need, according to state."""
+        actions_by_state = {
+            "new": ("generate",) if skip_send else ("generate", "send"),
+            "output_pending": ("send",),
+            "input_pending": ("receive",),
+            "input_received": ("process",),
+        }
+        for state, records in groupby(
+            exchange_records, lambda x: x.edi_exchange_state
+        ):
+            if state in actions_by_state:
+                yield actions_by_state[state], exchange_records.browse(
+                    [x.id for x in records]
+                )
+
     def _find_existing_exchange_records(
         self, exchange_type, extra_domain=None, count_only=False
     ):
@@ -660,6 +1330,12 @@ class EDIBackend(models.Model):
         }
         return action
 
+    def action_view_exchange_counters(self):
+        xmlid = "edi_oca.act_open_edi_exchange_record_counter_view"
+        action = self.env["ir.actions.act_window"]._for_xml_id(xmlid)
+        action["domain"] = [("backend_id", "=", self.id)]
+        return action
+
     def action_view_exchange_types(self):
         xmlid = "edi_oca.act_open_edi_exchange_type_view"
         action = self.env["ir.actions.act_window"]._for_xml_id(xmlid)
@@ -0,0 +1,138 @@
+# Copyright 2026 Camptocamp SA (http://www.camptocamp.com)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import bisect
+import logging
+from collections import defaultdict
+
+from odoo import api, fields, models
+
+from .edi_exchange_record_timing import ACTIONS
+
+_logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of duration histogram buckets.
+# Durations above the last one go to an extra "+Inf" bucket.
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+class EDIExchangeActionMetric(models.Model):
+    """
+    Number and duration of actions by backend, type, action and outcome.
+
+    Like `edi.exchange.record.counter`, rows are deltas:
+    actions of a transaction are aggregated and appended at commit time,
+    rows are merged by `_cron_compact`.
+    The table stays small and can be read at will by monitoring tools.
+    """
+
+    _name = "edi.exchange.action.metric"
+    _description = "EDI exchange action metric"
+    _log_access = False
+
+    backend_id = fields.Many2one(
+        comodel_name="edi.backend", ondelete="cascade", readonly=True
+    )
+    type_id = fields.Many2one(
+        string="Exchange type",
+        comodel_name="edi.exchange.type",
+        ondelete="cascade",
+        readonly=True,
+    )
+    action = fields.Selection(selection=ACTIONS, readonly=True)
+    failed = fields.Boolean(readonly=True)
+    bucket = fields.Integer(
+        readonly=True, help="Index of the duration bucket in `DURATION_BUCKETS`."
+    )
+    count = fields.Integer(readonly=True)
+    duration_sum = fields.Float(readonly=True)
+
+    _buffer_key = "edi_oca.action_metric"
+
+    @api.model
+    def _add(self, backend_id, type_id, action, duration, failed):
+        """Buffer the duration of an action until commit time.
+
+        No query is made: it can be called when the transaction is broken.
+        See `_flush_buffer`.
+        """
+        data = self.env.cr.precommit.data
+        if self._buffer_key not in data:
+            data[self._buffer_key] = defaultdict(lambda: [0, 0.0])
+            self.env.cr.precommit.add(self._flush_buffer)
+        key = (
+            backend_id,
+            type_id,
+            action,
+            failed,
+            bisect.bisect_left(DURATION_BUCKETS, duration),
+        )
+        values = data[self._buffer_key][key]
+        values[0] += 1
+        values[1] += duration
+
+    @api.model
+    def _flush_buffer(self):
+        """Append one row per key for the actions buffered by `_add`."""
+        buffer = self.env.cr.precommit.data.pop(self._buffer_key, {})
+        rows = [key + tuple(values) for key, values in buffer.items()]
+        if not rows:
+            return
+        query = """
+            INSERT INTO edi_exchange_action_metric
+                (backend_id, type_id, action, failed, bucket, count, duration_sum)
+            VALUES {}
+        """.format(
+            ", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(rows))
+        )
+        self.env.cr.execute(query, [value for row in rows for value in row])
+
+    @api.model
+    def _get_metrics(self, backend_ids=None):
+        """Return metrics by (backend_id, type_id, action, failed, bucket).
+
+        :return: dict {key: (count, duration sum)}
+        """
+        self._flush_buffer()
+        where = ""
+        params = []
+        if backend_ids is not None:
+            where = "WHERE backend_id IN %s"
+            params.append(tuple(backend_ids) or (None,))
+        self.env.cr.execute(
+            """
+            SELECT backend_id, type_id, action, failed, bucket,
+                SUM(count), SUM(duration_sum)
+            FROM edi_exchange_action_metric
+            {}
+            GROUP BY backend_id, type_id, action, failed, bucket
+            """.format(
+                where
+            ),
+            params,
+        )
+        return {tuple(row[:5]): tuple(row[5:]) for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _cron_compact(self):
+        """Merge delta rows into one row per key."""
+        self._flush_buffer()
+        self.env.cr.execute(
+            """
+            WITH deleted AS (
+                DELETE FROM edi_exchange_action_metric
+                RETURNING backend_id, type_id, action, failed, bucket,
+                    count, duration_sum
+            )
+            INSERT INTO edi_exchange_action_metric
+                (backend_id, type_id, action, failed, bucket, count, duration_sum)
+            SELECT backend_id, type_id, action, failed, bucket,
+                SUM(count), SUM(duration_sum)
+            FROM deleted
+            GROUP BY backend_id, type_id, action, failed, bucket
+            """
+        )
+        _logger.info(
+            "EDI exchange action metrics compacted: %d rows", self.env.cr.rowcount
+        )
+        self.invalidate_cache()
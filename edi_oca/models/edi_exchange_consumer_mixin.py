@@ -4,10 +4,12 @@
 # @author Simone Orsi <simahawk@gmail.com>
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+import copy
+from collections import defaultdict
 
 from lxml import etree
 
-from odoo import api, fields, models
+from odoo import api, fields, models, tools
 from odoo.tools import safe_eval
 
 from odoo.addons.base_sparse_field.models.fields import Serialized
@@ -41,6 +43,16 @@ class EDIExchangeConsumerMixin(models.AbstractModel):
         domain=lambda r: [("model", "=", r._name)],
     )
     exchange_record_count = fields.Integer(compute="_compute_exchange_record_count")
+    edi_last_exchange_record_id = fields.Many2one(
+        string="Last EDI exchange",
+        comodel_name="edi.exchange.record",
+        compute="_compute_edi_last_exchange",
+    )
+    edi_last_exchange_state = fields.Selection(
+        string="Last EDI exchange state",
+        selection="_selection_edi_last_exchange_state",
+        compute="_compute_edi_last_exchange",
+    )
     edi_config = Serialized(
         compute="_compute_edi_config",
         default={},
@@ -54,35 +66,33 @@ class EDIExchangeConsumerMixin(models.AbstractModel):
     )
 
     def _compute_edi_config(self):
+        configs = self._edi_get_exchange_type_configs()
         for record in self:
-            config = record._edi_get_exchange_type_config()
+            config = configs.get(record.id, {})
             record.edi_config = config
             record.edi_has_form_config = any([x.get("form") for x in config.values()])
 
     def _edi_get_exchange_type_config(self):
+        self.ensure_one()
+        return self._edi_get_exchange_type_configs().get(self.id, {})
+
+    def _edi_get_exchange_type_configs(self):
+        """Return the configuration of enabled exchange types by record.
+
+        Rules are evaluated once for the whole recordset,
+        see `_edi_filter_by_rule`.
+
+        :return: dict {record id: {rule id: conf}}
+        """
         # TODO: move this machinery to the rule model
-        rules = (
-            self.env["edi.exchange.type.rule"]
-            .sudo()
-            .search([("model_id.model", "=", self._name)])
-        )
-        result = {}
-        for rule in rules:
-            exchange_type = rule.type_id
-            eval_ctx = dict(
-                self._get_eval_context(), record=self, exchange_type=exchange_type
-            )
-            domain = safe_eval.safe_eval(rule.enable_domain or "[]", eval_ctx)
-            if not self.filtered_domain(domain):
+        result = defaultdict(dict)
+        for rule in self.env["edi.exchange.type.rule"]._get_rules(self._name):
+            records = self._edi_filter_by_rule(rule)
+            if not records:
                 continue
-            if rule.enable_snippet:
-                safe_eval.safe_eval(
-                    rule.enable_snippet, eval_ctx, mode="exec", nocopy=True
-                )
-                if not eval_ctx.get("result", False):
-                    continue
-
-            result[rule.id] = self._edi_get_exchange_type_rule_conf(rule)
+            conf = self._edi_get_exchange_type_rule_conf(rule)
+            for record in records:
+                result[record.id][rule.id] = conf
         return result
 
     @api.model
@@ -123,29 +133,56 @@ class EDIExchangeConsumerMixin(models.AbstractModel):
         )
         if view_type == "form":
             doc = etree.XML(res["arch"])
-            for node in doc.xpath("//sheet"):
-                # TODO: add a default group
-                group = False
-                if hasattr(self, "_edi_generate_group"):
-                    group = self._edi_generate_group
-                str_element = self.env["ir.qweb"]._render(
-                    "edi_oca.edi_exchange_consumer_mixin_buttons",
-                    {"group": group},
-                )
-                node.addprevious(etree.fromstring(str_element))
-            View = self.env["ir.ui.view"]
-
+            sheets = doc.xpath("//sheet")
+            if not sheets:
+                return res
+            # TODO: add a default group
+            group = getattr(self, "_edi_generate_group", False)
+            base_model = False
             # Override context for postprocessing
             if view_id and res.get("base_model", self._name) != self._name:
-                View = View.with_context(base_model_name=res["base_model"])
-            new_arch, new_fields = View.postprocess_and_fields(doc, self._name)
-            res["arch"] = new_arch
+                base_model = res["base_model"]
+            buttons_arch, buttons_fields = self._edi_get_form_buttons(group, base_model)
+            if not buttons_arch:
+                # Hidden by groups
+                return res
+            for node in sheets:
+                node.addprevious(etree.fromstring(buttons_arch))
+            res["arch"] = etree.tostring(doc, encoding="unicode")
             # We don't want to lose previous configuration, so, we only want to add
             # the new fields
+            new_fields = copy.deepcopy(buttons_fields)
             new_fields.update(res["fields"])
             res["fields"] = new_fields
         return res
 
+    @api.model
+    @tools.ormcache(
+        "group", "base_model", "self.env.uid", "self.env.su", "self.env.lang"
+    )
+    def _edi_get_form_buttons(self, group, base_model):
+        """Render and postprocess EDI buttons for the form once.
+
+        The result is cached until views or rules change.
+        Only the buttons are postprocessed, not the whole form.
+
+        :return: tuple (buttons arch, buttons fields)
+        """
+        str_element = self.env["ir.qweb"]._render(
+            "edi_oca.edi_exchange_consumer_mixin_buttons",
+            {"group": group},
+        )
+        wrapper = etree.Element("form")
+        wrapper.append(etree.fromstring(str_element))
+        View = self.env["ir.ui.view"]
+        if base_model:
+            View = View.with_context(base_model_name=base_model)
+        arch, fields_info = View.postprocess_and_fields(wrapper, self._name)
+        nodes = etree.fromstring(arch)
+        if not len(nodes):
+            return False, {}
+        return etree.tostring(nodes[0], encoding="unicode"), fields_info
+
     def _edi_create_exchange_record_vals(self, exchange_type):
         return {
             "model": self._name,
@@ -159,6 +196,92 @@ class EDIExchangeConsumerMixin(models.AbstractModel):
         vals.update(self._edi_create_exchange_record_vals(exchange_type))
         return backend.create_record(exchange_type.code, vals)
 
+    def _edi_create_exchange_records(self, exchange_types, backend=None, vals=None):
+        """Create exchange records for the whole recordset at once.
+
+        :param exchange_types: dict {exchange type: records to create exchanges for}
+            as returned by `_edi_get_enabled_exchange_types`
+        :param backend: backend to use for types w/o backend
+        :param vals: extra values for all exchange records
+        :return: created edi.exchange.record recordset
+        """
+        vals_list = []
+        for exchange_type, records in exchange_types.items():
+            type_backend = exchange_type.backend_id or backend
+            assert type_backend
+            for record in records:
+                values = dict(vals or {})
+                values.update(record._edi_create_exchange_record_vals(exchange_type))
+                vals_list.append(
+                    type_backend._create_record_prepare_values(
+                        exchange_type.code, values, exchange_type=exchange_type
+                    )
+                )
+        # One multi-create for all records and types
+        return self.env["edi.exchange.record"].create(vals_list)
+
+    def _edi_get_enabled_exchange_types(self, kind=None, skip_existing=False):
+        """Evaluate exchange type rules on the whole recordset.
+
+        Domains not depending on `record` are evaluated once for all records,
+        snippets are evaluated only for records matching the domain.
+
+        :param kind: evaluate only rules of this kind
+        :param skip_existing: leave out records having already
+            an exchange record of the type
+        :return: dict {exchange type: records enabled for it}
+        """
+        rules = self.env["edi.exchange.type.rule"]._get_rules(self._name, kind=kind)
+        result = defaultdict(self.browse)
+        for rule in rules:
+            exchange_type = rule.type_id
+            records = self._edi_filter_by_rule(rule)
+            if records and skip_existing:
+                records = records._edi_filter_without_exchange_record(exchange_type)
+            if records:
+                result[exchange_type] |= records
+        return dict(result)
+
+    def _edi_filter_by_rule(self, rule):
+        """Return records satisfying rule's domain and snippet."""
+        exchange_type = rule.type_id
+        if rule._is_domain_record_dependent():
+            records = self.filtered(
+                lambda rec: rec._edi_eval_rule_domain(rule, exchange_type)
+            )
+        else:
+            records = self._edi_eval_rule_domain(rule, exchange_type)
+        if rule.enable_snippet:
+            records = records.filtered(
+                lambda rec: rec._edi_eval_rule_snippet(rule, exchange_type)
+            )
+        return records
+
+    def _edi_eval_rule_domain(self, rule, exchange_type):
+        eval_ctx = dict(
+            self._get_eval_context(), record=self, exchange_type=exchange_type
+        )
+        domain = safe_eval.safe_eval(
+            rule.enable_domain or "[]", eval_ctx, nocopy=True
+        )
+        return self.filtered_domain(domain)
+
+    def _edi_eval_rule_snippet(self, rule, exchange_type):
+        eval_ctx = dict(
+            self._get_eval_context(), record=self, exchange_type=exchange_type
+        )
+        safe_eval.safe_eval(rule.enable_snippet, eval_ctx, mode="exec", nocopy=True)
+        return eval_ctx.get("result", False)
+
+    def _edi_filter_without_exchange_record(self, exchange_type, backend=None):
+        """Return records having no exchange record of given type yet.
+
+        Existing exchanges are looked up in one query for the whole recordset.
+        """
+        return self - self._edi_has_exchange_records(
+            exchange_type, backend=backend or exchange_type.backend_id
+        )
+
     def edi_create_exchange_record(self, exchange_type_id):
         self.ensure_one()
         exchange_type = self.env["edi.exchange.type"].browse(exchange_type_id)
@@ -230,6 +353,81 @@ class EDIExchangeConsumerMixin(models.AbstractModel):
             )
         )
 
+    @api.model
+    def _selection_edi_last_exchange_state(self):
+        return self.env["edi.exchange.record"]._fields["edi_exchange_state"].selection
+
+    def _edi_get_status_exchange_types(self):
+        """Return exchange types considered by `edi_last_exchange_*` fields.
+
+        By default the last exchange of any type is used.
+        Override to restrict it (eg: to outgoing invoices only).
+        """
+        return None
+
+    def _compute_edi_last_exchange(self):
+        latest = self._edi_get_latest_exchange_records(
+            exchange_types=self._edi_get_status_exchange_types()
+        )
+        exchange_model = self.env["edi.exchange.record"]
+        for rec in self:
+            by_type = latest.get(rec.id, {})
+            last = max(by_type.values(), key=lambda x: x[0].id, default=None)
+            rec.edi_last_exchange_record_id = last[0] if last else exchange_model
+            rec.edi_last_exchange_state = last[1] if last else False
+
+    def _edi_get_latest_exchange_records(self, exchange_types=None, backend=None):
+        """Return the latest exchange record of each type for the whole recordset.
+
+        Lookup happens in one query on the (model, res_id, type_id) index.
+
+        :param exchange_types: restrict to these exchange types
+        :param backend: restrict to this backend
+        :return: dict {record id: {exchange type id: (exchange record, state)}}
+        """
+        ids = [x for x in self.ids if isinstance(x, int)]
+        if not ids or (exchange_types is not None and not exchange_types):
+            return {}
+        exchange_model = self.env["edi.exchange.record"]
+        exchange_model.flush(
+            ["model", "res_id", "type_id", "backend_id", "edi_exchange_state"]
+        )
+        where = ["model = %s", "res_id IN %s"]
+        params = [self._name, tuple(ids)]
+        if exchange_types is not None:
+            where.append("type_id IN %s")
+            params.append(tuple(exchange_types.ids))
+        if backend:
+            where.append("backend_id = %s")
+            params.append(backend.id)
+        self.env.cr.execute(
+            """
+            SELECT DISTINCT ON (res_id, type_id) res_id, type_id, id, edi_exchange_state
+            FROM edi_exchange_record
+            WHERE {}
+            ORDER BY res_id, type_id, id DESC
+            """.format(
+                " AND ".join(where)
+            ),
+            params,
+        )
+        rows = self.env.cr.fetchall()
+        prefetch_ids = [row[2] for row in rows]
+        result = defaultdict(dict)
+        for res_id, type_id, exchange_id, state in rows:
+            exchange_record = exchange_model.browse(exchange_id).with_prefetch(
+                prefetch_ids
+            )
+            result[res_id][type_id] = (exchange_record, state)
+        return dict(result)
+
+    def _edi_has_exchange_records(self, exchange_type, backend=None):
+        """Return records having an exchange of given type, in one query."""
+        latest = self._edi_get_latest_exchange_records(
+            exchange_types=exchange_type, backend=backend
+        )
+        return self.filtered(lambda rec: exchange_type.id in latest.get(rec.id, {}))
+
     @api.depends("exchange_record_ids")
     def _compute_exchange_record_count(self):
         data = self.env["edi.exchange.record"].read_group(
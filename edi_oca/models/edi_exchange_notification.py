@@ -0,0 +1,120 @@
+# Copyright 2026 Camptocamp SA (http://www.camptocamp.com)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.tools import groupby
+
+
+class EDIExchangeNotification(models.Model):
+    """
+    Notifications waiting to be posted on related records.
+
+    Exchange types in "window" notification mode buffer here
+    their notifications: the cron posts one digest message per related record
+    once its oldest notification is due.
+    """
+
+    _name = "edi.exchange.notification"
+    _description = "EDI exchange notification"
+    _log_access = False
+    _order = "id"
+
+    exchange_record_id = fields.Many2one(
+        comodel_name="edi.exchange.record",
+        ondelete="cascade",
+        required=True,
+        readonly=True,
+    )
+    model = fields.Char(required=True, readonly=True)
+    res_id = fields.Many2oneReference(
+        string="Record", required=True, readonly=True, model_field="model"
+    )
+    message = fields.Char(readonly=True)
+    level = fields.Selection(
+        selection=[("info", "Info"), ("warning", "Warning"), ("error", "Error")],
+        readonly=True,
+    )
+    post_after = fields.Datetime(required=True, readonly=True, index=True)
+
+    @api.model
+    def _post_notifications(self, target, items):
+        """Post notifications on target record.
+
+        :param target: the related record
+        :param items: list of (exchange record, message, level)
+        """
+        if not target.exists():
+            return
+        subtype_id = self.env.ref("mail.mt_note").id
+        if len(items) == 1:
+            exchange_record, message, level = items[0]
+            target.message_post_with_view(
+                "edi_oca.message_edi_exchange_link",
+                values={
+                    "backend": exchange_record.backend_id,
+                    "exchange_record": exchange_record,
+                    "message": message,
+                    "level": level,
+                },
+                subtype_id=subtype_id,
+            )
+            return
+        target.message_post_with_view(
+            "edi_oca.message_edi_exchange_digest",
+            values={
+                "items": [
+                    {"exchange_record": rec, "message": message, "level": level}
+                    for rec, message, level in items
+                ]
+            },
+            subtype_id=subtype_id,
+        )
+
+    @api.model
+    def _delay_notifications(self, items):
+        """Buffer notifications to post them later, as a digest.
+
+        :param items: list of (exchange record, message, level)
+        """
+        if not items:
+            return
+        now = fields.Datetime.now()
+        self.sudo().create(
+            [
+                {
+                    "exchange_record_id": rec.id,
+                    "model": rec.model,
+                    "res_id": rec.res_id,
+                    "message": message,
+                    "level": level,
+                    "post_after": now
+                    + timedelta(minutes=rec.type_id.notification_window),
+                }
+                for rec, message, level in items
+            ]
+        )
+
+    @api.model
+    def _cron_post_digests(self):
+        """Post digests for related records having due notifications."""
+        due = self.search([("post_after", "<=", fields.Datetime.now())])
+        if not due:
+            return
+        keys = {(x.model, x.res_id) for x in due}
+        pending = self.search([("res_id", "in", list({x[1] for x in keys}))])
+        pending = pending.filtered(lambda x: (x.model, x.res_id) in keys)
+        for (model, res_id), notifications in groupby(
+            pending, lambda x: (x.model, x.res_id)
+        ):
+            if model not in self.env:
+                continue
+            self._post_notifications(
+                self.env[model].browse(res_id),
+                [
+                    (x.exchange_record_id, x.message, x.level)
+                    for x in notifications
+                ],
+            )
+        pending.unlink()
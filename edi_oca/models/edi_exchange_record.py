@@ -4,15 +4,39 @@
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
 import base64
+import functools
+import io
 import logging
+import mimetypes
+import mmap
+import os
+import shutil
+import tempfile
 from collections import defaultdict
+from contextlib import closing, contextmanager
 
-from odoo import _, api, exceptions, fields, models
+from odoo import _, api, exceptions, fields, models, tools
+from odoo.osv.query import Query
+from odoo.tools import groupby
 
-from ..utils import exchange_record_job_identity_exact, get_checksum
+from odoo.addons.queue_job.delay import chain
+
+from ..utils import (
+    COMPRESSION_MIMETYPES,
+    HashingWriter,
+    compress,
+    compress_stream,
+    decompress_stream,
+    exchange_record_job_identity_exact,
+    get_checksum,
+    normalize_string,
+)
 
 _logger = logging.getLogger(__name__)
 
+# Fields identifying the counters of `edi.exchange.record.counter`
+_COUNTER_FIELDS = {"backend_id", "type_id", "edi_exchange_state"}
+
 
 class EDIExchangeRecord(models.Model):
     """
@@ -35,7 +59,8 @@ class EDIExchangeRecord(models.Model):
         auto_join=True,
         index=True,
     )
-    direction = fields.Selection(related="type_id.direction")
+    # Stored to allow claiming pending records w/o joining types
+    direction = fields.Selection(related="type_id.direction", store=True)
     backend_id = fields.Many2one(comodel_name="edi.backend", required=True)
     model = fields.Char(index=True, required=False, readonly=True)
     res_id = fields.Many2oneReference(
@@ -53,7 +78,47 @@ class EDIExchangeRecord(models.Model):
         compute="_compute_exchange_filename", readonly=False, store=True
     )
     exchange_filechecksum = fields.Char(
-        compute="_compute_exchange_filechecksum", store=True
+        readonly=True,
+        copy=False,
+        index=True,
+        help="SHA-256 checksum of the raw content, set when the file is written.",
+    )
+    exchange_file_size = fields.Integer(
+        string="File size",
+        readonly=True,
+        copy=False,
+        help="Size in bytes of the raw content, set when the file is written.",
+    )
+    exchange_file_compression = fields.Selection(
+        selection=[("gzip", "Gzip"), ("zstd", "Zstandard")],
+        string="File compression",
+        readonly=True,
+        copy=False,
+        help="Compression applied to the stored file. "
+        "Content is decompressed transparently when read.",
+    )
+    exchange_file_location = fields.Char(
+        string="File cold storage location",
+        readonly=True,
+        copy=False,
+        help="The file has been moved to this cold storage location. "
+        "It is read from there transparently.",
+    )
+    exchange_file_download = fields.Binary(
+        string="File content",
+        compute="_compute_exchange_file_download",
+        help="Content of the exchange file, decompressed.",
+    )
+    exchange_file_offloaded = fields.Boolean(
+        string="File offloaded",
+        compute="_compute_exchange_file_offloaded",
+        store=True,
+    )
+    duplicate_of_id = fields.Many2one(
+        comodel_name="edi.exchange.record",
+        readonly=True,
+        copy=False,
+        help="Record already received w/ the same content.",
     )
     exchanged_on = fields.Datetime(
         string="Exchanged on",
@@ -84,6 +149,8 @@ class EDIExchangeRecord(models.Model):
             ("input_receive_error", "Error on reception"),
             ("input_processed", "Processed"),
             ("input_processed_error", "Error on process"),
+            ("input_split", "Split"),
+            ("input_duplicate", "Duplicate"),
         ],
     )
     exchange_error = fields.Text(string="Exchange error", readonly=True, copy=False)
@@ -110,10 +177,34 @@ class EDIExchangeRecord(models.Model):
     ack_received_on = fields.Datetime(
         string="ACK received on", related="ack_exchange_id.exchanged_on"
     )
+    ack_overdue = fields.Boolean(
+        string="ACK overdue",
+        readonly=True,
+        copy=False,
+        help="The ACK has not been received within the delay set on the type.",
+    )
+    claimed_until = fields.Datetime(
+        readonly=True,
+        copy=False,
+        help="Consumers of the backend do not claim the record until this date, "
+        "eg: while it is rescheduled in its own job.",
+    )
     retryable = fields.Boolean(
         compute="_compute_retryable",
         help="The record state can be rolled back manually in case of failure.",
     )
+    split_count = fields.Integer(
+        compute="_compute_split_counts",
+        help="Number of records the input file has been split into.",
+    )
+    split_done_count = fields.Integer(compute="_compute_split_counts")
+    split_error_count = fields.Integer(compute="_compute_split_counts")
+    chatter_disabled = fields.Boolean(related="type_id.disable_chatter")
+    state_log_ids = fields.One2many(
+        string="State log",
+        comodel_name="edi.exchange.record.state.log",
+        inverse_name="exchange_record_id",
+    )
 
     _sql_constraints = [
         ("identifier_uniq", "unique(identifier)", "The identifier must be unique."),
@@ -124,10 +215,42 @@ class EDIExchangeRecord(models.Model):
         ),
     ]
 
+    def init(self):
+        # Used to claim pending records by backend, direction and state
+        tools.create_index(
+            self.env.cr,
+            "edi_exchange_record_claim_index",
+            self._table,
+            ["backend_id", "direction", "edi_exchange_state", "id"],
+        )
+        # Used to find the oldest record by type and state (see `edi.metrics`)
+        tools.create_index(
+            self.env.cr,
+            "edi_exchange_record_type_state_date_index",
+            self._table,
+            ["type_id", "edi_exchange_state", "create_date"],
+        )
+        # Used to find the exchanges of consumer records by type
+        # (see `edi.exchange.consumer.mixin._edi_get_latest_exchange_records`)
+        tools.create_index(
+            self.env.cr,
+            "edi_exchange_record_model_res_id_type_index",
+            self._table,
+            ["model", "res_id", "type_id"],
+        )
+        # Used to find ACKs by parent and ACK type
+        tools.create_index(
+            self.env.cr,
+            "edi_exchange_record_parent_type_index",
+            self._table,
+            ["parent_id", "type_id", "id"],
+        )
+
     @api.depends("model", "res_id")
     def _compute_related_name(self):
+        related_records = self._get_related_records()
         for rec in self:
-            related_record = rec.record
+            related_record = related_records[rec.id]
             rec.related_name = related_record.display_name if related_record else ""
 
     @api.depends("model", "type_id")
@@ -138,13 +261,31 @@ class EDIExchangeRecord(models.Model):
             if not rec.exchange_filename:
                 rec.exchange_filename = rec.type_id._make_exchange_filename(rec)
 
-    @api.depends("exchange_file")
-    def _compute_exchange_filechecksum(self):
+    @api.depends("exchange_file_location")
+    def _compute_exchange_file_offloaded(self):
         for rec in self:
-            content = rec.exchange_file or ""
-            if not isinstance(content, bytes):
-                content = content.encode()
-            rec.exchange_filechecksum = get_checksum(content)
+            rec.exchange_file_offloaded = bool(rec.exchange_file_location)
+
+    @api.depends("exchange_file", "exchange_file_location")
+    @api.depends_context("bin_size")
+    def _compute_exchange_file_download(self):
+        # Stored files can be compressed or offloaded:
+        # serve the actual content for download.
+        bin_size = self.env.context.get("bin_size")
+        for rec in self:
+            stored = rec.with_context(bin_size=True).exchange_file
+            if not stored and not rec.exchange_file_location:
+                rec.exchange_file_download = False
+            elif not rec._is_file_content_transformed():
+                rec.exchange_file_download = rec.exchange_file
+            elif bin_size:
+                rec.exchange_file_download = (
+                    tools.human_size(rec.exchange_file_size)
+                    if rec.exchange_file_size
+                    else stored or _("Offloaded")
+                )
+            else:
+                rec.exchange_file_download = rec._get_file_content(binary=False)
 
     @api.depends("edi_exchange_state")
     def _compute_exchanged_on(self):
@@ -164,26 +305,277 @@ class EDIExchangeRecord(models.Model):
 
     @api.depends("related_exchange_ids.type_id")
     def _compute_ack_exchange_id(self):
+        acks = self._get_ack_records()
         for rec in self:
-            rec.ack_exchange_id = rec._get_ack_record()
+            if isinstance(rec.id, int):
+                rec.ack_exchange_id = acks.get(rec.id)
+            else:
+                # New record: children are not in the database
+                rec.ack_exchange_id = rec._get_ack_record()
 
     def _get_ack_record(self):
         if not self.type_id.ack_type_id:
             return None
+        if isinstance(self.id, int):
+            return self._get_ack_records().get(self.id, self.browse())
         return fields.first(
             self.related_exchange_ids.filtered(
                 lambda x: x.type_id == self.type_id.ack_type_id
             ).sorted("id", reverse=True)
         )
 
+    def _get_ack_records(self):
+        """Return the latest ACK of each record.
+
+        ACKs are looked up in one query on the (parent_id, type_id) index
+        instead of loading all the children.
+
+        :return: dict {record id: ACK record}
+        """
+        ids = [x for x in self.ids if isinstance(x, int)]
+        ack_type_ids = tuple(self.type_id.ack_type_id.ids)
+        if not ids or not ack_type_ids:
+            return {}
+        self.flush(["parent_id", "type_id"])
+        self.env.cr.execute(
+            """
+            SELECT DISTINCT ON (parent_id, type_id) parent_id, type_id, id
+            FROM edi_exchange_record
+            WHERE parent_id IN %s AND type_id IN %s
+            ORDER BY parent_id, type_id, id DESC
+            """,
+            (tuple(ids), ack_type_ids),
+        )
+        ack_ids = {(row[0], row[1]): row[2] for row in self.env.cr.fetchall()}
+        result = {}
+        for rec in self:
+            ack_id = ack_ids.get((rec.id, rec.type_id.ack_type_id.id))
+            if ack_id:
+                result[rec.id] = self.browse(ack_id)
+        return result
+
+    def _resolve_ack_parents(self, references=None):
+        """Link incoming ACKs to the records they acknowledge.
+
+        Parents are matched in one query by identifier or external identifier
+        among the records of the same backend whose type expects this ACK type.
+        Called when incoming ACKs are created and received,
+        see `_filter_orphan_acks`.
+
+        :param references: dict {ACK id: reference of the acknowledged record},
+            ACKs' external identifier by default
+        :return: ACKs linked to their parent
+        """
+        acks = self.filtered(lambda x: not x.parent_id)
+        if references is None:
+            references = {ack.id: ack.external_identifier for ack in acks}
+        refs = tuple({ref for ref in references.values() if ref})
+        if not acks or not refs:
+            return self.browse()
+        self.flush(["identifier", "external_identifier", "type_id", "backend_id"])
+        self.env.cr.execute(
+            """
+            SELECT rec.id, rec.backend_id, exc_type.ack_type_id,
+                rec.identifier, rec.external_identifier
+            FROM edi_exchange_record rec
+            JOIN edi_exchange_type exc_type ON exc_type.id = rec.type_id
+            WHERE exc_type.ack_type_id IN %s
+                AND rec.backend_id IN %s
+                AND (rec.identifier IN %s OR rec.external_identifier IN %s)
+            ORDER BY rec.id
+            """,
+            (tuple(acks.type_id.ids), tuple(acks.backend_id.ids), refs, refs),
+        )
+        parent_ids = {}
+        for parent_id, backend_id, ack_type_id, *parent_refs in self.env.cr.fetchall():
+            for ref in parent_refs:
+                if ref:
+                    # Latest record wins
+                    parent_ids[(backend_id, ack_type_id, ref)] = parent_id
+        matched = self.browse()
+        for ack in acks:
+            key = (ack.backend_id.id, ack.type_id.id, references.get(ack.id))
+            if key not in parent_ids:
+                continue
+            parent = self.browse(parent_ids[key])
+            vals = {"parent_id": parent.id}
+            if not ack.model:
+                vals.update(model=parent.model, res_id=parent.res_id)
+            ack.write(vals)
+            parent._notify_ack_received()
+            matched |= ack
+        return matched
+
+    def _filter_orphan_acks(self):
+        """Return incoming ACKs not linked to the record they acknowledge."""
+        return self.filtered(
+            lambda x: x.direction == "input"
+            and not x.parent_id
+            and x.type_id.ack_for_type_ids
+        )
+
+    def _clear_parent_ack_overdue(self):
+        """Parents are not late anymore when their ACK comes in."""
+        late_parents = self.filtered(
+            lambda x: x.parent_id.ack_overdue
+            and x.type_id == x.parent_id.type_id.ack_type_id
+        ).parent_id
+        if late_parents:
+            late_parents.write({"ack_overdue": False})
+
+    @api.model
+    def _get_ack_waiting_states(self):
+        """States in which records wait for their ACK."""
+        return (
+            "output_sent",
+            "output_sent_and_processed",
+            "input_received",
+            "input_processed",
+            "input_split",
+        )
+
+    def _get_input_duplicate_states(self):
+        """States of records making input w/ the same content a duplicate."""
+        return ("input_processed", "input_split")
+
+    def _get_split_children(self):
+        self.ensure_one()
+        if not self.type_id.split_type_id or not isinstance(self.id, int):
+            return self.browse()
+        return self.search(
+            [
+                ("parent_id", "=", self.id),
+                ("type_id", "=", self.type_id.split_type_id.id),
+            ]
+        )
+
+    def _get_split_state_counts(self):
+        """Count the children of split records by state.
+
+        :return: dict {record id: {state: count}}
+        """
+        ids = [x for x in self.ids if isinstance(x, int)]
+        split_type_ids = self.type_id.split_type_id.ids
+        res = defaultdict(dict)
+        if not ids or not split_type_ids:
+            return res
+        groups = self.read_group(
+            [("parent_id", "in", ids), ("type_id", "in", split_type_ids)],
+            ["parent_id", "edi_exchange_state"],
+            ["parent_id", "edi_exchange_state"],
+            lazy=False,
+        )
+        for group in groups:
+            res[group["parent_id"][0]][group["edi_exchange_state"]] = group["__count"]
+        return res
+
+    def _get_split_done_states(self):
+        """States of split children processed successfully."""
+        return ("input_processed", "input_duplicate")
+
+    def _get_split_error_states(self):
+        """States of split children that failed."""
+        return ("validate_error", "input_receive_error", "input_processed_error")
+
+    @api.depends("related_exchange_ids.edi_exchange_state")
+    def _compute_split_counts(self):
+        counts = self._get_split_state_counts()
+        done_states = self._get_split_done_states()
+        error_states = self._get_split_error_states()
+        for rec in self:
+            states = counts.get(rec.id, {})
+            rec.split_count = sum(states.values())
+            rec.split_done_count = sum(
+                count for state, count in states.items() if state in done_states
+            )
+            rec.split_error_count = sum(
+                count for state, count in states.items() if state in error_states
+            )
+
+    _split_buffer_key = "edi_oca.split"
+
+    def _schedule_split_state_update(self):
+        """Buffer split records to update their state once committed.
+
+        Children are processed in parallel jobs: they must not write
+        their parents, otherwise their transactions would conflict.
+        Only children reaching a finished state trigger the update,
+        done by one job per parent, see `_delay_split_state_update`.
+        """
+        finished_states = (
+            self._get_split_done_states() + self._get_split_error_states()
+        )
+        records = (
+            self.filtered(lambda x: x.edi_exchange_state == "input_split")
+            | self.filtered(
+                lambda x: x.edi_exchange_state in finished_states
+            ).parent_id
+        ).filtered(lambda x: x.edi_exchange_state == "input_split")
+        if not records:
+            return
+        data = self.env.cr.precommit.data
+        if self._split_buffer_key not in data:
+            data[self._split_buffer_key] = set()
+            self.env.cr.precommit.add(self.browse()._flush_split_buffer)
+        data[self._split_buffer_key].update(records.ids)
+
+    def _flush_split_buffer(self):
+        record_ids = self.env.cr.precommit.data.pop(self._split_buffer_key, ())
+        for rec in self.browse(sorted(record_ids)).exists():
+            rec._delay_split_state_update()
+
+    def _delay_split_state_update(self):
+        """Delay the update of the split record state.
+
+        Jobs are queued in the `edi_split` channel, one per record at a time:
+        run the channel w/ capacity 1 to never update the same record
+        from concurrent transactions.
+        """
+        self.ensure_one()
+        channel = self.env.ref("edi_oca.channel_edi_split")
+        self.with_delay(
+            channel=channel.complete_name,
+            identity_key="edi_split_state_update_{}".format(self.id),
+        )._update_split_state()
+
+    def _update_split_state(self):
+        """Set the state of split records once all their children are done.
+
+        Records stay split while a child is pending.
+        Then they are in error if any child failed, processed otherwise.
+        """
+        counts = self._get_split_state_counts()
+        error_states = self._get_split_error_states()
+        finished_states = self._get_split_done_states() + error_states
+        for rec in self.filtered(lambda x: x.edi_exchange_state == "input_split"):
+            states = counts.get(rec.id, {})
+            if any(state not in finished_states for state in states):
+                continue
+            errors = sum(
+                count for state, count in states.items() if state in error_states
+            )
+            if errors:
+                rec.write(
+                    {
+                        "edi_exchange_state": "input_processed_error",
+                        "exchange_error": _("%d of %d documents failed.")
+                        % (errors, sum(states.values())),
+                    }
+                )
+                rec._notify_error("process_ko")
+            else:
+                rec.write({"edi_exchange_state": "input_processed"})
+                rec._notify_done()
+
     def _compute_ack_expected(self):
         for rec in self:
             rec.ack_expected = bool(self.type_id.ack_type_id)
 
     @api.depends("res_id", "model")
     def _compute_related_record_exists(self):
+        related_records = self._get_related_records()
         for rec in self:
-            rec.related_record_exists = bool(rec.record)
+            rec.related_record_exists = bool(related_records[rec.id])
 
     def needs_ack(self):
         return self.type_id.ack_type_id and not self.ack_exchange_id
@@ -211,6 +603,50 @@ class EDIExchangeRecord(models.Model):
             return self.parent_id.record
         return self.env[self.model].browse(self.res_id).exists()
 
+    def _get_related_records(self):
+        """Resolve related records of all the exchange records at once.
+
+        Same as `record` but existing related records are looked up
+        in one query per model and share the same prefetch.
+        Parents are followed level by level for records w/o model.
+
+        :return: dictionary {exchange record id: related record or None}
+        """
+        owner_by_id = {}
+        current = {rec.id: rec for rec in self}
+        # Protect against parents loop
+        visited = defaultdict(set)
+        while current:
+            next_level = {}
+            for rec_id, rec in current.items():
+                if rec.model:
+                    owner_by_id[rec_id] = rec
+                elif rec.parent_id and rec.parent_id.id not in visited[rec_id]:
+                    visited[rec_id].add(rec.parent_id.id)
+                    next_level[rec_id] = rec.parent_id
+            current = next_level
+        ids_by_model = defaultdict(set)
+        for owner in owner_by_id.values():
+            ids_by_model[owner.model].add(owner.res_id)
+        existing_by_model = {}
+        for model, res_ids in ids_by_model.items():
+            if model not in self.env:
+                continue
+            records = self.env[model].browse(res_ids).exists()
+            existing_by_model[model] = (set(records.ids), records)
+        result = {}
+        for rec in self:
+            owner = owner_by_id.get(rec.id)
+            if owner is None or owner.model not in existing_by_model:
+                result[rec.id] = None
+                continue
+            existing_ids, records = existing_by_model[owner.model]
+            related_id = owner.res_id if owner.res_id in existing_ids else ()
+            related = records.browse(related_id)
+            # Keep the prefetch of the whole batch
+            result[rec.id] = related.with_prefetch(records._prefetch_ids)
+        return result
+
     def _set_file_content(
         self, output_string, encoding="utf-8", field_name="exchange_file"
     ):
@@ -218,55 +654,368 @@ class EDIExchangeRecord(models.Model):
         self.ensure_one()
         if not isinstance(output_string, bytes):
             output_string = bytes(output_string, encoding)
-        self[field_name] = base64.b64encode(output_string)
+        with self._open_file_content(mode="w", field_name=field_name) as fd:
+            fd.write(output_string)
 
     def _get_file_content(
         self, field_name="exchange_file", binary=True, as_bytes=False
     ):
-        """Handy method to not have to convert b64 back and forth."""
+        """Handy method to not have to convert b64 back and forth.
+
+        Content is always returned decompressed.
+
+        :param binary: if False, return the content encoded in base64
+        """
         self.ensure_one()
-        if not self[field_name]:
+        if not binary and not self._is_file_content_transformed(field_name):
+            return self[field_name]
+        with self._open_file_content(field_name=field_name) as fd:
+            res = fd.read()
+        if not binary:
+            return base64.b64encode(res) if res else False
+        if not res:
             return ""
-        if binary:
-            res = base64.b64decode(self[field_name])
-            return res.decode() if not as_bytes else res
-        return self[field_name]
+        return res.decode() if not as_bytes else res
+
+    def _is_file_content_transformed(self, field_name="exchange_file"):
+        """Tell if the value of the field differs from the actual content."""
+        if field_name != "exchange_file":
+            return False
+        return bool(self.exchange_file_compression or self.exchange_file_location)
+
+    def _get_file_attachment(self, field_name="exchange_file"):
+        return (
+            self.env["ir.attachment"]
+            .sudo()
+            .search(
+                [
+                    ("res_model", "=", self._name),
+                    ("res_field", "=", field_name),
+                    ("res_id", "=", self.id),
+                ],
+                limit=1,
+            )
+        )
+
+    def _can_stream_file_content(self):
+        return (
+            isinstance(self.id, int)
+            and self.env["ir.attachment"]._storage() == "file"
+        )
+
+    @contextmanager
+    def _open_file_content(self, mode="r", field_name="exchange_file"):
+        """Open the content of a binary field as a stream of bytes.
+
+        The stream is backed by the filestore file:
+        the content is never converted from/to base64 nor loaded in memory at once.
+
+        :param mode:
+            * "r": read the content through a read-only memory map
+            * "w": replace the whole content w/ what gets written
+        :param field_name: name of the binary field holding the content
+        """
+        self.ensure_one()
+        if mode == "r":
+            with self._open_file_content_read(field_name) as fd:
+                yield fd
+        elif mode == "w":
+            with self._open_file_content_write(field_name) as fd:
+                yield fd
+        else:
+            raise ValueError("Unsupported mode: %s" % mode)
+
+    def _get_file_compression(self, field_name="exchange_file"):
+        """Return the compression applied to the stored content, if any."""
+        if field_name != "exchange_file":
+            return False
+        return self.exchange_file_compression
+
+    @contextmanager
+    def _open_file_content_read(self, field_name):
+        compression = self._get_file_compression(field_name)
+        with self._open_stored_file_content(field_name) as fd:
+            with decompress_stream(fd, compression) as decompressed:
+                yield decompressed
+
+    @contextmanager
+    def _open_stored_file_content(self, field_name):
+        attachment = (
+            self._get_file_attachment(field_name)
+            if isinstance(self.id, int)
+            else None
+        )
+        if (
+            not attachment
+            and field_name == "exchange_file"
+            and self.exchange_file_location
+        ):
+            # Offloaded to cold storage
+            with self._open_offloaded_file_content() as fd:
+                yield fd
+            return
+        if not attachment or not attachment.store_fname:
+            # Not stored in the filestore (DB storage, new record, no content)
+            content = self.with_context(bin_size=False)[field_name]
+            with closing(io.BytesIO(base64.b64decode(content or b""))) as fd:
+                yield fd
+            return
+        full_path = attachment._full_path(attachment.store_fname)
+        with self._open_mapped_file(full_path) as fd:
+            yield fd
+
+    @contextmanager
+    def _open_mapped_file(self, full_path):
+        """Open a local file through a read-only memory map."""
+        with open(full_path, "rb") as fd:
+            if not os.fstat(fd.fileno()).st_size:
+                # Empty files cannot be mapped
+                yield fd
+                return
+            with mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+
+    @contextmanager
+    def _open_file_content_write(self, field_name):
+        if not self._can_stream_file_content():
+            with closing(io.BytesIO()) as fd:
+                yield fd
+                # Compression and checksum are handled by `write`
+                self[field_name] = base64.b64encode(fd.getvalue())
+            return
+        compression = (
+            self.type_id.exchange_file_compression
+            if field_name == "exchange_file"
+            else False
+        )
+        attachment_model = self.env["ir.attachment"].sudo()
+        filestore = attachment_model._filestore()
+        fd, tmp_path = tempfile.mkstemp(dir=filestore, prefix="edi-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                # Checksum and size of the stored file
+                file_writer = HashingWriter(tmp_file, algorithms=("sha1",))
+                with compress_stream(file_writer, compression) as compressed:
+                    # Checksum and size of the original content
+                    writer = HashingWriter(compressed, algorithms=("sha256",))
+                    yield writer
+            self._store_file_content(
+                field_name, tmp_path, writer, file_writer, compression
+            )
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def _store_file_content(
+        self, field_name, tmp_path, writer, file_writer, compression
+    ):
+        """Move written file to the filestore and link it to the attachment."""
+        attachment_model = self.env["ir.attachment"].sudo()
+        if not writer.size:
+            self[field_name] = False
+            return
+        checksum = file_writer.hexdigest("sha1")
+        fname = "{}/{}".format(checksum[:2], checksum)
+        full_path = attachment_model._full_path(fname)
+        if not os.path.exists(full_path):
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            os.replace(tmp_path, full_path)
+            # Drop the file if the transaction is rolled back
+            attachment_model._mark_for_gc(fname)
+        mimetype = COMPRESSION_MIMETYPES.get(compression) or (
+            mimetypes.guess_type(self.exchange_filename or "")[0]
+        )
+        attachment = self._get_file_attachment(field_name)
+        if attachment:
+            old_fname = attachment.store_fname
+            attachment.write({"store_fname": fname, "db_datas": False})
+            if old_fname and old_fname != fname:
+                attachment._file_delete(old_fname)
+        else:
+            attachment = attachment_model.create(
+                {
+                    "name": field_name,
+                    "res_model": self._name,
+                    "res_field": field_name,
+                    "res_id": self.id,
+                    "type": "binary",
+                    "store_fname": fname,
+                    "mimetype": mimetype or "application/octet-stream",
+                }
+            )
+        # Computed by the ORM from the raw content that we don't want to load
+        self.env.cr.execute(
+            "UPDATE ir_attachment SET checksum = %s, file_size = %s WHERE id = %s",
+            (checksum, file_writer.size, attachment.id),
+        )
+        attachment.invalidate_cache(["checksum", "file_size"])
+        self.invalidate_cache([field_name])
+        self.modified([field_name])
+        if field_name == "exchange_file":
+            self.write(
+                {
+                    "exchange_filechecksum": writer.hexdigest("sha256"),
+                    "exchange_file_size": writer.size,
+                    "exchange_file_compression": compression,
+                    "exchange_file_location": False,
+                }
+            )
 
     def name_get(self):
         result = []
+        related_records = self._get_related_records()
         for rec in self:
             rec_name = rec.identifier
-            if rec.res_id and rec.model:
-                rec_name = rec.record.display_name
+            if rec.res_id and rec.model and related_records[rec.id] is not None:
+                rec_name = related_records[rec.id].display_name
             name = "[{}] {}".format(rec.type_id.name, rec_name)
             result.append((rec.id, name))
         return result
 
-    @api.model
-    def create(self, vals):
-        vals["identifier"] = self._get_identifier()
-        rec = super().create(vals)
-        if rec._quick_exec_enabled():
-            rec._execute_next_action()
-        return rec
+    @api.model_create_multi
+    def create(self, vals_list):
+        identifiers = self._get_identifiers(len(vals_list))
+        # Do not alter the values of the caller
+        vals_list = [
+            dict(vals, identifier=identifier)
+            for vals, identifier in zip(vals_list, identifiers)
+        ]
+        for i, vals in enumerate(vals_list):
+            if vals.get("exchange_file"):
+                exc_type = self.env["edi.exchange.type"].browse(vals.get("type_id"))
+                vals_list[i] = self._prepare_file_vals(
+                    vals, exc_type.exchange_file_compression
+                )
+        records = self._create_by_chatter_mode(vals_list)
+        self.env["edi.exchange.record.counter"]._add_deltas(
+            added=records._get_counter_keys()
+        )
+        records.filtered("chatter_disabled")._log_state_changes({})
+        records.filtered("parent_id")._clear_parent_ack_overdue()
+        records._filter_orphan_acks()._resolve_ack_parents()
+        records.filtered(lambda x: x._quick_exec_enabled())._schedule_next_action()
+        return records
+
+    def _create_by_chatter_mode(self, vals_list):
+        """Create records w/o mail tracking for types having no chatter.
+
+        This skips the creation message and the subscription of the creator.
+        """
+        no_chatter_type_ids = set(
+            self.env["edi.exchange.type"]
+            .browse({vals.get("type_id") for vals in vals_list})
+            .filtered("disable_chatter")
+            .ids
+        )
+        if not no_chatter_type_ids:
+            return super().create(vals_list)
+        by_mode = defaultdict(list)
+        for i, vals in enumerate(vals_list):
+            by_mode[vals.get("type_id") in no_chatter_type_ids].append(i)
+        record_ids = [None] * len(vals_list)
+        for no_chatter, indexes in by_mode.items():
+            model = self.with_context(tracking_disable=True) if no_chatter else self
+            records = super(EDIExchangeRecord, model).create(
+                [vals_list[i] for i in indexes]
+            )
+            for i, rec_id in zip(indexes, records.ids):
+                record_ids[i] = rec_id
+        return self.browse(record_ids)
+
+    def _log_state_changes(self, previous_states, message=None, level=None):
+        """Append a state log row for records whose state changed.
+
+        :param previous_states: dict {record id: state}
+        """
+        rows = []
+        for rec in self:
+            previous_state = previous_states.get(rec.id)
+            if message or rec.edi_exchange_state != previous_state:
+                rows.append(
+                    (rec.id, previous_state, rec.edi_exchange_state, message, level)
+                )
+        self.env["edi.exchange.record.state.log"]._log(rows)
+
+    def _get_counter_keys(self):
+        return [
+            (rec.backend_id.id, rec.type_id.id, rec.edi_exchange_state)
+            for rec in self
+        ]
 
     @api.model
     def _get_identifier(self):
         return self.env["ir.sequence"].next_by_code("edi.exchange")
 
+    @api.model
+    def _get_identifiers(self, count):
+        """Reserve `count` identifiers at once.
+
+        Standard sequences w/o date ranges get a block of numbers
+        in one query, others fall back to one call per identifier.
+        """
+        if count == 1:
+            return [self._get_identifier()]
+        seq_model = self.env["ir.sequence"]
+        seq_model.check_access_rights("read")
+        sequence = seq_model.sudo().search(
+            [
+                ("code", "=", "edi.exchange"),
+                ("company_id", "in", [self.env.company.id, False]),
+            ],
+            order="company_id",
+            limit=1,
+        )
+        if not sequence or sequence.use_date_range:
+            return [self._get_identifier() for __ in range(count)]
+        if sequence.implementation != "standard":
+            return [sequence._next() for __ in range(count)]
+        self.env.cr.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)",
+            ("ir_sequence_%03d" % sequence.id, count),
+        )
+        numbers = sorted(row[0] for row in self.env.cr.fetchall())
+        return [sequence.get_next_char(number) for number in numbers]
+
     def _quick_exec_enabled(self):
         if self.env.context.get("edi__skip_quick_exec"):
             return False
         return self.type_id.quick_exec and self.backend_id.active
 
+    _quick_exec_buffer_key = "edi_oca.quick_exec"
+
+    def _schedule_next_action(self):
+        """Buffer records to execute their next action at commit time.
+
+        All the records buffered in the same transaction
+        are dispatched at once, see `_flush_quick_exec_buffer`.
+        """
+        if not self:
+            return
+        data = self.env.cr.precommit.data
+        if self._quick_exec_buffer_key not in data:
+            data[self._quick_exec_buffer_key] = set()
+            self.env.cr.precommit.add(self.browse()._flush_quick_exec_buffer)
+        data[self._quick_exec_buffer_key].update(self.ids)
+
+    def _flush_quick_exec_buffer(self):
+        record_ids = self.env.cr.precommit.data.pop(self._quick_exec_buffer_key, ())
+        records = self.browse(sorted(record_ids)).exists()
+        records._execute_next_action()
+        # Precommit hooks run after the ORM flush
+        self.flush()
+
     def _execute_next_action(self):
         # The backend already knows how to handle records
         # according to their direction and status.
         # Let it decide.
-        if self.type_id.direction == "output":
-            self.backend_id._check_output_exchange_sync(record_ids=self.ids)
-        else:
-            self.backend_id._check_input_exchange_sync(record_ids=self.ids)
+        for (backend, direction), records in groupby(
+            self, lambda x: (x.backend_id, x.direction)
+        ):
+            record_ids = [x.id for x in records]
+            if direction == "output":
+                backend._check_output_exchange_sync(record_ids=record_ids)
+            else:
+                backend._check_input_exchange_sync(record_ids=record_ids)
 
     @api.constrains("backend_id", "type_id")
     def _constrain_backend(self):
@@ -287,6 +1036,11 @@ class EDIExchangeRecord(models.Model):
         return {
             # status: message
             "generate_ok": _("Exchange data generated"),
+            "generate_deferred": _("Exchange data will be generated when sending"),
+            "generate_ko": _(
+                "An error happened while generating. "
+                "Please check exchange record info."
+            ),
             "send_ok": _("Exchange sent"),
             "send_ko": _(
                 "An error happened while sending. Please check exchange record info."
@@ -299,6 +1053,7 @@ class EDIExchangeRecord(models.Model):
             "ack_missing": _("ACK file is required for this exchange but not found."),
             "ack_received_error": _("ACK file received but contains errors."),
             "validate_ko": _("Exchange not valid"),
+            "duplicate": _("Exchange skipped: same content already received."),
         }
 
     def _exchange_status_message(self, key):
@@ -306,19 +1061,72 @@ class EDIExchangeRecord(models.Model):
 
     def action_exchange_generate(self, **kw):
         self.ensure_one()
-        return self.backend_id.exchange_generate(self, **kw)
+        with self._access_memo_scope():
+            return self.backend_id.exchange_generate(self, **kw)
 
     def action_exchange_send(self):
         self.ensure_one()
-        return self.backend_id.exchange_send(self)
+        with self._access_memo_scope():
+            return self.backend_id.exchange_send(self)
 
     def action_exchange_process(self):
         self.ensure_one()
-        return self.backend_id.exchange_process(self)
+        with self._access_memo_scope():
+            return self.backend_id.exchange_process(self)
 
     def action_exchange_receive(self):
         self.ensure_one()
-        return self.backend_id.exchange_receive(self)
+        with self._access_memo_scope():
+            return self.backend_id.exchange_receive(self)
+
+    def action_exchange_batch(self, actions):
+        """Run given actions on every record within the same job.
+
+        Each record runs in its own savepoint:
+        a failing record is rolled back and rescheduled in a dedicated job
+        (where it gets the usual retry/failure handling)
+        without affecting the rest of the batch.
+
+        :param actions: sequence of actions to run (eg: ("generate", "send"))
+        """
+        failed = self._exchange_batch_run(actions)
+        failed._delay_exchange_actions(actions)
+        return _("%(done)d records done, %(failed)d rescheduled.") % {
+            "done": len(self) - len(failed),
+            "failed": len(failed),
+        }
+
+    def _exchange_batch_run(self, actions):
+        """Run given actions on every record, one savepoint per record.
+
+        :return: edi.exchange.record recordset of failed records
+        """
+        for action in actions:
+            self.env["edi.backend"]._is_valid_edi_action(action, raise_if_not=True)
+        failed = self.browse()
+        for rec in self:
+            try:
+                with self.env.cr.savepoint():
+                    for action in actions:
+                        getattr(rec, "action_exchange_" + action)()
+            except Exception:
+                _logger.exception(
+                    "EDI Exchange %s: %s failed in batch.",
+                    rec.identifier,
+                    "/".join(actions),
+                )
+                failed |= rec
+        return failed
+
+    def _delay_exchange_actions(self, actions):
+        """Delay one job per record chaining given actions."""
+        for rec in self:
+            jobs = []
+            for action in actions:
+                # Chained jobs get max prio to complete the flow as fast as possible
+                delayable = rec.delayable(priority=0) if jobs else rec.delayable()
+                jobs.append(getattr(delayable, "action_exchange_" + action)())
+            chain(*jobs).delay()
 
     def exchange_create_ack_record(self, **kw):
         return self.exchange_create_child_record(
@@ -349,12 +1157,14 @@ class EDIExchangeRecord(models.Model):
         new_state = self._rollback_state_mapping[self.edi_exchange_state]
         fname = "edi_exchange_state"
         self[fname] = new_state
-        display_state = self._fields[fname].convert_to_export(self[fname], self)
-        self.message_post(
-            body=_("Action retry: state moved back to '%s'") % display_state
-        )
+        # W/o chatter the state change is logged already
+        if not self.chatter_disabled:
+            display_state = self._fields[fname].convert_to_export(self[fname], self)
+            self.message_post(
+                body=_("Action retry: state moved back to '%s'") % display_state
+            )
         if self._quick_exec_enabled():
-            self._execute_next_action()
+            self._schedule_next_action()
         return True
 
     def action_open_related_record(self):
@@ -394,22 +1204,62 @@ class EDIExchangeRecord(models.Model):
             self._trigger_edi_event(event_name, target=self.record)
 
     def _notify_related_record(self, message, level="info"):
-        """Post notification on the original record."""
+        """Post notification on the original record.
+
+        For types w/o chatter the notification goes to the state log.
+        For types in digest mode it is buffered, see `_buffer_notification`.
+        """
+        if self.chatter_disabled:
+            self._log_state_changes({}, message=message, level=level)
+            return
         if not self.related_record_exists or not hasattr(
             self.record, "message_post_with_view"
         ):
             return
-        self.record.message_post_with_view(
-            "edi_oca.message_edi_exchange_link",
-            values={
-                "backend": self.backend_id,
-                "exchange_record": self,
-                "message": message,
-                "level": level,
-            },
-            subtype_id=self.env.ref("mail.mt_note").id,
+        if self.type_id.notification_mode != "immediate":
+            self._buffer_notification(message, level)
+            return
+        self.env["edi.exchange.notification"]._post_notifications(
+            self.record, [(self, message, level)]
         )
 
+    _notification_buffer_key = "edi_oca.notification"
+
+    def _buffer_notification(self, message, level):
+        """Buffer notification until commit time.
+
+        All the notifications of the same transaction are then
+        posted as one message per related record
+        or kept for a later digest, see `_flush_notification_buffer`.
+        """
+        data = self.env.cr.precommit.data
+        if self._notification_buffer_key not in data:
+            data[self._notification_buffer_key] = []
+            self.env.cr.precommit.add(self.browse()._flush_notification_buffer)
+        data[self._notification_buffer_key].append((self.id, message, level))
+
+    def _flush_notification_buffer(self):
+        buffer = self.env.cr.precommit.data.pop(self._notification_buffer_key, [])
+        records = self.browse([x[0] for x in buffer]).exists()
+        records_by_id = {rec.id: rec for rec in records}
+        to_post = defaultdict(list)
+        to_delay = []
+        for record_id, message, level in buffer:
+            rec = records_by_id.get(record_id)
+            if not rec:
+                continue
+            if rec.type_id.notification_mode == "window":
+                to_delay.append((rec, message, level))
+            else:
+                to_post[(rec.model, rec.res_id)].append((rec, message, level))
+        notification_model = self.env["edi.exchange.notification"]
+        for (model, res_id), items in to_post.items():
+            target = self.env[model].browse(res_id)
+            notification_model._post_notifications(target, items)
+        notification_model._delay_notifications(to_delay)
+        # Precommit hooks run after the ORM flush
+        self.flush()
+
     def _trigger_edi_event_make_name(self, name, suffix=None):
         return "on_edi_exchange_{name}{suffix}".format(
             name=name,
@@ -460,84 +1310,114 @@ class EDIExchangeRecord(models.Model):
         count=False,
         access_rights_uid=None,
     ):
-        ids = super()._search(
+        if self.env.is_superuser():
+            # restrictions do not apply for the superuser
+            return super()._search(
+                args,
+                offset=offset,
+                limit=limit,
+                order=order,
+                count=count,
+                access_rights_uid=access_rights_uid,
+            )
+        query = super()._search(
             args,
-            offset=offset,
-            limit=limit,
+            offset=0 if count else offset,
+            limit=None if count else limit,
             order=order,
             count=False,
             access_rights_uid=access_rights_uid,
         )
-        if self.env.is_superuser():
-            # restrictions do not apply for the superuser
-            return len(ids) if count else ids
+        if not isinstance(query, Query):
+            # Domain is always false
+            return 0 if count else query
 
         # TODO highlight orphaned EDI records in UI:
         #  - self.model + self.res_id are set
         #  - self.record returns empty recordset
         # Remark: self.record is @property, not field
 
-        if not ids:
-            return 0 if count else []
-        orig_ids = ids
-        ids = set(ids)
-        result = []
-        model_data = defaultdict(
-            lambda: defaultdict(set)
-        )  # {res_model: {res_id: set(ids)}}
-        for sub_ids in self._cr.split_for_in_conditions(ids):
-            self._cr.execute(
-                """
-                            SELECT id, res_id, model
-                            FROM "%s"
-                            WHERE id = ANY (%%(ids)s)"""
-                % self._table,
-                dict(ids=list(sub_ids)),
-            )
-            for eid, res_id, model in self._cr.fetchall():
-                if not model:
-                    result.append(eid)
-                    continue
-                model_data[model][res_id].add(eid)
+        # Filter on related records access straight in the query:
+        # paging and counting are exact w/o re-searching.
+        where_clause, where_params = self._get_related_record_access_where()
+        query.add_where(where_clause, where_params)
+        if count:
+            query.order = None
+            query_str, params = query.select("count(1)")
+            self._cr.execute(query_str, params)
+            return self._cr.fetchone()[0]
+        return query
 
-        for model, targets in model_data.items():
-            if not self.env[model].check_access_rights("read", False):
+    @api.model
+    def _get_related_record_access_where(self):
+        """Return SQL where clause matching records w/ a readable related record.
+
+        Records w/o related record are always readable.
+        Group "Settings" can also list records whose related record is deleted.
+        """
+        table = self._table
+        self.flush(["model", "res_id"])
+        clauses = ['"{}"."model" IS NULL'.format(table)]
+        params = []
+        for model in self._get_related_models():
+            if model not in self.env:
+                if self.env.is_system():
+                    clauses.append('"{}"."model" = %s'.format(table))
+                    params.append(model)
+                continue
+            related_model = self.env[model]
+            if not related_model.check_access_rights("read", False):
                 continue
-            recs = self.env[model].browse(list(targets))
-            missing = recs - recs.exists()
-            if missing:
-                for res_id in missing.ids:
-                    _logger.warning(
-                        "Deleted record %s,%s is referenced by edi.exchange.record %s",
-                        model,
-                        res_id,
-                        list(targets[res_id]),
+            allowed = related_model.with_context(active_test=False)._search([])
+            if isinstance(allowed, Query):
+                allowed_str, allowed_params = allowed.subselect()
+                allowed_clause = '"{}"."res_id" IN ({})'.format(table, allowed_str)
+            else:
+                # Some models still return plain ids
+                allowed_clause = '"{}"."res_id" = ANY(%s)'.format(table)
+                allowed_params = [list(allowed)]
+            clauses.append('("{}"."model" = %s AND {})'.format(table, allowed_clause))
+            params += [model] + list(allowed_params)
+            if self.env.is_system() and related_model._auto:
+                missing_clause = (
+                    '("{table}"."model" = %s AND NOT EXISTS '
+                    '(SELECT 1 FROM "{related_table}" WHERE id = "{table}"."res_id"))'
+                )
+                clauses.append(
+                    missing_clause.format(
+                        table=table, related_table=related_model._table
                     )
-                recs = recs - missing
-            allowed = list(
-                self.env[model]
-                .with_context(active_test=False)
-                ._search([("id", "in", recs.ids)])
+                )
+                params.append(model)
+        return "({})".format(" OR ".join(clauses)), params
+
+    @api.model
+    def _get_related_models(self):
+        """Return the names of the models having exchange records.
+
+        Use a recursive query to jump from a model to the next one
+        through the index instead of scanning the whole table.
+        """
+        self._cr.execute(
+            """
+            WITH RECURSIVE models AS (
+                (
+                    SELECT model FROM "{table}"
+                    WHERE model IS NOT NULL ORDER BY model LIMIT 1
+                )
+                UNION ALL
+                SELECT (
+                    SELECT model FROM "{table}"
+                    WHERE model > models.model ORDER BY model LIMIT 1
+                )
+                FROM models WHERE models.model IS NOT NULL
             )
-            if self.env.is_system():
-                # Group "Settings" can list exchanges where record is deleted
-                allowed.extend(missing.ids)
-            for target_id in allowed:
-                result += list(targets[target_id])
-        if len(orig_ids) == limit and len(result) < len(orig_ids):
-            result.extend(
-                self._search(
-                    args,
-                    offset=offset + len(orig_ids),
-                    limit=limit,
-                    order=order,
-                    count=count,
-                    access_rights_uid=access_rights_uid,
-                )[: limit - len(result)]
+            SELECT model FROM models WHERE model IS NOT NULL
+            """.format(
+                table=self._table
             )
-        # Restore original ordering
-        result = [x for x in orig_ids if x in result]
-        return len(result) if count else list(result)
+        )
+        return [row[0] for row in self._cr.fetchall()]
 
     def read(self, fields=None, load="_classic_read"):
         """Override to explicitely call check_access_rule, that is not called
@@ -553,29 +1433,301 @@ class EDIExchangeRecord(models.Model):
             return
         default_checker = self.env["edi.exchange.consumer.mixin"].get_edi_access
         by_model_rec_ids = defaultdict(set)
-        by_model_checker = {}
         for exc_rec in self.sudo():
-            if not exc_rec.related_record_exists:
-                continue
-            by_model_rec_ids[exc_rec.model].add(exc_rec.res_id)
-            if exc_rec.model not in by_model_checker:
-                by_model_checker[exc_rec.model] = getattr(
-                    self.env[exc_rec.model], "get_edi_access", default_checker
-                )
-
+            model, res_id = exc_rec._get_related_record_ref()
+            if model and res_id and model in self.env:
+                by_model_rec_ids[model].add(res_id)
+        memo = self._get_access_memo()
         for model, rec_ids in by_model_rec_ids.items():
-            records = self.env[model].browse(rec_ids).with_user(self._uid)
-            checker = by_model_checker[model]
-            for record in records:
-                check_operation = checker(
-                    [record.id], operation, model_name=record._name
-                )
-                record.check_access_rights(check_operation)
-                record.check_access_rule(check_operation)
+            # Check all the records of the same model at once
+            checker = getattr(self.env[model], "get_edi_access", default_checker)
+            check_operation = checker(list(rec_ids), operation, model_name=model)
+            memo_key = (self._uid, model, check_operation)
+            if memo is not None:
+                rec_ids = rec_ids - memo[memo_key]
+                if not rec_ids:
+                    continue
+            records = self.env[model].browse(rec_ids).exists().with_user(self._uid)
+            records.check_access_rights(check_operation)
+            records.check_access_rule(check_operation)
+            if memo is not None:
+                memo[memo_key].update(records.ids)
+
+    def _get_related_record_ref(self):
+        """Return model and id of the related record, looking up parents if needed.
+
+        Same as `record` w/o checking if the record exists.
+        """
+        rec = self
+        while rec and not rec.model:
+            rec = rec.parent_id
+        return (rec.model, rec.res_id) if rec else (None, None)
+
+    _access_memo_key = "edi_oca.access_memo"
+
+    @contextmanager
+    def _access_memo_scope(self):
+        """Remember the access granted on related records within this scope.
+
+        Actions write on exchange records several times:
+        this way related records are checked only once.
+        """
+        data = self.env.cr.precommit.data
+        memo = data.setdefault(
+            self._access_memo_key, {"depth": 0, "checked": defaultdict(set)}
+        )
+        memo["depth"] += 1
+        try:
+            yield
+        finally:
+            memo["depth"] -= 1
+            if not memo["depth"]:
+                data.pop(self._access_memo_key, None)
+
+    def _get_access_memo(self):
+        memo = self.env.cr.precommit.data.get(self._access_memo_key)
+        return memo["checked"] if memo else None
 
     def write(self, vals):
         self.check_access_rule("write")
-        return super().write(vals)
+        update_counters = bool(_COUNTER_FIELDS.intersection(vals))
+        if update_counters:
+            old_keys = self._get_counter_keys()
+        log_states = "edi_exchange_state" in vals and self.filtered("chatter_disabled")
+        if log_states:
+            old_states = {rec.id: rec.edi_exchange_state for rec in log_states}
+        if "exchange_file" in vals or "exchange_file_location" in vals:
+            # New files reset the location, see `_prepare_file_vals`
+            new_location = vals.get("exchange_file_location")
+            self._buffer_offload_cleanup(
+                "postcommit",
+                [
+                    rec.exchange_file_location
+                    for rec in self
+                    if rec.exchange_file_location
+                    and rec.exchange_file_location != new_location
+                ],
+            )
+        if "exchange_file" not in vals:
+            super().write(vals)
+        else:
+            # Compression depends on the type
+            for compression, records in groupby(
+                self, lambda x: x.type_id.exchange_file_compression
+            ):
+                records = self.browse([x.id for x in records])
+                file_vals = self._prepare_file_vals(vals, compression)
+                super(EDIExchangeRecord, records).write(file_vals)
+        if update_counters:
+            self.env["edi.exchange.record.counter"]._add_deltas(
+                removed=old_keys, added=self._get_counter_keys()
+            )
+        if log_states:
+            log_states._log_state_changes(old_states)
+        if vals.get("parent_id"):
+            self._clear_parent_ack_overdue()
+        if vals.get("edi_exchange_state"):
+            self._schedule_split_state_update()
+        return True
+
+    def unlink(self):
+        keys = self._get_counter_keys()
+        self._buffer_offload_cleanup(
+            "postcommit",
+            [x.exchange_file_location for x in self if x.exchange_file_location],
+        )
+        res = super().unlink()
+        self.env["edi.exchange.record.counter"]._add_deltas(removed=keys)
+        return res
+
+    @api.model
+    def _prepare_file_vals(self, vals, compression):
+        """Set checksum and compress the file written via the ORM.
+
+        The checksum is always computed on the original content.
+
+        :return: a copy of `vals` updated
+        """
+        vals = dict(vals)
+        content = vals["exchange_file"]
+        vals["exchange_file_location"] = False
+        if not content:
+            vals.update(
+                exchange_filechecksum=False,
+                exchange_file_size=0,
+                exchange_file_compression=False,
+            )
+            return vals
+        raw = base64.b64decode(content)
+        vals["exchange_filechecksum"] = get_checksum(raw)
+        vals["exchange_file_size"] = len(raw)
+        vals["exchange_file_compression"] = compression or False
+        if compression:
+            vals["exchange_file"] = base64.b64encode(compress(raw, compression))
+        return vals
+
+    def _get_offload_storage(self):
+        """Return the cold storage to offload the file to.
+
+        By default files can be offloaded to a local directory
+        configured via the `edi_oca.offload_path` system parameter.
+        Each storage is handled by `_offload_write_$storage`,
+        `_offload_open_$storage` and `_offload_delete_$storage` methods.
+        """
+        icp = self.env["ir.config_parameter"].sudo()
+        return "local" if icp.get_param("edi_oca.offload_path") else False
+
+    def _get_offload_key(self):
+        return "{}/{}".format(normalize_string(self.type_id.code), self.identifier)
+
+    def _offload_file_content(self):
+        """Move the stored file to cold storage and drop the attachment.
+
+        The file is moved as stored (ie: compressed if so):
+        checksum and compression are kept on the record.
+        """
+        self.ensure_one()
+        storage = self._get_offload_storage()
+        attachment = self._get_file_attachment()
+        if not storage or not attachment:
+            return False
+        with self._open_stored_file_content("exchange_file") as fd:
+            key = getattr(self, "_offload_write_%s" % storage)(fd)
+        location = "{}:{}".format(storage, key)
+        to_delete = self.env.cr.postcommit.data.get(self._offload_cleanup_key, set())
+        if location in to_delete:
+            # Rehydrated in this transaction: the file is still referenced
+            to_delete.discard(location)
+        else:
+            self._buffer_offload_cleanup("postrollback", [location])
+        self.exchange_file_location = location
+        attachment.unlink()
+        self.invalidate_cache(["exchange_file"])
+        return True
+
+    @contextmanager
+    def _open_offloaded_file_content(self):
+        storage, key = self.exchange_file_location.split(":", 1)
+        with getattr(self, "_offload_open_%s" % storage)(key) as fd:
+            yield fd
+
+    def _rehydrate_file_content(self):
+        """Restore the file from cold storage to the attachment."""
+        self.ensure_one()
+        if not self.exchange_file_location or self._get_file_attachment():
+            return False
+        with self._open_offloaded_file_content() as fd:
+            data = fd.read()
+        # Create the attachment directly to keep the stored content untouched
+        self.env["ir.attachment"].sudo().create(
+            {
+                "name": "exchange_file",
+                "res_model": self._name,
+                "res_field": "exchange_file",
+                "res_id": self.id,
+                "type": "binary",
+                "raw": data,
+            }
+        )
+        self.exchange_file_location = False
+        self.invalidate_cache(["exchange_file"])
+        return True
+
+    def action_rehydrate_file_content(self):
+        for rec in self:
+            rec._rehydrate_file_content()
+
+    def _get_offload_local_path(self, key):
+        root = self.env["ir.config_parameter"].sudo().get_param("edi_oca.offload_path")
+        if not root:
+            raise exceptions.UserError(_("No cold storage path configured."))
+        root = os.path.realpath(root)
+        full_path = os.path.realpath(os.path.join(root, key))
+        if os.path.commonpath([root, full_path]) != root:
+            raise exceptions.UserError(_("Invalid cold storage location."))
+        return full_path
+
+    def _offload_write_local(self, fd):
+        key = self._get_offload_key()
+        full_path = self._get_offload_local_path(key)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "wb") as dest:
+            shutil.copyfileobj(fd, dest)
+        return key
+
+    @contextmanager
+    def _offload_open_local(self, key):
+        with self._open_mapped_file(self._get_offload_local_path(key)) as fd:
+            yield fd
+
+    def _offload_delete_local(self, key):
+        full_path = self._get_offload_local_path(key)
+        if os.path.exists(full_path):
+            os.remove(full_path)
+
+    _offload_cleanup_key = "edi_oca.offload_cleanup"
+
+    def _buffer_offload_cleanup(self, hook, locations):
+        """Delete cold storage files once the transaction is over.
+
+        :param hook: `postcommit` to delete files not referenced anymore
+            (records deleted, rehydrated or getting a new file),
+            `postrollback` to delete files written by a failed transaction
+        :param locations: list of `$storage:$key` locations
+        """
+        if not locations:
+            return
+        callbacks = getattr(self.env.cr, hook)
+        if self._offload_cleanup_key not in callbacks.data:
+            callbacks.data[self._offload_cleanup_key] = set()
+            callbacks.add(
+                functools.partial(self.browse()._flush_offload_cleanup, hook)
+            )
+        callbacks.data[self._offload_cleanup_key].update(locations)
+
+    def _flush_offload_cleanup(self, hook):
+        callbacks = getattr(self.env.cr, hook)
+        locations = callbacks.data.pop(self._offload_cleanup_key, ())
+        for location in sorted(locations):
+            storage, key = location.split(":", 1)
+            try:
+                getattr(self, "_offload_delete_%s" % storage)(key)
+            except Exception:
+                # The transaction is over: a leftover file must not break it
+                _logger.exception("Cannot delete cold storage file %s", location)
+
+    @api.model
+    def _get_error_states(self):
+        return (
+            "validate_error",
+            "output_error_on_send",
+            "output_sent_and_error",
+            "input_receive_error",
+            "input_processed_error",
+        )
+
+    @api.model
+    def _get_archive_states(self):
+        """States of finished records, candidates for archiving.
+
+        Sent output records might be finished as well,
+        see `edi.exchange.type._get_sent_finished_backends`.
+        """
+        return ("output_sent_and_processed", "input_processed", "input_duplicate")
+
+    def _archive_exchange(self, delete_only=False):
+        """Move records to the archive and delete them.
+
+        Files and messages are deleted along w/ the records.
+
+        :param delete_only: do not keep a copy in the archive
+        """
+        if not self:
+            return
+        if not delete_only:
+            archive_model = self.env["edi.exchange.record.archive"].sudo()
+            archive_model.create([archive_model._prepare_values(x) for x in self])
+        self.sudo().unlink()
 
     def _job_delay_params(self):
         params = {}
@@ -0,0 +1,89 @@
+# Copyright 2026 Camptocamp SA (http://www.camptocamp.com)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from odoo import api, fields, models, tools
+
+
+class EDIExchangeRecordArchive(models.Model):
+    """
+    Archived exchange records.
+
+    Finished records are moved here by the retention cron
+    to keep `edi.exchange.record` small.
+    Only the data needed for audits are kept: files, messages and relations
+    are dropped along w/ the original record.
+    """
+
+    _name = "edi.exchange.record.archive"
+    _description = "EDI exchange record archive"
+    _order = "exchanged_on desc, id desc"
+    _rec_name = "identifier"
+
+    identifier = fields.Char(required=True, index=True, readonly=True)
+    external_identifier = fields.Char(index=True, readonly=True)
+    type_id = fields.Many2one(
+        string="Exchange type",
+        comodel_name="edi.exchange.type",
+        ondelete="cascade",
+        readonly=True,
+        index=True,
+    )
+    backend_id = fields.Many2one(
+        comodel_name="edi.backend", ondelete="cascade", readonly=True
+    )
+    direction = fields.Selection(related="type_id.direction")
+    model = fields.Char(readonly=True)
+    res_id = fields.Many2oneReference(
+        string="Record", readonly=True, model_field="model"
+    )
+    parent_identifier = fields.Char(readonly=True)
+    exchange_filename = fields.Char(readonly=True)
+    exchange_filechecksum = fields.Char(readonly=True)
+    edi_exchange_state = fields.Selection(
+        string="Exchange state",
+        selection="_selection_edi_exchange_state",
+        readonly=True,
+    )
+    exchange_error = fields.Text(readonly=True)
+    exchanged_on = fields.Datetime(readonly=True)
+    record_create_date = fields.Datetime(string="Created on", readonly=True)
+    archived_on = fields.Datetime(
+        readonly=True, default=lambda self: fields.Datetime.now()
+    )
+
+    def init(self):
+        # Audits look for all the exchanges of a given record
+        tools.create_index(
+            self.env.cr,
+            "edi_exchange_record_archive_model_res_id_index",
+            self._table,
+            ["model", "res_id"],
+        )
+
+    @api.model
+    def _selection_edi_exchange_state(self):
+        return self.env["edi.exchange.record"]._fields["edi_exchange_state"].selection
+
+    @api.model
+    def _prepare_values(self, exchange_record):
+        return {
+            "identifier": exchange_record.identifier,
+            "external_identifier": exchange_record.external_identifier,
+            "type_id": exchange_record.type_id.id,
+            "backend_id": exchange_record.backend_id.id,
+            "model": exchange_record.model,
+            "res_id": exchange_record.res_id,
+            "parent_identifier": exchange_record.parent_id.identifier,
+            "exchange_filename": exchange_record.exchange_filename,
+            "exchange_filechecksum": exchange_record.exchange_filechecksum,
+            "edi_exchange_state": exchange_record.edi_exchange_state,
+            "exchange_error": exchange_record.exchange_error,
+            "exchanged_on": exchange_record.exchanged_on,
+            "record_create_date": exchange_record.create_date,
+        }
+
+    def name_get(self):
+        return [
+            (rec.id, "[{}] {}".format(rec.type_id.name, rec.identifier))
+            for rec in self
+        ]
@@ -0,0 +1,156 @@
+# Copyright 2026 Camptocamp SA (http://www.camptocamp.com)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import logging
+from collections import Counter
+
+from odoo import api, fields, models, tools
+
+_logger = logging.getLogger(__name__)
+
+
+class EDIExchangeRecordCounter(models.Model):
+    """
+    Number of exchange records by backend, type and state.
+
+    Maintained incrementally by `edi.exchange.record`:
+    every change appends delta rows instead of updating a shared row,
+    hence concurrent transactions never wait on each other.
+    Rows are merged periodically by `_cron_compact`.
+
+    Counts must be summed up: use `read_group` or `_get_counts`.
+    """
+
+    _name = "edi.exchange.record.counter"
+    _description = "EDI exchange record counter"
+    _log_access = False
+    _order = "backend_id, type_id, edi_exchange_state"
+
+    backend_id = fields.Many2one(
+        comodel_name="edi.backend", ondelete="cascade", readonly=True
+    )
+    type_id = fields.Many2one(
+        string="Exchange type",
+        comodel_name="edi.exchange.type",
+        ondelete="cascade",
+        readonly=True,
+    )
+    edi_exchange_state = fields.Selection(
+        string="Exchange state",
+        selection="_selection_edi_exchange_state",
+        readonly=True,
+    )
+    count = fields.Integer(readonly=True, group_operator="sum")
+
+    def init(self):
+        tools.create_index(
+            self.env.cr,
+            "edi_exchange_record_counter_key_index",
+            self._table,
+            ["backend_id", "edi_exchange_state", "type_id"],
+        )
+        self.env.cr.execute("SELECT 1 FROM edi_exchange_record_counter LIMIT 1")
+        if not self.env.cr.rowcount:
+            # First install or upgrade: initialize from existing records
+            self._rebuild()
+
+    @api.model
+    def _selection_edi_exchange_state(self):
+        return self.env["edi.exchange.record"]._fields["edi_exchange_state"].selection
+
+    @api.model
+    def _add_deltas(self, removed=(), added=()):
+        """Append delta rows for changed records.
+
+        :param removed: list of (backend_id, type_id, state) no longer counted
+        :param added: list of (backend_id, type_id, state) to count
+        """
+        deltas = Counter(added)
+        deltas.subtract(Counter(removed))
+        rows = [key + (count,) for key, count in deltas.items() if count]
+        if not rows:
+            return
+        query = """
+            INSERT INTO edi_exchange_record_counter
+                (backend_id, type_id, edi_exchange_state, count)
+            VALUES {}
+        """.format(
+            ", ".join(["(%s, %s, %s, %s)"] * len(rows))
+        )
+        self.env.cr.execute(query, [value for row in rows for value in row])
+
+    @api.model
+    def _get_counts(
+        self,
+        backend_ids=None,
+        type_ids=None,
+        states=None,
+        group_by=("backend_id", "type_id", "edi_exchange_state"),
+    ):
+        """Return the number of records by `group_by` keys.
+
+        :return: dict {(key values...): count} w/o empty counters
+        """
+        where = []
+        params = []
+        for fname, values in (
+            ("backend_id", backend_ids),
+            ("type_id", type_ids),
+            ("edi_exchange_state", states),
+        ):
+            if values is not None:
+                where.append("{} IN %s".format(fname))
+                params.append(tuple(values) or (None,))
+        group_by = ", ".join(group_by)
+        query = """
+            SELECT {group_by}, SUM(count)
+            FROM edi_exchange_record_counter
+            {where}
+            GROUP BY {group_by}
+            HAVING SUM(count) != 0
+        """.format(
+            group_by=group_by,
+            where="WHERE " + " AND ".join(where) if where else "",
+        )
+        self.env.cr.execute(query, params)
+        return {tuple(row[:-1]): row[-1] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _cron_compact(self):
+        """Merge delta rows into one row per key."""
+        self.flush()
+        self.env.cr.execute(
+            """
+            WITH deleted AS (
+                DELETE FROM edi_exchange_record_counter
+                RETURNING backend_id, type_id, edi_exchange_state, count
+            )
+            INSERT INTO edi_exchange_record_counter
+                (backend_id, type_id, edi_exchange_state, count)
+            SELECT backend_id, type_id, edi_exchange_state, SUM(count)
+            FROM deleted
+            GROUP BY backend_id, type_id, edi_exchange_state
+            HAVING SUM(count) != 0
+            """
+        )
+        _logger.info("EDI exchange counters compacted: %d rows", self.env.cr.rowcount)
+        self.invalidate_cache()
+
+    @api.model
+    def _rebuild(self):
+        """Recompute all the counters from exchange records."""
+        self.env["edi.exchange.record"].flush(
+            ["backend_id", "type_id", "edi_exchange_state"]
+        )
+        self.env.cr.execute(
+            """
+            LOCK TABLE edi_exchange_record_counter IN EXCLUSIVE MODE;
+            DELETE FROM edi_exchange_record_counter;
+            INSERT INTO edi_exchange_record_counter
+                (backend_id, type_id, edi_exchange_state, count)
+            SELECT backend_id, type_id, edi_exchange_state, COUNT(*)
+            FROM edi_exchange_record
+            GROUP BY backend_id, type_id, edi_exchange_state
+            """
+        )
+        self.invalidate_cache()
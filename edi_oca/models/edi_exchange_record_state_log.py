@@ -0,0 +1,75 @@
+# Copyright 2026 Camptocamp SA (http://www.camptocamp.com)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from odoo import api, fields, models, tools
+
+
+class EDIExchangeRecordStateLog(models.Model):
+    """
+    State transitions of exchange records.
+
+    Replaces the chatter for exchange types having it disabled:
+    rows are appended in one query per batch of records
+    and nothing is written to mail tables.
+    """
+
+    _name = "edi.exchange.record.state.log"
+    _description = "EDI exchange record state log"
+    _log_access = False
+    _order = "exchange_record_id, id desc"
+
+    exchange_record_id = fields.Many2one(
+        comodel_name="edi.exchange.record",
+        ondelete="cascade",
+        required=True,
+        readonly=True,
+    )
+    date = fields.Datetime(readonly=True)
+    previous_state = fields.Selection(
+        selection="_selection_edi_exchange_state", readonly=True
+    )
+    edi_exchange_state = fields.Selection(
+        string="State", selection="_selection_edi_exchange_state", readonly=True
+    )
+    message = fields.Char(readonly=True)
+    level = fields.Selection(
+        selection=[("info", "Info"), ("warning", "Warning"), ("error", "Error")],
+        readonly=True,
+    )
+
+    def init(self):
+        tools.create_index(
+            self.env.cr,
+            "edi_exchange_record_state_log_record_index",
+            self._table,
+            ["exchange_record_id", "id"],
+        )
+
+    @api.model
+    def _selection_edi_exchange_state(self):
+        return self.env["edi.exchange.record"]._fields["edi_exchange_state"].selection
+
+    @api.model
+    def _log(self, rows):
+        """Append log rows.
+
+        :param rows: list of
+            (record_id, previous_state, state, message, level) tuples
+        """
+        if not rows:
+            return
+        now = fields.Datetime.now()
+        query = """
+            INSERT INTO edi_exchange_record_state_log
+                (exchange_record_id, date, previous_state,
+                edi_exchange_state, message, level)
+            VALUES {}
+        """.format(
+            ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(rows))
+        )
+        params = []
+        for record_id, previous_state, state, message, level in rows:
+            params += [record_id, now, previous_state, state, message, level]
+        self.env.cr.execute(query, params)
+        self.invalidate_cache()
+        self.env["edi.exchange.record"].invalidate_cache(["state_log_ids"])
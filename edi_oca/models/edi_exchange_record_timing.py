@@ -0,0 +1,156 @@
+# Copyright 2026 Camptocamp SA (http://www.camptocamp.com)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from odoo import api, fields, models, tools
+
+ACTIONS = [
+    ("generate", "Generate"),
+    ("validate", "Validate"),
+    ("send", "Send"),
+    ("check", "Check"),
+    ("receive", "Receive"),
+    ("process", "Process"),
+]
+
+
+class EDIExchangeRecordTiming(models.Model):
+    """
+    Duration of actions run on exchange records.
+
+    Collected for backends having timings enabled.
+    Rows are only appended: one per record, action and attempt.
+    """
+
+    _name = "edi.exchange.record.timing"
+    _description = "EDI exchange record action timing"
+    _log_access = False
+    _order = "id desc"
+
+    exchange_record_id = fields.Many2one(
+        comodel_name="edi.exchange.record", ondelete="set null", readonly=True
+    )
+    backend_id = fields.Many2one(
+        comodel_name="edi.backend", ondelete="cascade", readonly=True
+    )
+    type_id = fields.Many2one(
+        string="Exchange type",
+        comodel_name="edi.exchange.type",
+        ondelete="cascade",
+        readonly=True,
+    )
+    action = fields.Selection(selection=ACTIONS, readonly=True)
+    attempt = fields.Integer(readonly=True)
+    started_on = fields.Datetime(readonly=True)
+    duration = fields.Float(
+        string="Duration (s)", digits=(16, 4), readonly=True, group_operator="avg"
+    )
+    query_count = fields.Integer(readonly=True, group_operator="avg")
+    payload_size = fields.Integer(
+        readonly=True, group_operator="avg", help="Size of the stored file."
+    )
+    failed = fields.Boolean(
+        readonly=True,
+        help="The action raised an error or left the record in an error state.",
+    )
+
+    def init(self):
+        tools.create_index(
+            self.env.cr,
+            "edi_exchange_record_timing_record_action_index",
+            self._table,
+            ["exchange_record_id", "action"],
+        )
+
+    @api.model
+    def _log(self, exchange_record, action, started_on, duration, query_count, failed):
+        """Append a row for given action.
+
+        The attempt number and the payload size are computed in the same query.
+        """
+        self.env["ir.attachment"].flush(["res_model", "res_field", "res_id"])
+        self.env.cr.execute(
+            """
+            INSERT INTO edi_exchange_record_timing (
+                exchange_record_id, backend_id, type_id, action, attempt,
+                started_on, duration, query_count, payload_size, failed
+            )
+            SELECT
+                %(record_id)s, %(backend_id)s, %(type_id)s, %(action)s,
+                COALESCE(MAX(attempt), 0) + 1,
+                %(started_on)s, %(duration)s, %(query_count)s,
+                (
+                    SELECT file_size FROM ir_attachment
+                    WHERE res_model = 'edi.exchange.record'
+                        AND res_field = 'exchange_file'
+                        AND res_id = %(record_id)s
+                    LIMIT 1
+                ),
+                %(failed)s
+            FROM edi_exchange_record_timing
+            WHERE exchange_record_id = %(record_id)s AND action = %(action)s
+            """,
+            {
+                "record_id": exchange_record.id,
+                "backend_id": exchange_record.backend_id.id,
+                "type_id": exchange_record.type_id.id,
+                "action": action,
+                "started_on": started_on,
+                "duration": duration,
+                "query_count": query_count,
+                "failed": failed,
+            },
+        )
+
+
+class EDIExchangeRecordTimingStats(models.Model):
+    """
+    Duration percentiles by backend, exchange type and action.
+    """
+
+    _name = "edi.exchange.record.timing.stats"
+    _description = "EDI exchange record action timing statistics"
+    _auto = False
+    _order = "duration_p95 desc"
+
+    backend_id = fields.Many2one(comodel_name="edi.backend", readonly=True)
+    type_id = fields.Many2one(
+        string="Exchange type", comodel_name="edi.exchange.type", readonly=True
+    )
+    action = fields.Selection(selection=ACTIONS, readonly=True)
+    count = fields.Integer(readonly=True)
+    failed_count = fields.Integer(readonly=True)
+    duration_avg = fields.Float(string="Avg (s)", digits=(16, 4), readonly=True)
+    duration_p50 = fields.Float(string="p50 (s)", digits=(16, 4), readonly=True)
+    duration_p95 = fields.Float(string="p95 (s)", digits=(16, 4), readonly=True)
+    duration_p99 = fields.Float(string="p99 (s)", digits=(16, 4), readonly=True)
+    duration_max = fields.Float(string="Max (s)", digits=(16, 4), readonly=True)
+    query_count_avg = fields.Float(string="Avg queries", readonly=True)
+    payload_size_avg = fields.Float(string="Avg payload size", readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(
+            """
+            CREATE VIEW edi_exchange_record_timing_stats AS (
+                SELECT
+                    MIN(id) AS id,
+                    backend_id,
+                    type_id,
+                    action,
+                    COUNT(*) AS count,
+                    COUNT(*) FILTER (WHERE failed) AS failed_count,
+                    AVG(duration) AS duration_avg,
+                    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY duration)
+                        AS duration_p50,
+                    PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY duration)
+                        AS duration_p95,
+                    PERCENTILE_CONT(0.99) WITHIN GROUP (ORDER BY duration)
+                        AS duration_p99,
+                    MAX(duration) AS duration_max,
+                    AVG(query_count) AS query_count_avg,
+                    AVG(payload_size) AS payload_size_avg
+                FROM edi_exchange_record_timing
+                GROUP BY backend_id, type_id, action
+            )
+            """
+        )
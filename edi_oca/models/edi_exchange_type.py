@@ -2,17 +2,20 @@
 # Copyright 2021 Camptocamp SA
 # @author Simone Orsi <simahawk@gmail.com>
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+import copy
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from pytz import timezone, utc
 
-from odoo import _, api, exceptions, fields, models
+from odoo import _, api, exceptions, fields, models, tools
 from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT as DATETIME_FORMAT, groupby
 
 from odoo.addons.base_sparse_field.models.fields import Serialized
 from odoo.addons.http_routing.models.ir_http import slugify
 
+from ..utils import zstandard
+
 _logger = logging.getLogger(__name__)
 
 
@@ -45,6 +48,13 @@ class EDIExchangeType(models.Model):
     job_channel_id = fields.Many2one(
         comodel_name="queue.job.channel",
     )
+    job_batch_size = fields.Integer(
+        string="Job batch size",
+        help="When set, crons will handle records of this type in batches: "
+        "one job per chunk of N records instead of one job per record. "
+        "Each record is processed in its own savepoint "
+        "and failing records are rescheduled in their own job.",
+    )
     name = fields.Char(required=True)
     code = fields.Char(required=True, copy=False)
     direction = fields.Selection(
@@ -68,6 +78,12 @@ class EDIExchangeType(models.Model):
         help="Identify the type of the ack. "
         "If this field is valued it means an hack is expected.",
     )
+    ack_timeout_hours = fields.Integer(
+        string="ACK expected within (hours)",
+        help="Records still waiting for their ACK after this number of hours "
+        "are flagged as overdue by a cron and a notification is sent. "
+        "Set 0 to disable.",
+    )
     ack_for_type_ids = fields.Many2many(
         string="Ack for exchange type",
         comodel_name="edi.exchange.type",
@@ -80,6 +96,8 @@ class EDIExchangeType(models.Model):
             The YAML structure should reproduce a dictionary.
             The backend might use these settings for automated operations.
 
+            Known keys are validated on save.
+
             Currently supported conf:
 
               components:
@@ -138,11 +156,98 @@ class EDIExchangeType(models.Model):
         compute="_compute_deprecated_rule_fields_still_used"
     )
     # Deprecated fields for rules - end
+    deduplicate_input = fields.Boolean(
+        string="Skip duplicate input",
+        help="When active, incoming records having the same content "
+        "of a record already received for this type are not validated nor processed. "
+        "They are marked as duplicate instead.",
+    )
+    exchange_file_compression = fields.Selection(
+        selection=[("gzip", "Gzip"), ("zstd", "Zstandard")],
+        string="File compression",
+        help="Compress exchange files when storing them. "
+        "Content is decompressed transparently when read "
+        "and the checksum is always computed on the original content. "
+        "Zstandard requires the `zstandard` python library.",
+    )
+    split_type_id = fields.Many2one(
+        string="Split into",
+        comodel_name="edi.exchange.type",
+        ondelete="restrict",
+        domain=[("direction", "=", "input")],
+        help="For large input files holding many documents: "
+        "instead of being processed at once, files are split "
+        "by the `input.split` component into one record of this type "
+        "per document. These records are processed in parallel "
+        "and the state of the original record is aggregated from theirs.",
+    )
+    output_passthrough = fields.Boolean(
+        string="Pass-through output",
+        help="For very large outputs: content is generated when sending, "
+        "into a temporary stream consumed by the send handler. "
+        "Only its checksum and size are stored on the record, "
+        "plus a copy of the content if requested. "
+        "The content is loaded in memory only if the type has a validator "
+        "or if the send handler cannot stream it (eg: storage backends).",
+    )
+    output_passthrough_keep_copy = fields.Boolean(
+        string="Keep a copy of pass-through output",
+        help="Store a copy of the content sent, compressed if configured. "
+        "The copy is resent when sending is retried.",
+    )
+    archive_after_days = fields.Integer(
+        string="Archive after (days)",
+        help="Finished records older than this number of days "
+        "are removed by the retention cron. Set 0 to keep them forever.",
+    )
+    archive_mode = fields.Selection(
+        selection=[("archive", "Move to archive"), ("delete", "Delete")],
+        default="archive",
+        required=True,
+        help="Archive: records are copied to the exchange archive "
+        "(searchable for audits) before being deleted. "
+        "Delete: records are simply deleted. "
+        "In both cases files and messages are deleted.",
+    )
+    offload_after_days = fields.Integer(
+        string="Offload files after (days)",
+        help="Files of finished records older than this number of days "
+        "are moved to cold storage by the offload cron. "
+        "They are read from there transparently. Set 0 to disable.",
+    )
     quick_exec = fields.Boolean(
         string="Quick execution",
         help="When active, records of this type will be processed immediately "
         "without waiting for the cron to pass by.",
     )
+    disable_chatter = fields.Boolean(
+        string="No chatter",
+        help="For high volume exchanges: records of this type "
+        "do not post messages nor subscribe followers, "
+        "neither on themselves nor on their related records. "
+        "State changes and notifications are kept in a lightweight state log.",
+    )
+    notification_mode = fields.Selection(
+        selection=[
+            ("immediate", "Immediate"),
+            ("transaction", "Digest per transaction"),
+            ("window", "Digest per time window"),
+        ],
+        default="immediate",
+        required=True,
+        help="How notifications are posted on related records. "
+        "Immediate: one message per action. "
+        "Digest per transaction: one message per related record "
+        "for all the actions done in the same transaction. "
+        "Digest per time window: notifications are collected "
+        "and posted as one message per related record after the window.",
+    )
+    notification_window = fields.Integer(
+        string="Digest window (minutes)",
+        default=15,
+        help="Notifications are posted at most this number of minutes "
+        "after the first one was collected (depending on the cron frequency).",
+    )
     partner_ids = fields.Many2many(
         string="Enabled for partners",
         comodel_name="res.partner",
@@ -161,6 +266,17 @@ class EDIExchangeType(models.Model):
         )
     ]
 
+    def write(self, vals):
+        res = super().write(vals)
+        # Components lookup and parsed settings depend on types' configuration
+        self.env["edi.backend"].clear_caches()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env["edi.backend"].clear_caches()
+        return res
+
     def _inverse_active(self):
         for rec in self:
             # Disable rules if type gets disabled
@@ -170,14 +286,74 @@ class EDIExchangeType(models.Model):
     @api.depends("advanced_settings_edit")
     def _compute_advanced_settings(self):
         for rec in self:
-            rec.advanced_settings = rec._load_advanced_settings()
+            if not isinstance(rec.id, int):
+                # New record (eg: onchange), nothing to cache
+                rec.advanced_settings = rec._load_advanced_settings()
+                continue
+            # Copy to not alter the cached value
+            rec.advanced_settings = copy.deepcopy(
+                self._get_parsed_advanced_settings(rec.id, rec.write_date)
+            )
+
+    @api.model
+    @tools.ormcache("type_id", "write_date")
+    def _get_parsed_advanced_settings(self, type_id, write_date):
+        """Parse advanced settings once per type and version.
+
+        The cache is also cleared on write (see `write`)
+        since `write_date` does not change within the same transaction.
+        """
+        return self.browse(type_id)._load_advanced_settings()
 
     def _load_advanced_settings(self):
-        # TODO: validate settings w/ a schema.
-        # Could be done w/ Cerberus or JSON-schema.
-        # This would help documenting core and custom keys.
         return yaml.safe_load(self.advanced_settings_edit or "") or {}
 
+    def _get_advanced_settings_schema(self):
+        """Return the expected structure of known settings.
+
+        Keys are mapped to the expected type of their value.
+        A dictionary describes the sub-keys of a dictionary value.
+        Unknown keys are not validated.
+        """
+        component_conf = {"usage": str, "work_ctx": dict, "env_ctx": dict}
+        actions = ("generate", "validate", "check", "send", "receive", "process")
+        return {
+            "components": {key: component_conf for key in actions},
+            "filename_pattern": {"force_tz": str, "date_pattern": str},
+        }
+
+    @api.constrains("advanced_settings_edit")
+    def _check_advanced_settings(self):
+        for rec in self:
+            try:
+                settings = rec._load_advanced_settings()
+            except yaml.YAMLError as err:
+                raise exceptions.ValidationError(
+                    _("Advanced settings are not valid YAML:\n%s") % str(err)
+                )
+            if not isinstance(settings, dict):
+                raise exceptions.ValidationError(
+                    _("Advanced settings must be a dictionary.")
+                )
+            rec._validate_advanced_settings(
+                settings, rec._get_advanced_settings_schema()
+            )
+
+    def _validate_advanced_settings(self, settings, schema, path=""):
+        for key, expected in schema.items():
+            value = settings.get(key)
+            if value is None:
+                continue
+            key_path = "{}.{}".format(path, key) if path else key
+            expected_type = dict if isinstance(expected, dict) else expected
+            if not isinstance(value, expected_type):
+                raise exceptions.ValidationError(
+                    _("Advanced settings: `%(key)s` must be a %(type)s.")
+                    % {"key": key_path, "type": expected_type.__name__}
+                )
+            if isinstance(expected, dict):
+                self._validate_advanced_settings(value, expected, path=key_path)
+
     def _compute_ack_for_type_ids(self):
         ack_for = self.search([("ack_type_id", "in", self.ids)])
         by_type_id = dict(groupby(ack_for, lambda x: x.ack_type_id.id))
@@ -190,6 +366,184 @@ class EDIExchangeType(models.Model):
     def set_settings(self, val):
         self.advanced_settings_edit = val
 
+    @api.constrains("exchange_file_compression")
+    def _check_exchange_file_compression(self):
+        for rec in self:
+            if rec.exchange_file_compression == "zstd" and not zstandard:
+                raise exceptions.ValidationError(
+                    _("Zstandard compression requires the `zstandard` library.")
+                )
+
+    def _cron_check_overdue_acks(self):
+        """Flag records whose ACK is overdue for types having an ACK timeout."""
+        for exc_type in self.filtered(lambda x: x.ack_type_id and x.ack_timeout_hours):
+            records = exc_type._get_exchange_records_ack_overdue()
+            records.write({"ack_overdue": True})
+            for record in records:
+                record._notify_ack_missing()
+            _logger.info(
+                "EDI exchange type %s: %d records w/ ACK overdue.",
+                exc_type.code,
+                len(records),
+            )
+
+    def _get_exchange_records_ack_overdue(self):
+        """Return records of this type still waiting for their ACK after timeout.
+
+        The stored ACK relation is used, children are not walked.
+        """
+        self.ensure_one()
+        record_model = self.env["edi.exchange.record"]
+        limit_date = fields.Datetime.now() - timedelta(hours=self.ack_timeout_hours)
+        return record_model.search(
+            [
+                ("type_id", "=", self.id),
+                ("edi_exchange_state", "in", record_model._get_ack_waiting_states()),
+                ("ack_exchange_id", "=", False),
+                ("ack_overdue", "=", False),
+                ("exchanged_on", "<", limit_date),
+            ]
+        )
+
+    def _cron_archive_exchange_records(self, batch_size=500):
+        """Archive finished records for types having a retention."""
+        for exc_type in self.filtered("archive_after_days"):
+            exc_type.with_delay()._archive_exchange_records(batch_size=batch_size)
+
+    def _archive_exchange_records(self, batch_size=500):
+        """Archive a batch of finished records.
+
+        If the batch was full, the job reschedules itself
+        to archive the next one.
+        """
+        self.ensure_one()
+        records = self._get_exchange_records_to_archive(batch_size)
+        records._archive_exchange(delete_only=self.archive_mode == "delete")
+        _logger.info(
+            "EDI exchange type %s: %d records archived.", self.code, len(records)
+        )
+        if len(records) >= batch_size:
+            self.with_delay()._archive_exchange_records(batch_size=batch_size)
+        return _("%d records archived.") % len(records)
+
+    def _get_exchange_records_to_archive(self, limit):
+        """Return finished records older than the retention, oldest first.
+
+        Records are kept as long as they have pending children (eg: ACK).
+        """
+        self.ensure_one()
+        return self._get_finished_exchange_records(
+            self.archive_after_days,
+            limit,
+            extra_where="""
+                AND NOT EXISTS (
+                    SELECT 1 FROM edi_exchange_record child
+                    WHERE child.parent_id = rec.id
+                        AND child.edi_exchange_state NOT IN %(states)s
+                )
+            """,
+        )
+
+    def _get_finished_exchange_records(self, days, limit, extra_where=""):
+        """Return finished records older than `days`, oldest first."""
+        self.ensure_one()
+        record_model = self.env["edi.exchange.record"].sudo()
+        record_model.flush(
+            ["type_id", "edi_exchange_state", "exchanged_on", "exchange_file_location"]
+        )
+        cutoff = fields.Datetime.now() - timedelta(days=days)
+        self.env.cr.execute(
+            """
+            SELECT rec.id FROM edi_exchange_record rec
+            WHERE rec.type_id = %(type_id)s
+                AND (
+                    rec.edi_exchange_state IN %(states)s
+                    OR (
+                        rec.edi_exchange_state = 'output_sent'
+                        AND rec.backend_id IN %(sent_backend_ids)s
+                    )
+                )
+                AND COALESCE(rec.exchanged_on, rec.create_date) < %(cutoff)s
+            """
+            + extra_where
+            + """
+            ORDER BY rec.id
+            LIMIT %(limit)s
+            """,
+            {
+                "type_id": self.id,
+                "states": tuple(record_model._get_archive_states()),
+                "sent_backend_ids": tuple(self._get_sent_finished_backends().ids)
+                or (None,),
+                "cutoff": cutoff,
+                "limit": limit,
+            },
+        )
+        return record_model.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _get_sent_finished_backends(self):
+        """Return backends on which sent records of this type are finished.
+
+        Records stay in `output_sent` when no ACK is expected
+        and no `check` component updates their state.
+        """
+        self.ensure_one()
+        backends = self.env["edi.backend"].sudo()
+        if self.direction != "output" or self.ack_type_id:
+            return backends
+        if self.backend_id:
+            backends = self.backend_id.sudo()
+        else:
+            backends = backends.search(
+                [("backend_type_id", "=", self.backend_type_id.id)]
+            )
+        record_model = self.env["edi.exchange.record"].sudo()
+        return backends.filtered(
+            lambda x: not x._get_component(
+                record_model.new({"type_id": self.id, "backend_id": x.id}), "check"
+            )
+        )
+
+    def _cron_offload_exchange_files(self, batch_size=500):
+        """Offload files of finished records to cold storage."""
+        for exc_type in self.filtered("offload_after_days"):
+            exc_type.with_delay()._offload_exchange_files(batch_size=batch_size)
+
+    def _offload_exchange_files(self, batch_size=500):
+        """Offload files of a batch of finished records.
+
+        If the batch was full, the job reschedules itself
+        to offload the next one.
+        """
+        self.ensure_one()
+        records = self._get_exchange_records_to_offload(batch_size)
+        offloaded = records.filtered(lambda x: x._offload_file_content())
+        _logger.info(
+            "EDI exchange type %s: %d files offloaded.", self.code, len(offloaded)
+        )
+        # Records w/o cold storage are not offloaded: do not loop on them
+        if offloaded and len(records) >= batch_size:
+            self.with_delay()._offload_exchange_files(batch_size=batch_size)
+        return _("%d files offloaded.") % len(offloaded)
+
+    def _get_exchange_records_to_offload(self, limit):
+        """Return finished records w/ a file older than the threshold."""
+        self.ensure_one()
+        self.env["ir.attachment"].flush(["res_model", "res_field", "res_id"])
+        return self._get_finished_exchange_records(
+            self.offload_after_days,
+            limit,
+            extra_where="""
+                AND rec.exchange_file_location IS NULL
+                AND EXISTS (
+                    SELECT 1 FROM ir_attachment att
+                    WHERE att.res_model = 'edi.exchange.record'
+                        AND att.res_field = 'exchange_file'
+                        AND att.res_id = rec.id
+                )
+            """,
+        )
+
     @api.constrains("backend_id", "backend_type_id")
     def _check_backend(self):
         for rec in self:
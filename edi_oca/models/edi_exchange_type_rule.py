@@ -2,7 +2,9 @@
 # @author Simone Orsi <simahawk@gmail.com>
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
-from odoo import fields, models
+import ast
+
+from odoo import api, fields, models, tools
 
 KIND_HELP = """
 * Form button: show a button on the related model form
@@ -60,3 +62,55 @@ class EDIExchangeTypeRule(models.Model):
         translate=True,
         help="Help message visible as tooltip on button h-over",
     )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        res = super().create(vals_list)
+        # Rules are cached by model
+        self.clear_caches()
+        return res
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.clear_caches()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.clear_caches()
+        return res
+
+    @api.model
+    @tools.ormcache("model")
+    def _get_rule_ids(self, model):
+        """Return the ids of the active rules of given model.
+
+        Consumer records evaluate rules for every record displayed,
+        they are searched once per model.
+        """
+        return tuple(self.sudo().search([("model_id.model", "=", model)]).ids)
+
+    @api.model
+    def _get_rules(self, model, kind=None):
+        rules = self.sudo().browse(self._get_rule_ids(model))
+        if kind:
+            rules = rules.filtered(lambda x: x.kind == kind)
+        return rules
+
+    @api.model
+    @tools.ormcache("expr")
+    def _get_expr_names(self, expr):
+        """Return the names of the variables used in given expression."""
+        tree = ast.parse(expr.strip(), mode="eval")
+        return frozenset(
+            node.id for node in ast.walk(tree) if isinstance(node, ast.Name)
+        )
+
+    def _is_domain_record_dependent(self):
+        """Tell if the domain must be evaluated for each record.
+
+        Domains using the `record` variable depend on the record checked,
+        others are evaluated once for the whole recordset.
+        """
+        self.ensure_one()
+        return "record" in self._get_expr_names(self.enable_domain or "[]")
@@ -0,0 +1,166 @@
+# Copyright 2026 Camptocamp SA (http://www.camptocamp.com)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from collections import defaultdict
+
+from odoo import api, fields, models
+
+from .edi_exchange_action_metric import DURATION_BUCKETS
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape_label(value):
+    return (
+        str(value or "").replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    )
+
+
+def _format_labels(labels):
+    return ",".join(
+        '{}="{}"'.format(key, _escape_label(value)) for key, value in labels
+    )
+
+
+class EDIMetrics(models.AbstractModel):
+    """
+    Render EDI metrics in Prometheus text format.
+
+    Cheap enough to be scraped often: only small aggregated tables are read
+    (`edi.exchange.record.counter` and `edi.exchange.action.metric`)
+    and exchange records are only hit via index to get the oldest pending ones.
+    """
+
+    _name = "edi.metrics"
+    _description = "EDI metrics"
+
+    @api.model
+    def _render_prometheus(self, backends=None):
+        """Return metrics for given backends (all by default) as text."""
+        if backends is None:
+            backends = self.env["edi.backend"].search([])
+        counts = self.env["edi.exchange.record.counter"]._get_counts(
+            backend_ids=backends.ids
+        )
+        action_metrics = self.env["edi.exchange.action.metric"]._get_metrics(
+            backend_ids=backends.ids
+        )
+        type_ids = {key[1] for key in counts} | {key[1] for key in action_metrics}
+        names = (
+            {x.id: x.name for x in backends},
+            {x.id: x.code for x in self.env["edi.exchange.type"].browse(type_ids)},
+        )
+        lines = []
+        lines += self._render_backlog(names, counts)
+        lines += self._render_oldest_pending(names, backends, counts)
+        lines += self._render_actions(names, action_metrics)
+        return "\n".join(lines) + "\n"
+
+    def _get_labels(self, names, backend_id, type_id, *extra):
+        """Return formatted labels.
+
+        :param names: tuple of dicts mapping ids to names for backends and types
+        """
+        backend_names, type_codes = names
+        return _format_labels(
+            (
+                ("backend", backend_names.get(backend_id)),
+                ("type", type_codes.get(type_id)),
+            )
+            + extra
+        )
+
+    def _render_header(self, name, kind, help_txt):
+        return [
+            "# HELP {} {}".format(name, help_txt),
+            "# TYPE {} {}".format(name, kind),
+        ]
+
+    def _render_backlog(self, names, counts):
+        name = "edi_exchange_records"
+        lines = self._render_header(
+            name, "gauge", "Number of exchange records by state."
+        )
+        for (backend_id, type_id, state), count in sorted(counts.items()):
+            labels = self._get_labels(names, backend_id, type_id, ("state", state))
+            lines.append("%s{%s} %d" % (name, labels, count))
+        return lines
+
+    def _render_oldest_pending(self, names, backends, counts):
+        name = "edi_exchange_oldest_pending_age_seconds"
+        lines = self._render_header(
+            name, "gauge", "Age of the oldest pending exchange record by state."
+        )
+        pending_states = set(backends._get_pending_states("output", skip_sent=False))
+        pending_states.update(backends._get_pending_states("input"))
+        keys = [
+            key for key, count in counts.items() if key[2] in pending_states and count
+        ]
+        if not keys:
+            return lines
+        self.env["edi.exchange.record"].flush(
+            ["backend_id", "type_id", "edi_exchange_state"]
+        )
+        # One index lookup per key
+        self.env.cr.execute(
+            """
+            SELECT keys.backend_id, keys.type_id, keys.state, oldest.create_date
+            FROM (VALUES {}) AS keys(backend_id, type_id, state)
+            CROSS JOIN LATERAL (
+                SELECT rec.create_date FROM edi_exchange_record rec
+                WHERE rec.type_id = keys.type_id
+                    AND rec.edi_exchange_state = keys.state
+                    AND rec.backend_id = keys.backend_id
+                ORDER BY rec.create_date
+                LIMIT 1
+            ) AS oldest
+            """.format(
+                ", ".join(["(%s, %s, %s)"] * len(keys))
+            ),
+            [value for key in keys for value in key],
+        )
+        now = fields.Datetime.now()
+        for backend_id, type_id, state, create_date in sorted(self.env.cr.fetchall()):
+            labels = self._get_labels(names, backend_id, type_id, ("state", state))
+            age = max((now - create_date).total_seconds(), 0)
+            lines.append("%s{%s} %.3f" % (name, labels, age))
+        return lines
+
+    def _render_actions(self, names, action_metrics):
+        total_name = "edi_exchange_actions_total"
+        lines = self._render_header(
+            total_name, "counter", "Number of actions run by outcome."
+        )
+        totals = defaultdict(int)
+        histograms = defaultdict(lambda: [[0] * (len(DURATION_BUCKETS) + 1), 0.0])
+        for key, (count, duration_sum) in action_metrics.items():
+            backend_id, type_id, action, failed, bucket = key
+            totals[(backend_id, type_id, action, failed)] += count
+            histogram = histograms[(backend_id, type_id, action)]
+            histogram[0][bucket] += count
+            histogram[1] += duration_sum
+        for (backend_id, type_id, action, failed), count in sorted(totals.items()):
+            labels = self._get_labels(
+                names,
+                backend_id,
+                type_id,
+                ("action", action),
+                ("outcome", "failure" if failed else "success"),
+            )
+            lines.append("%s{%s} %d" % (total_name, labels, count))
+        name = "edi_exchange_action_duration_seconds"
+        lines += self._render_header(name, "histogram", "Duration of actions.")
+        bounds = [str(x) for x in DURATION_BUCKETS] + ["+Inf"]
+        for (backend_id, type_id, action), histogram in sorted(histograms.items()):
+            bucket_counts, duration_sum = histogram
+            cumulated = 0
+            for bound, count in zip(bounds, bucket_counts):
+                cumulated += count
+                labels = self._get_labels(
+                    names, backend_id, type_id, ("action", action), ("le", bound)
+                )
+                lines.append("%s_bucket{%s} %d" % (name, labels, cumulated))
+            labels = self._get_labels(names, backend_id, type_id, ("action", action))
+            lines.append("%s_sum{%s} %.6f" % (name, labels, duration_sum))
+            lines.append("%s_count{%s} %d" % (name, labels, cumulated))
+        return lines
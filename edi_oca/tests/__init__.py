@@ -13,3 +13,9 @@ from . import test_edi_backend_cron
 from . import test_security
 from . import test_quick_exec
 from . import test_exchange_type_deprecated_fields
+from . import test_archive
+from . import test_counter
+from . import test_timing
+from . import test_metrics
+from . import test_notification
+from . import test_split
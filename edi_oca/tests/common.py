@@ -105,3 +105,12 @@ class EDIBackendCommonComponentRegistryTestCase(
         cls._setup_env()
         cls._setup_records()
         cls._load_module_components(cls, "edi_oca")
+
+    def _load_module_components(self, module):
+        SavepointComponentRegistryCase._load_module_components(self, module)
+        # Drop components lookup cached before registering new ones
+        self.env["edi.backend"].clear_caches()
+
+    def _build_components(self, *classes):
+        SavepointComponentRegistryCase._build_components(self, *classes)
+        self.env["edi.backend"].clear_caches()
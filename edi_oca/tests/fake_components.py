@@ -65,9 +65,20 @@ class FakeOutputSender(FakeComponentMixin):
 
     _action = "send"
 
+    # Contents read from pass-through streams
+    STREAMED = []
+
     def send(self):
+        stream = self._get_output_stream()
+        if stream:
+            self.STREAMED.append(stream.read())
         return self._fake_it()
 
+    @classmethod
+    def reset_faked(cls):
+        super().reset_faked()
+        cls.STREAMED = []
+
 
 class FakeOutputChecker(FakeComponentMixin):
     _name = "fake.output.checker"
@@ -95,6 +106,39 @@ class FakeInputProcess(FakeComponentMixin):
         return self._fake_it()
 
 
+class FakeInputSplit(FakeComponentMixin):
+    _name = "fake.input.split"
+    _inherit = "edi.component.split.mixin"
+    _usage = "input.split"
+    _backend_type = "demo_backend"
+    _exchange_type = "test_csv_input"
+
+    _action = "split"
+
+    def split(self):
+        self._fake_it()
+        # Break on the n-th document
+        break_at = self.env.context.get("test_break_split_at")
+        with self.exchange_record._open_file_content() as fd:
+            for i, line in enumerate(iter(fd.readline, b"")):
+                if i == break_at:
+                    raise ValueError("Malformed document %d" % i)
+                yield line.strip(), {}
+
+
+class FakeInputDocumentProcess(FakeComponentMixin):
+    _name = "fake.input.document.process"
+    _inherit = "edi.component.input.mixin"
+    _usage = "input.process"
+    _backend_type = "demo_backend"
+    _exchange_type = "test_csv_input_document"
+
+    _action = "process"
+
+    def process(self):
+        return self._fake_it()
+
+
 class FakeInputReceive(FakeComponentMixin):
     _name = "fake.input.receive"
     _inherit = "edi.component.input.mixin"
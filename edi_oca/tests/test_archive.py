@@ -0,0 +1,187 @@
+# Copyright 2026 Camptocamp SA (http://www.camptocamp.com)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import base64
+import os
+import tempfile
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tools import mute_logger
+
+from odoo.addons.edi_oca.utils import get_checksum
+
+from .common import EDIBackendCommonTestCase
+
+LOGGERS = ("odoo.addons.edi_oca.models.edi_exchange_type",)
+
+
+class EDIArchiveTestCase(EDIBackendCommonTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.exchange_type_out.archive_after_days = 30
+        old_date = fields.Datetime.now() - timedelta(days=31)
+        cls.records = cls.backend.create_records(
+            "test_csv_output",
+            [
+                {
+                    "model": cls.partner._name,
+                    "res_id": cls.partner.id,
+                    "exchange_file": base64.b64encode(b"ABC"),
+                }
+                for __ in range(3)
+            ],
+        )
+        cls.records.write(
+            {
+                "edi_exchange_state": "output_sent_and_processed",
+                "exchanged_on": old_date,
+            }
+        )
+        others = cls.backend.create_records(
+            "test_csv_output", [{}, {"exchanged_on": old_date}, {}]
+        )
+        cls.record_recent, cls.record_pending, cls.record_ack = others
+        cls.record_recent.edi_exchange_state = "output_sent_and_processed"
+        cls.archive_model = cls.env["edi.exchange.record.archive"]
+
+    def _get_archived(self, identifiers):
+        return self.archive_model.search([("identifier", "in", identifiers)])
+
+    def test_to_archive(self):
+        to_archive = self.exchange_type_out._get_exchange_records_to_archive(10)
+        self.assertEqual(to_archive, self.records)
+        # Oldest first, limited
+        to_archive = self.exchange_type_out._get_exchange_records_to_archive(2)
+        self.assertEqual(to_archive.ids, self.records.ids[:2])
+        # Pending children keep the parent
+        self.record_ack.parent_id = self.records[0]
+        to_archive = self.exchange_type_out._get_exchange_records_to_archive(10)
+        self.assertEqual(to_archive, self.records[1:])
+
+    @mute_logger(*LOGGERS)
+    def test_archive(self):
+        identifiers = self.records.mapped("identifier")
+        attachments = self.env["ir.attachment"].search(
+            [("res_model", "=", self.records._name), ("res_id", "in", self.records.ids)]
+        )
+        self.assertEqual(len(attachments), 3)
+        # Small batches: the job reschedules itself until done
+        self.exchange_type_out._archive_exchange_records(batch_size=2)
+        self.assertFalse(self.records.exists())
+        self.assertFalse(attachments.exists())
+        archived = self._get_archived(identifiers)
+        self.assertEqual(len(archived), 3)
+        for rec in archived:
+            self.assertEqual(rec.type_id, self.exchange_type_out)
+            self.assertEqual(rec.edi_exchange_state, "output_sent_and_processed")
+            self.assertEqual(rec.model, self.partner._name)
+            self.assertEqual(rec.res_id, self.partner.id)
+            self.assertTrue(rec.exchange_filechecksum)
+        # Recent or not finished records are kept
+        self.assertTrue(self.record_recent.exists())
+        self.assertTrue(self.record_pending.exists())
+
+    def test_to_archive_sent(self):
+        self.records.edi_exchange_state = "output_sent"
+        # Waiting for an ACK
+        self.assertFalse(self.exchange_type_out._get_exchange_records_to_archive(10))
+        self.exchange_type_out.ack_type_id = False
+        to_archive = self.exchange_type_out._get_exchange_records_to_archive(10)
+        self.assertEqual(to_archive, self.records)
+        self.exchange_type_out._archive_exchange_records()
+        self.assertFalse(self.records.exists())
+        self.assertTrue(self.record_recent.exists())
+
+    @mute_logger(*LOGGERS)
+    def test_archive_delete(self):
+        identifiers = self.records.mapped("identifier")
+        self.exchange_type_out.archive_mode = "delete"
+        self.exchange_type_out._cron_archive_exchange_records()
+        self.assertFalse(self.records.exists())
+        self.assertFalse(self._get_archived(identifiers))
+
+    @mute_logger(*LOGGERS)
+    def test_offload_local(self):
+        record = self.records[0]
+        self.exchange_type_out.offload_after_days = 10
+        # No cold storage configured: nothing to do
+        self.exchange_type_out._offload_exchange_files()
+        self.assertFalse(record.exchange_file_offloaded)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.env["ir.config_parameter"].sudo().set_param(
+                "edi_oca.offload_path", tmp_dir
+            )
+            to_offload = self.exchange_type_out._get_exchange_records_to_offload(10)
+            self.assertEqual(to_offload, self.records)
+            self.exchange_type_out._cron_offload_exchange_files()
+            self.assertTrue(record.exchange_file_offloaded)
+            self.assertFalse(record._get_file_attachment())
+            self.assertFalse(record.exchange_file)
+            key = record.exchange_file_location.split(":", 1)[1]
+            self.assertTrue(os.path.exists(os.path.join(tmp_dir, key)))
+            # Checksum is kept, content is read from cold storage
+            self.assertEqual(record.exchange_filechecksum, get_checksum(b"ABC"))
+            self.assertEqual(record._get_file_content(), "ABC")
+            self.assertFalse(
+                self.exchange_type_out._get_exchange_records_to_offload(10)
+            )
+            # Restore
+            record.action_rehydrate_file_content()
+            self.assertFalse(record.exchange_file_offloaded)
+            self.assertTrue(record._get_file_attachment())
+            self.assertEqual(record._get_file_content(), "ABC")
+
+    def test_to_offload_sent(self):
+        self.exchange_type_out.offload_after_days = 10
+        self.records.edi_exchange_state = "output_sent"
+        # Waiting for an ACK
+        self.assertFalse(self.exchange_type_out._get_exchange_records_to_offload(10))
+        self.exchange_type_out.ack_type_id = False
+        to_offload = self.exchange_type_out._get_exchange_records_to_offload(10)
+        self.assertEqual(to_offload, self.records)
+
+    def test_offload_local_cleanup(self):
+        rec1, rec2, rec3 = self.records
+        model = self.env["edi.exchange.record"]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.env["ir.config_parameter"].sudo().set_param(
+                "edi_oca.offload_path", tmp_dir
+            )
+
+            def _path(rec):
+                key = rec.exchange_file_location.split(":", 1)[1]
+                return os.path.join(tmp_dir, key)
+
+            # Files written are dropped if the transaction is rolled back
+            self.assertTrue(rec1._offload_file_content())
+            path1 = _path(rec1)
+            self.assertTrue(os.path.exists(path1))
+            model._flush_offload_cleanup("postrollback")
+            self.assertFalse(os.path.exists(path1))
+            # Files not referenced anymore are dropped once committed
+            self.assertTrue(rec2._offload_file_content())
+            self.assertTrue(rec3._offload_file_content())
+            path2, path3 = _path(rec2), _path(rec3)
+            # Simulate the commit of the offload
+            self.env.cr.postrollback.data.pop(model._offload_cleanup_key)
+            rec2.action_rehydrate_file_content()
+            rec3._archive_exchange()
+            self.assertTrue(os.path.exists(path2))
+            self.assertTrue(os.path.exists(path3))
+            model._flush_offload_cleanup("postcommit")
+            self.assertFalse(os.path.exists(path2))
+            self.assertFalse(os.path.exists(path3))
+            self.assertEqual(rec2._get_file_content(), "ABC")
+            # Offloaded again in the same transaction: the file is kept
+            rec2._offload_file_content()
+            rec2.action_rehydrate_file_content()
+            self.assertTrue(rec2._offload_file_content())
+            self.assertTrue(os.path.exists(path2))
+            self.assertNotIn(
+                rec2.exchange_file_location,
+                self.env.cr.postcommit.data[model._offload_cleanup_key],
+            )
+            model._flush_offload_cleanup("postrollback")
+            model._flush_offload_cleanup("postcommit")
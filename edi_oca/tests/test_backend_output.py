@@ -9,10 +9,17 @@ from freezegun import freeze_time
 from odoo import fields, tools
 from odoo.exceptions import UserError
 
+from odoo.addons.edi_oca.utils import get_checksum
 from odoo.addons.queue_job.tests.common import trap_jobs
 
 from .common import EDIBackendCommonComponentRegistryTestCase
-from .fake_components import FakeOutputChecker, FakeOutputGenerator, FakeOutputSender
+from ..exceptions import EDIValidationError
+from .fake_components import (
+    FakeOutputChecker,
+    FakeOutputGenerator,
+    FakeOutputSender,
+    FakeOutputValidate,
+)
 
 
 class EDIBackendTestOutputCase(EDIBackendCommonComponentRegistryTestCase):
@@ -24,6 +31,7 @@ class EDIBackendTestOutputCase(EDIBackendCommonComponentRegistryTestCase):
             FakeOutputGenerator,
             FakeOutputSender,
             FakeOutputChecker,
+            FakeOutputValidate,
         )
         vals = {
             "model": cls.partner._name,
@@ -36,6 +44,7 @@ class EDIBackendTestOutputCase(EDIBackendCommonComponentRegistryTestCase):
         FakeOutputGenerator.reset_faked()
         FakeOutputSender.reset_faked()
         FakeOutputChecker.reset_faked()
+        FakeOutputValidate.reset_faked()
 
     def test_generate_record_output(self):
         self.record.with_context(fake_output="yeah!").action_exchange_generate()
@@ -108,6 +117,79 @@ class EDIBackendTestOutputCase(EDIBackendCommonComponentRegistryTestCase):
             )
             mocked.assert_not_called()
 
+    def test_send_passthrough(self):
+        self.exchange_type_out.output_passthrough = True
+        self.record.with_context(fake_output="yeah!").action_exchange_generate()
+        self.assertTrue(FakeOutputGenerator.check_not_called_for(self.record))
+        self.assertRecordValues(
+            self.record,
+            [{"edi_exchange_state": "output_pending", "exchange_file": False}],
+        )
+        self.record.with_context(fake_output="yeah!").action_exchange_send()
+        self.assertTrue(FakeOutputGenerator.check_called_for(self.record))
+        self.assertEqual(FakeOutputSender.STREAMED, [b"yeah!"])
+        self.assertRecordValues(
+            self.record,
+            [
+                {
+                    "edi_exchange_state": "output_sent",
+                    "exchange_file": False,
+                    "exchange_filechecksum": get_checksum(b"yeah!"),
+                    "exchange_file_size": 5,
+                }
+            ],
+        )
+
+    def test_send_passthrough_generate_error(self):
+        self.exchange_type_out.output_passthrough = True
+        self.record.action_exchange_generate()
+        self.record.with_context(test_break_generate="OOPS!").action_exchange_send()
+        self.assertEqual(FakeOutputSender.STREAMED, [])
+        self.assertTrue(FakeOutputSender.check_not_called_for(self.record))
+        self.assertEqual(self.record.edi_exchange_state, "validate_error")
+        self.assertIn("OOPS!", self.record.exchange_error)
+
+    def test_send_passthrough_validate(self):
+        self.exchange_type_out.output_passthrough = True
+        self.record.action_exchange_generate()
+        self.record.with_context(
+            fake_output="yeah!", test_break_validate=EDIValidationError("Invalid!")
+        ).action_exchange_send()
+        self.assertTrue(FakeOutputValidate.check_called_for(self.record))
+        self.assertTrue(FakeOutputSender.check_not_called_for(self.record))
+        self.assertEqual(self.record.edi_exchange_state, "validate_error")
+        self.assertIn("Invalid!", self.record.exchange_error)
+
+    def test_send_passthrough_keep_copy(self):
+        self.exchange_type_out.write(
+            {
+                "output_passthrough": True,
+                "output_passthrough_keep_copy": True,
+                "exchange_file_compression": "gzip",
+            }
+        )
+        self.record.action_exchange_generate()
+        self.record.with_context(
+            fake_output="yeah!", test_break_send="OOPS!"
+        ).action_exchange_send()
+        self.assertRecordValues(
+            self.record,
+            [
+                {
+                    "edi_exchange_state": "output_error_on_send",
+                    "exchange_file_compression": "gzip",
+                    "exchange_file_size": 5,
+                }
+            ],
+        )
+        self.assertEqual(self.record._get_file_content(), "yeah!")
+        # The copy is resent, not generated again
+        FakeOutputGenerator.reset_faked()
+        self.record.with_context(fake_output="nope").action_exchange_send()
+        self.assertTrue(FakeOutputGenerator.check_not_called_for(self.record))
+        self.assertEqual(FakeOutputSender.STREAMED, [b"yeah!", b"yeah!"])
+        self.assertEqual(self.record.edi_exchange_state, "output_sent")
+
 
 class EDIBackendTestOutputJobsCase(EDIBackendCommonComponentRegistryTestCase):
     @classmethod
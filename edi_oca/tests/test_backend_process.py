@@ -63,6 +63,62 @@ class EDIBackendTestProcessCase(EDIBackendCommonComponentRegistryTestCase):
         )
         self.assertIn("OOPS! Something went wrong :(", self.record.exchange_error)
 
+    def test_process_duplicate(self):
+        self.exchange_type_in.deduplicate_input = True
+        self.record.write({"edi_exchange_state": "input_processed"})
+        vals = {
+            "model": self.partner._name,
+            "res_id": self.partner.id,
+            "exchange_file": base64.b64encode(b"1234"),
+            "edi_exchange_state": "input_received",
+        }
+        record = self.backend.create_record("test_csv_input", vals)
+        self.assertEqual(
+            record.exchange_filechecksum, self.record.exchange_filechecksum
+        )
+        record.action_exchange_process()
+        self.assertTrue(FakeInputProcess.check_not_called_for(record))
+        self.assertRecordValues(
+            record,
+            [
+                {
+                    "edi_exchange_state": "input_duplicate",
+                    "duplicate_of_id": self.record.id,
+                }
+            ],
+        )
+        # Different content is processed
+        vals["exchange_file"] = base64.b64encode(b"5678")
+        record = self.backend.create_record("test_csv_input", vals)
+        record.action_exchange_process()
+        self.assertTrue(FakeInputProcess.check_called_for(record))
+        self.assertEqual(record.edi_exchange_state, "input_processed")
+
+    def test_process_duplicate_of_failed_or_newer(self):
+        self.exchange_type_in.deduplicate_input = True
+        self.record.write({"edi_exchange_state": "input_processed_error"})
+        vals = {
+            "type_id": self.exchange_type_in.id,
+            "backend_id": self.backend.id,
+            "exchange_file": base64.b64encode(b"1234"),
+            "edi_exchange_state": "input_received",
+        }
+        record = self.env["edi.exchange.record"].create(vals)
+        # Values of the caller are left untouched
+        self.assertNotIn("exchange_filechecksum", vals)
+        # Content of a failed record is not a duplicate
+        record.action_exchange_process()
+        self.assertTrue(FakeInputProcess.check_called_for(record))
+        self.assertEqual(record.edi_exchange_state, "input_processed")
+        # The older record is not a duplicate of the newer one
+        self.record.action_retry()
+        self.record.action_exchange_process()
+        self.assertTrue(FakeInputProcess.check_called_for(self.record))
+        self.assertRecordValues(
+            self.record,
+            [{"edi_exchange_state": "input_processed", "duplicate_of_id": False}],
+        )
+
     @mute_logger("odoo.models.unlink")
     def test_process_no_file_record(self):
         self.record.write({"edi_exchange_state": "input_received"})
@@ -2,6 +2,8 @@
 # @author: Simone Orsi <simahawk@gmail.com>
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+import mock
+
 from odoo.addons.component.core import Component
 
 from .common import EDIBackendCommonComponentRegistryTestCase
@@ -69,3 +71,43 @@ class EDIBackendTestMatchCase(EDIBackendCommonComponentRegistryTestCase):
             exchange_type="test_csv_output",
         )
         self.assertEqual(component._name, MatchByExchangeTypeOnly._name)
+
+    def test_component_lookup_cache(self):
+        class MatchByExchangeType(Component):
+            _name = "exchange_type.cached"
+            _inherit = "edi.component.mixin"
+            _usage = "generate"
+            _exchange_type = "test_csv_output"
+            _apply_on = ["res.partner"]
+
+        self._build_components(MatchByExchangeType)
+        work_ctx = {"exchange_record": self.env["edi.exchange.record"].browse()}
+        backend_cls = type(self.backend)
+        with mock.patch.object(
+            backend_cls,
+            "_lookup_component_class",
+            autospec=True,
+            side_effect=backend_cls._lookup_component_class,
+        ) as mocked:
+            for __ in range(3):
+                component = self.backend._find_component(
+                    "res.partner",
+                    ["generate"],
+                    work_ctx=work_ctx,
+                    exchange_type="test_csv_output",
+                )
+                self.assertEqual(component._name, MatchByExchangeType._name)
+            # Work context is built per call, lookup happens once
+            self.assertEqual(mocked.call_count, 1)
+            self.assertEqual(
+                component.work.exchange_record, work_ctx["exchange_record"]
+            )
+            # Changing types configuration drops the cache
+            self.exchange_type_out.name = "Changed"
+            self.backend._find_component(
+                "res.partner",
+                ["generate"],
+                work_ctx=work_ctx,
+                exchange_type="test_csv_output",
+            )
+            self.assertEqual(mocked.call_count, 2)
@@ -7,6 +7,8 @@
 import os
 import unittest
 
+import mock
+
 from lxml import etree
 from odoo_test_helper import FakeModelLoader
 
@@ -179,6 +181,39 @@ result = not record._has_exchange_record(exchange_type, exchange_type.backend_id
             self.consumer_record.exchange_record_ids.type_id, self.exchange_type_new
         )
 
+    def test_batch(self):
+        consumers = self.consumer_record | self.consumer_record.create(
+            [{"name": "Test Consumer 2"}, {"name": "Test Consumer 3"}]
+        )
+        rule = self.exchange_type_new.rule_ids
+        rule.enable_domain = "[('name', '!=', 'Test Consumer 3')]"
+        exchange_types = consumers._edi_get_enabled_exchange_types(kind="custom")
+        self.assertEqual(
+            exchange_types,
+            {
+                self.exchange_type_out: consumers,
+                self.exchange_type_new: consumers[:2],
+            },
+        )
+        self.assertFalse(consumers._edi_get_enabled_exchange_types(kind="form_btn"))
+        exchange_records = consumers._edi_create_exchange_records(
+            exchange_types, backend=self.backend
+        )
+        self.assertEqual(len(exchange_records), 5)
+        self.assertEqual(exchange_records.backend_id, self.backend)
+        for consumer in consumers[:2]:
+            self.assertEqual(
+                consumer.exchange_record_ids.type_id,
+                self.exchange_type_out | self.exchange_type_new,
+            )
+        self.assertEqual(
+            consumers[2].exchange_record_ids.type_id, self.exchange_type_out
+        )
+        # Already created
+        self.assertFalse(
+            consumers._edi_get_enabled_exchange_types(kind="custom", skip_existing=True)
+        )
+
     def test_form(self):
         """Testing that the form has inherited the fields and inserted them.
 
@@ -190,3 +225,113 @@ result = not record._has_exchange_record(exchange_type, exchange_type.backend_id
             form = etree.fromstring(f._view["arch"])
             self.assertTrue(form.xpath("//field[@name='edi_has_form_config']"))
             self.assertTrue(form.xpath("//field[@name='edi_config']"))
+
+    def test_latest_exchange(self):
+        consumers = self.consumer_record | self.consumer_record.create(
+            [{"name": "Test Consumer 2"}, {"name": "Test Consumer 3"}]
+        )
+        self.assertFalse(consumers._edi_get_latest_exchange_records())
+        vals = {"model": consumers._name, "res_id": consumers[0].id}
+        self.backend.create_record("test_csv_output", vals)
+        exc2 = self.backend.create_record("test_csv_output", vals)
+        exc3 = self.backend.create_record("test_csv_new_output", vals)
+        exc3.edi_exchange_state = "output_pending"
+        vals["res_id"] = consumers[1].id
+        exc4 = self.backend.create_record("test_csv_output", vals)
+        type_out = self.exchange_type_out
+        type_new = self.exchange_type_new
+        latest = consumers._edi_get_latest_exchange_records()
+        self.assertEqual(
+            latest,
+            {
+                consumers[0].id: {
+                    type_out.id: (exc2, "new"),
+                    type_new.id: (exc3, "output_pending"),
+                },
+                consumers[1].id: {type_out.id: (exc4, "new")},
+            },
+        )
+        latest = consumers._edi_get_latest_exchange_records(exchange_types=type_new)
+        self.assertEqual(
+            latest, {consumers[0].id: {type_new.id: (exc3, "output_pending")}}
+        )
+        self.assertFalse(
+            consumers._edi_get_latest_exchange_records(backend=self.backend_02)
+        )
+        self.assertEqual(consumers._edi_has_exchange_records(type_out), consumers[:2])
+        self.assertEqual(
+            consumers._edi_filter_without_exchange_record(type_new), consumers[1:]
+        )
+        # Computed status
+        self.assertEqual(consumers[0].edi_last_exchange_record_id, exc3)
+        self.assertEqual(consumers[0].edi_last_exchange_state, "output_pending")
+        self.assertEqual(consumers[1].edi_last_exchange_record_id, exc4)
+        self.assertEqual(consumers[1].edi_last_exchange_state, "new")
+        self.assertFalse(consumers[2].edi_last_exchange_record_id)
+        self.assertFalse(consumers[2].edi_last_exchange_state)
+
+    def test_form_cached(self):
+        model = self.env["edi.exchange.consumer.test"]
+        model.clear_caches()
+        qweb_cls = type(self.env["ir.qweb"])
+        with mock.patch.object(
+            qweb_cls, "_render", autospec=True, side_effect=qweb_cls._render
+        ) as mocked:
+            res1 = model.fields_view_get(view_type="form")
+            res2 = model.fields_view_get(view_type="form")
+        self.assertEqual(mocked.call_count, 1)
+        self.assertEqual(res1["arch"], res2["arch"])
+        self.assertIn("edi_config", res2["fields"])
+        form = etree.fromstring(res2["arch"])
+        self.assertTrue(form.xpath("//field[@name='edi_has_form_config']"))
+
+    def test_rules_cached(self):
+        rule_model = self.env["edi.exchange.type.rule"]
+        model_name = self.consumer_record._name
+        rules = rule_model._get_rules(model_name)
+        self.assertEqual(
+            rules, self.exchange_type_out.rule_ids | self.exchange_type_new.rule_ids
+        )
+        self.assertEqual(rule_model._get_rules(model_name, kind="form_btn"), rule_model)
+        new_rule = rule_model.create(
+            {
+                "name": "Test button",
+                "type_id": self.exchange_type_out.id,
+                "model_id": self.env["ir.model"]._get_id(model_name),
+                "kind": "form_btn",
+            }
+        )
+        self.assertEqual(rule_model._get_rules(model_name, kind="form_btn"), new_rule)
+        self.consumer_record.invalidate_cache(["edi_has_form_config", "edi_config"])
+        self.assertIn(str(new_rule.id), self.consumer_record.edi_config)
+        new_rule.active = False
+        self.assertFalse(rule_model._get_rules(model_name, kind="form_btn"))
+
+    def test_rules_unsafe_code(self):
+        rule = self.exchange_type_new.rule_ids
+        type_new = self.exchange_type_new
+        rule.enable_domain = "[('id', '=', __import__('os').getpid())]"
+        # Rejected by safe_eval's dunder names check or at evaluation time
+        with self.assertRaisesRegex((NameError, ValueError), "__import__"):
+            self.consumer_record._edi_filter_by_rule(rule)
+        rule.enable_domain = "[]"
+        self.assertEqual(
+            self.consumer_record._edi_filter_by_rule(rule), self.consumer_record
+        )
+        rule.enable_snippet = "result = __import__('os').getpid()"
+        with self.assertRaisesRegex((NameError, ValueError), "__import__"):
+            self.consumer_record._edi_eval_rule_snippet(rule, type_new)
+
+    def test_rules_record_dependent_domain(self):
+        rule = self.exchange_type_new.rule_ids
+        other = self.consumer_record.copy({"name": "Other record"})
+        consumers = self.consumer_record | other
+        rule.enable_snippet = False
+        rule.enable_domain = "[('name', '!=', 'record')]"
+        self.assertFalse(rule._is_domain_record_dependent())
+        self.assertEqual(consumers._edi_filter_by_rule(rule), consumers)
+        rule.enable_domain = "[('id', '=', record.id), ('name', '=', 'Other record')]"
+        self.assertTrue(rule._is_domain_record_dependent())
+        self.assertEqual(consumers._edi_filter_by_rule(rule), other)
+        rule.enable_domain = False
+        self.assertFalse(rule._is_domain_record_dependent())
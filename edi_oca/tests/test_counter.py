@@ -0,0 +1,95 @@
+# Copyright 2026 Camptocamp SA (http://www.camptocamp.com)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import mock
+
+from odoo.tools import mute_logger
+
+from .common import EDIBackendCommonTestCase
+
+
+class EDICounterTestCase(EDIBackendCommonTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.counter_model = cls.env["edi.exchange.record.counter"]
+
+    @classmethod
+    def _get_backend(cls):
+        # Fresh backend: no record around
+        return cls.env["edi.backend"].create(
+            {
+                "name": "EDI counters",
+                "backend_type_id": cls.env.ref("edi_oca.demo_edi_backend_type").id,
+            }
+        )
+
+    def _get_counts(self):
+        return {
+            key[1:]: count
+            for key, count in self.counter_model._get_counts(
+                backend_ids=self.backend.ids
+            ).items()
+        }
+
+    def test_counters(self):
+        type_out = self.exchange_type_out
+        type_in = self.exchange_type_in
+        records = self.backend.create_records("test_csv_output", [{}, {}, {}])
+        record_in = self.backend.create_record("test_csv_input", {})
+        self.assertEqual(
+            self._get_counts(), {(type_out.id, "new"): 3, (type_in.id, "new"): 1}
+        )
+        records[:2].write({"edi_exchange_state": "output_pending"})
+        record_in.edi_exchange_state = "input_received"
+        self.assertEqual(
+            self._get_counts(),
+            {
+                (type_out.id, "new"): 1,
+                (type_out.id, "output_pending"): 2,
+                (type_in.id, "input_received"): 1,
+            },
+        )
+        records[0].unlink()
+        expected = {
+            (type_out.id, "new"): 1,
+            (type_out.id, "output_pending"): 1,
+            (type_in.id, "input_received"): 1,
+        }
+        self.assertEqual(self._get_counts(), expected)
+        # Compaction and rebuild do not change counts
+        self.counter_model._cron_compact()
+        self.assertEqual(self._get_counts(), expected)
+        self.assertEqual(
+            self.counter_model.search_count([("backend_id", "=", self.backend.id)]),
+            3,
+        )
+        self.counter_model._rebuild()
+        self.assertEqual(self._get_counts(), expected)
+
+    def test_cron_skip_idle_backend(self):
+        backend_model = type(self.backend)
+        with mock.patch.object(
+            backend_model, "_check_output_exchange_sync", autospec=True
+        ) as mocked:
+            self.backend._cron_check_output_exchange_sync()
+            mocked.assert_not_called()
+            self.backend.create_record("test_csv_output", {})
+            self.backend._cron_check_output_exchange_sync()
+            mocked.assert_called_once()
+
+    @mute_logger("odoo.addons.edi_oca.models.edi_backend")
+    def test_counters_out_of_sync(self):
+        self.backend.create_records("test_csv_output", [{}, {}])
+        # Counters changed w/o the ORM
+        self.env.cr.execute(
+            "DELETE FROM edi_exchange_record_counter WHERE backend_id = %s",
+            (self.backend.id,),
+        )
+        self.assertFalse(self._get_counts())
+        # Pending records are not skipped, counters are rebuilt
+        backends = self.backend._filter_with_pending_exchanges("output")
+        self.assertEqual(backends, self.backend)
+        self.assertEqual(self._get_counts(), {(self.exchange_type_out.id, "new"): 2})
+        # Idle backends are still skipped
+        self.assertFalse(self.backend._filter_with_pending_exchanges("input"))
@@ -2,8 +2,15 @@
 # @author: Simone Orsi <simahawk@gmail.com>
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+from datetime import timedelta
+
+import mock
+
+from odoo import fields
 from odoo.tools import mute_logger
 
+from odoo.addons.queue_job.tests.common import trap_jobs
+
 from .common import EDIBackendCommonComponentRegistryTestCase
 from .fake_components import FakeOutputChecker, FakeOutputGenerator, FakeOutputSender
 
@@ -92,3 +99,108 @@ class EDIBackendTestCronCase(EDIBackendCommonComponentRegistryTestCase):
         self.assertTrue(FakeOutputGenerator.check_not_called_for(self.record1))
         self.assertTrue(FakeOutputSender.check_not_called_for(self.record1))
         self.assertTrue(FakeOutputChecker.check_called_for(self.record1))
+
+    @mute_logger(*LOGGERS)
+    def test_exchange_generate_new_auto_send_batch(self):
+        self.exchange_type_out.exchange_file_auto_generate = True
+        self.exchange_type_out.job_batch_size = 2
+        records = self.record1 + self.record2 + self.record3
+        with mock.patch.object(
+            type(self.record1), "action_exchange_batch", autospec=True
+        ) as mocked:
+            self.backend._cron_check_output_exchange_sync()
+        # 3 records in chunks of 2 -> 2 jobs
+        self.assertEqual(mocked.call_count, 2)
+        chunks = [call[0][0] for call in mocked.call_args_list]
+        self.assertEqual([len(x) for x in chunks], [2, 1])
+        self.assertEqual(chunks[0] | chunks[1], records)
+        self.assertEqual(mocked.call_args[0][1], ("generate", "send"))
+        self.backend._cron_check_output_exchange_sync()
+        for rec in records:
+            self.assertEqual(rec.edi_exchange_state, "output_sent")
+            self.assertTrue(FakeOutputGenerator.check_called_for(rec))
+            self.assertTrue(FakeOutputSender.check_called_for(rec))
+
+    @mute_logger(*LOGGERS, "odoo.addons.edi_oca.models.edi_exchange_record")
+    def test_exchange_batch_failure(self):
+        # record2 has already a file: generate will fail for it
+        self.record2._set_file_content("READY")
+        records = self.record1 + self.record2 + self.record3
+        with mock.patch.object(
+            type(self.record1), "_delay_exchange_actions", autospec=True
+        ) as mocked:
+            records.action_exchange_batch(("generate", "send"))
+        # Failing record rescheduled alone, the others went through
+        mocked.assert_called_once()
+        self.assertEqual(mocked.call_args[0][0], self.record2)
+        self.assertEqual(self.record2.edi_exchange_state, "new")
+        self.assertTrue(FakeOutputGenerator.check_not_called_for(self.record2))
+        for rec in self.record1 + self.record3:
+            self.assertEqual(rec.edi_exchange_state, "output_sent")
+
+    @mute_logger(*LOGGERS)
+    def test_exchange_claim_dispatch(self):
+        self.exchange_type_out.exchange_file_auto_generate = True
+        self.backend.exchange_dispatch_mode = "claim"
+        records = self.record1 + self.record2 + self.record3
+        claimed = self.backend._exchange_claim_records("output", 2)
+        # Oldest first
+        self.assertEqual(claimed.ids, sorted(records.ids)[:2])
+        # Rescheduled in its own job
+        self.record1.claimed_until = fields.Datetime.now() + timedelta(hours=1)
+        claimed = self.backend._exchange_claim_records("output", 10)
+        self.assertEqual(claimed, self.record2 + self.record3)
+        self.record1.claimed_until = fields.Datetime.now() - timedelta(hours=1)
+        self.assertFalse(self.backend._exchange_claim_records("input", 10))
+        self.backend._cron_check_output_exchange_sync()
+        for rec in records:
+            self.assertEqual(rec.edi_exchange_state, "output_sent")
+            self.assertTrue(FakeOutputGenerator.check_called_for(rec))
+            self.assertTrue(FakeOutputSender.check_called_for(rec))
+
+    @mute_logger(*LOGGERS)
+    def test_exchange_claim_failed(self):
+        self.exchange_type_out.exchange_file_auto_generate = True
+        self.backend.exchange_dispatch_mode = "claim"
+        backend = self.backend.with_context(test_queue_job_no_delay=False)
+        records = self.record1 + self.record2 + self.record3
+        with trap_jobs(), mock.patch.object(
+            type(self.env["edi.exchange.record"]),
+            "_exchange_batch_run",
+            autospec=True,
+            side_effect=lambda recs, actions: recs & self.record1,
+        ):
+            backend._exchange_claim_dispatch("output")
+        # Not claimed again while its own job runs
+        self.assertTrue(self.record1.claimed_until)
+        self.assertFalse((records - self.record1).mapped("claimed_until"))
+        claimed = self.backend._exchange_claim_records("output", 10)
+        self.assertEqual(claimed, self.record2 + self.record3)
+
+    def test_exchange_claim_start(self):
+        self.exchange_type_out.exchange_file_auto_generate = True
+        self.backend.write({"exchange_dispatch_mode": "claim", "claim_worker_count": 2})
+        backend = self.backend.with_context(test_queue_job_no_delay=False)
+        with trap_jobs() as trap:
+            backend._cron_check_output_exchange_sync()
+            # Consumers still pending: no new one
+            backend._cron_check_output_exchange_sync()
+            trap.assert_jobs_count(2, only=backend._exchange_claim_dispatch)
+            for slot in range(2):
+                trap.assert_enqueued_job(
+                    backend._exchange_claim_dispatch,
+                    args=("output",),
+                    kwargs=dict(slot=slot, skip_send=False, skip_sent=True),
+                    properties=dict(
+                        identity_key="edi_claim_%d_output_%d" % (backend.id, slot)
+                    ),
+                )
+
+    @mute_logger(*LOGGERS)
+    def test_exchange_claim_record_ids(self):
+        self.exchange_type_out.exchange_file_auto_generate = True
+        self.backend.exchange_dispatch_mode = "claim"
+        # Given records are handled w/o consumers
+        self.backend._cron_check_output_exchange_sync(record_ids=self.record1.ids)
+        self.assertEqual(self.record1.edi_exchange_state, "output_sent")
+        self.assertEqual(self.record2.edi_exchange_state, "new")
@@ -3,8 +3,10 @@
 # @author: Simone Orsi <simahawk@gmail.com>
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+import mock
 from freezegun import freeze_time
 
+from odoo import exceptions
 from odoo.tools import mute_logger
 
 from .common import EDIBackendCommonTestCase
@@ -66,6 +68,55 @@ class EDIExchangeTypeTestCase(EDIBackendCommonTestCase):
         })
         # fmt:on
 
+    def test_advanced_settings_cache(self):
+        self.exchange_type_out.advanced_settings_edit = """
+        filename_pattern:
+            force_tz: Europe/Rome
+        """
+        type_cls = type(self.exchange_type_out)
+        with mock.patch.object(
+            type_cls,
+            "_load_advanced_settings",
+            autospec=True,
+            side_effect=type_cls._load_advanced_settings,
+        ) as mocked:
+            for __ in range(3):
+                self.exchange_type_out.invalidate_cache()
+                settings = self.exchange_type_out.get_settings()["filename_pattern"]
+                self.assertEqual(settings["force_tz"], "Europe/Rome")
+                # Altering the value does not alter the cache
+                settings["force_tz"] = "UTC"
+            self.assertEqual(mocked.call_count, 1)
+        # Cache is cleared on write
+        self.exchange_type_out.advanced_settings_edit = """
+        filename_pattern:
+            force_tz: Europe/Paris
+        """
+        self.assertEqual(
+            self.exchange_type_out.get_settings()["filename_pattern"]["force_tz"],
+            "Europe/Paris",
+        )
+
+    def test_advanced_settings_validation(self):
+        with self.assertRaisesRegex(exceptions.ValidationError, "not valid YAML"):
+            self.exchange_type_out.advanced_settings_edit = "components: [foo"
+        with self.assertRaisesRegex(exceptions.ValidationError, "dictionary"):
+            self.exchange_type_out.advanced_settings_edit = "- foo"
+        with self.assertRaisesRegex(
+            exceptions.ValidationError, "`components.generate` must be a dict"
+        ):
+            self.exchange_type_out.advanced_settings_edit = """
+            components:
+                generate: my.usage
+            """
+        with self.assertRaisesRegex(
+            exceptions.ValidationError, "`filename_pattern.force_tz` must be a str"
+        ):
+            self.exchange_type_out.advanced_settings_edit = """
+            filename_pattern:
+                force_tz: 1
+            """
+
     def _test_exchange_filename(self, wanted_filename):
         filename = self.exchange_type_out._make_exchange_filename(
             exchange_record=self.env["edi.exchange.record"]
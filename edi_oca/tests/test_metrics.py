@@ -0,0 +1,79 @@
+# Copyright 2026 Camptocamp SA (http://www.camptocamp.com)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from .common import EDIBackendCommonComponentRegistryTestCase
+from .fake_components import FakeOutputGenerator, FakeOutputSender
+
+
+class EDIMetricsTestCase(EDIBackendCommonComponentRegistryTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._build_components(cls, FakeOutputGenerator, FakeOutputSender)
+        cls.backend = cls.env["edi.backend"].create(
+            {
+                "name": "EDI metrics",
+                "backend_type_id": cls.env.ref("edi_oca.demo_edi_backend_type").id,
+            }
+        )
+        cls.exchange_type_out.backend_id = cls.backend
+
+    def setUp(self):
+        super().setUp()
+        FakeOutputGenerator.reset_faked()
+        FakeOutputSender.reset_faked()
+
+    def _render(self):
+        return self.env["edi.metrics"]._render_prometheus(self.backend).splitlines()
+
+    def test_metrics(self):
+        record1 = self.backend.create_records("test_csv_output", [{}, {}])[0]
+        record1.action_exchange_generate()
+        record1.action_exchange_send()
+        lines = self._render()
+        labels = 'backend="EDI metrics",type="test_csv_output"'
+        self.assertIn('edi_exchange_records{%s,state="new"} 1' % labels, lines)
+        self.assertIn('edi_exchange_records{%s,state="output_sent"} 1' % labels, lines)
+        self.assertTrue(
+            [
+                x
+                for x in lines
+                if x.startswith(
+                    'edi_exchange_oldest_pending_age_seconds{%s,state="new"}' % labels
+                )
+            ]
+        )
+        for action in ("generate", "send"):
+            self.assertIn(
+                'edi_exchange_actions_total{%s,action="%s",outcome="success"} 1'
+                % (labels, action),
+                lines,
+            )
+            self.assertIn(
+                "edi_exchange_action_duration_seconds_bucket"
+                '{%s,action="%s",le="+Inf"} 1' % (labels, action),
+                lines,
+            )
+        # Same results once compacted (ages apart)
+
+        def skip_ages(lines):
+            return [x for x in lines if not x.startswith("edi_exchange_oldest")]
+
+        self.env["edi.exchange.action.metric"]._cron_compact()
+        self.env["edi.exchange.record.counter"]._cron_compact()
+        self.assertEqual(skip_ages(self._render()), skip_ages(lines))
+
+    def test_metrics_buffered(self):
+        metric_model = self.env["edi.exchange.action.metric"]
+        metric_model._flush_buffer()
+        domain = [("backend_id", "=", self.backend.id)]
+        records = self.backend.create_records("test_csv_output", [{}, {}])
+        for record in records:
+            record.action_exchange_generate()
+        # Written once at commit time, aggregated
+        self.assertFalse(metric_model.search_count(domain))
+        metric_model._flush_buffer()
+        metrics = metric_model.search(domain)
+        self.assertEqual(sum(metrics.mapped("count")), 2)
+        self.assertEqual(set(metrics.mapped("action")), {"generate"})
+        self.assertLessEqual(len(metrics), 2)
@@ -0,0 +1,64 @@
+# Copyright 2026 Camptocamp SA (http://www.camptocamp.com)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from datetime import timedelta
+
+from freezegun import freeze_time
+
+from odoo import fields
+
+from .common import EDIBackendCommonTestCase
+
+
+class EDINotificationTestCase(EDIBackendCommonTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.notification_model = cls.env["edi.exchange.notification"]
+        vals = {"model": cls.partner._name, "res_id": cls.partner.id}
+        cls.records = cls.backend.create_records("test_csv_output", [vals, vals])
+
+    def _notify(self):
+        self.records[0]._notify_related_record("Generated")
+        self.records[1]._notify_related_record("Not sent", level="error")
+        self.records[0]._notify_related_record("Sent")
+
+    def test_immediate(self):
+        messages = self.partner.message_ids
+        self._notify()
+        self.partner.invalidate_cache(["message_ids"])
+        self.assertEqual(len(self.partner.message_ids - messages), 3)
+
+    def test_digest_transaction(self):
+        self.exchange_type_out.notification_mode = "transaction"
+        messages = self.partner.message_ids
+        self._notify()
+        self.assertEqual(self.partner.message_ids, messages)
+        self.env.cr.precommit.run()
+        self.partner.invalidate_cache(["message_ids"])
+        new_messages = self.partner.message_ids - messages
+        self.assertEqual(len(new_messages), 1)
+        for identifier in self.records.mapped("identifier"):
+            self.assertIn(identifier, new_messages.body)
+        for text in ("Generated", "Not sent", "Sent"):
+            self.assertIn(text, new_messages.body)
+        self.assertFalse(self.notification_model.search([]))
+
+    def test_digest_window(self):
+        self.exchange_type_out.notification_mode = "window"
+        self.exchange_type_out.notification_window = 10
+        messages = self.partner.message_ids
+        self._notify()
+        self.env.cr.precommit.run()
+        notifications = self.notification_model.search(
+            [("exchange_record_id", "in", self.records.ids)]
+        )
+        self.assertEqual(len(notifications), 3)
+        self.notification_model._cron_post_digests()
+        self.partner.invalidate_cache(["message_ids"])
+        self.assertEqual(self.partner.message_ids, messages)
+        with freeze_time(fields.Datetime.now() + timedelta(minutes=11)):
+            self.notification_model._cron_post_digests()
+        self.partner.invalidate_cache(["message_ids"])
+        self.assertEqual(len(self.partner.message_ids - messages), 1)
+        self.assertFalse(notifications.exists())
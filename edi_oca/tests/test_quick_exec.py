@@ -47,6 +47,7 @@ class EDIQuickExecTestCase(EDIBackendCommonComponentRegistryTestCase):
         # quick exec is off, we should not get any call
         with mock.patch.object(type(model), "_execute_next_action") as mocked:
             record0 = self.backend.create_record("test_csv_output", vals)
+            self.env.cr.precommit.run()
             mocked.assert_not_called()
             self.assertEqual(record0.edi_exchange_state, "new")
         # enabled but bypassed
@@ -56,6 +57,7 @@ class EDIQuickExecTestCase(EDIBackendCommonComponentRegistryTestCase):
             record0 = self.backend.with_context(
                 edi__skip_quick_exec=True
             ).create_record("test_csv_output", vals)
+            self.env.cr.precommit.run()
             # quick exec is off, we should not get any call
             mocked.assert_not_called()
             self.assertEqual(record0.edi_exchange_state, "new")
@@ -68,6 +70,9 @@ class EDIQuickExecTestCase(EDIBackendCommonComponentRegistryTestCase):
             "res_id": self.partner.id,
         }
         record0 = self.backend.create_record("test_csv_output", vals)
+        # Nothing happens until commit
+        self.assertEqual(record0.edi_exchange_state, "new")
+        self.env.cr.precommit.run()
         # File generated and sent!
         self.assertEqual(record0.edi_exchange_state, "output_sent")
         self.assertTrue(FakeOutputGenerator.check_called_for(record0))
@@ -75,6 +80,31 @@ class EDIQuickExecTestCase(EDIBackendCommonComponentRegistryTestCase):
             record0._get_file_content(), FakeOutputGenerator._call_key(record0)
         )
 
+    def test_quick_exec_on_create_records(self):
+        self.exchange_type_out.exchange_file_auto_generate = True
+        self.exchange_type_out.quick_exec = True
+        vals_list = [
+            {"model": self.partner._name, "res_id": partner.id}
+            for partner in (self.partner, self.partner2, self.partner3)
+        ]
+        backend_cls = type(self.backend)
+        with mock.patch.object(
+            backend_cls,
+            "_check_output_exchange_sync",
+            autospec=True,
+            side_effect=backend_cls._check_output_exchange_sync,
+        ) as mocked:
+            records = self.backend.create_records("test_csv_output", vals_list)
+            records |= self.backend.create_record("test_csv_output", vals_list[0])
+            mocked.assert_not_called()
+            self.env.cr.precommit.run()
+        # One dispatch for the whole batch
+        mocked.assert_called_once()
+        self.assertEqual(sorted(mocked.call_args[1]["record_ids"]), sorted(records.ids))
+        for rec in records:
+            self.assertEqual(rec.edi_exchange_state, "output_sent")
+            self.assertTrue(FakeOutputGenerator.check_called_for(rec))
+
     def test_quick_exec_on_create_in(self):
         self.exchange_type_in.quick_exec = True
         vals = {
@@ -84,6 +114,7 @@ class EDIQuickExecTestCase(EDIBackendCommonComponentRegistryTestCase):
             "edi_exchange_state": "input_received",
         }
         record0 = self.backend.create_record("test_csv_input", vals)
+        self.env.cr.precommit.run()
         self.assertEqual(record0.edi_exchange_state, "input_processed")
         self.assertTrue(FakeInputProcess.check_called_for(record0))
 
@@ -103,6 +134,22 @@ class EDIQuickExecTestCase(EDIBackendCommonComponentRegistryTestCase):
         # get record w/ a clean context
         record0 = self.backend.exchange_record_model.browse(record0.id)
         record0.action_retry()
+        self.env.cr.precommit.run()
         # The file has been rolled back and processed right away
         self.assertEqual(record0.edi_exchange_state, "input_processed")
         self.assertTrue(FakeInputProcess.check_called_for(record0))
+
+    def test_quick_exec_on_retry_no_chatter(self):
+        self.exchange_type_in.write({"quick_exec": True, "disable_chatter": True})
+        vals = {
+            "edi_exchange_state": "input_processed_error",
+            "exchange_file": base64.b64encode(b"1234"),
+        }
+        record0 = self.backend.with_context(edi__skip_quick_exec=True).create_record(
+            "test_csv_input", vals
+        )
+        record0 = self.backend.exchange_record_model.browse(record0.id)
+        record0.action_retry()
+        self.env.cr.precommit.run()
+        self.assertEqual(record0.edi_exchange_state, "input_processed")
+        self.assertTrue(FakeInputProcess.check_called_for(record0))
@@ -4,6 +4,7 @@
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
 import base64
+from datetime import timedelta
 
 import mock
 from freezegun import freeze_time
@@ -37,6 +38,47 @@ class EDIRecordTestCase(EDIBackendCommonTestCase):
         )
         self.assertNotEqual(new_record.identifier, record.identifier)
 
+    def test_create_records(self):
+        vals_list = [
+            {"model": self.partner._name, "res_id": self.partner.id} for __ in range(5)
+        ]
+        records = self.backend.create_records("test_csv_output", vals_list)
+        self.assertEqual(len(records), 5)
+        self.assertEqual(records.type_id, self.exchange_type_out)
+        self.assertEqual(records.backend_id, self.backend)
+        identifiers = records.mapped("identifier")
+        self.assertEqual(len(set(identifiers)), 5)
+        prefix = "EDI/{}/".format(fields.Date.today().year)
+        for identifier in identifiers:
+            self.assertTrue(identifier.startswith(prefix))
+        # Identifiers come from a contiguous block
+        numbers = sorted(int(x[len(prefix) :]) for x in identifiers)
+        self.assertEqual(numbers, list(range(numbers[0], numbers[0] + 5)))
+        # Original values are not altered
+        self.assertNotIn("type_id", vals_list[0])
+
+    def test_file_content_stream(self):
+        record = self.backend.create_record("test_csv_output", {})
+        with record._open_file_content(mode="w") as fd:
+            for i in range(3):
+                fd.write(b"line %d\n" % i)
+        expected = b"line 0\nline 1\nline 2\n"
+        self.assertEqual(record._get_file_content(as_bytes=True), expected)
+        self.assertEqual(base64.b64decode(record.exchange_file), expected)
+        with record._open_file_content() as fd:
+            self.assertEqual(fd.readline(), b"line 0\n")
+            self.assertEqual(fd.read(), b"line 1\nline 2\n")
+        attachment = record._get_file_attachment()
+        self.assertEqual(attachment.file_size, len(expected))
+        # Replace content
+        record._set_file_content("new content")
+        self.assertEqual(record._get_file_content(), "new content")
+        self.assertEqual(record._get_file_attachment(), attachment)
+        # Drop content
+        record._set_file_content("")
+        self.assertFalse(record.exchange_file)
+        self.assertEqual(record._get_file_content(), "")
+
     def test_record_validate_state(self):
         expected_err = "Exchange state must respect direction!"
         with self.assertRaises(exceptions.ValidationError, msg=expected_err):
@@ -103,6 +145,35 @@ class EDIRecordTestCase(EDIBackendCommonTestCase):
         self.assertFalse(record1.record)
         self.assertFalse(record1.related_name)
 
+    def test_related_records_batch(self):
+        partner2 = self.partner.copy({"name": "Test EDI batch rel"})
+        parent = self.backend.create_record(
+            "test_csv_output", {"model": partner2._name, "res_id": partner2.id}
+        )
+        child = self.backend.create_record("test_csv_output", {"parent_id": parent.id})
+        grandchild = self.backend.create_record(
+            "test_csv_output", {"parent_id": child.id}
+        )
+        other = self.backend.create_record(
+            "test_csv_output", {"model": self.partner._name, "res_id": self.partner.id}
+        )
+        orphan = self.backend.create_record("test_csv_output", {})
+        records = parent + child + grandchild + other + orphan
+        related = records._get_related_records()
+        self.assertEqual(related[parent.id], partner2)
+        self.assertEqual(related[child.id], partner2)
+        self.assertEqual(related[grandchild.id], partner2)
+        self.assertEqual(related[other.id], self.partner)
+        self.assertIsNone(related[orphan.id])
+        # Related records of the same model are prefetched together
+        self.assertIn(self.partner.id, related[parent.id]._prefetch_ids)
+        for rec in records:
+            self.assertEqual(related[rec.id], rec.record)
+        partner2.unlink()
+        related = records._get_related_records()
+        self.assertFalse(related[grandchild.id])
+        self.assertEqual(related[grandchild.id]._name, partner2._name)
+
     def test_record_empty_with_parent(self):
         """Simulate child record doesn't have a model and res_id.
 
@@ -204,6 +275,98 @@ class EDIRecordTestCase(EDIBackendCommonTestCase):
         ack2 = record0.exchange_create_ack_record()
         self.assertEqual(record0.ack_exchange_id, ack2)
 
+    def test_ack_batch(self):
+        records = self.backend.create_records("test_csv_output", [{}, {}, {}])
+        records[0].exchange_create_ack_record()
+        records[0].exchange_create_ack_record()
+        ack3 = records[0].exchange_create_ack_record()
+        ack4 = records[1].exchange_create_ack_record()
+        records.invalidate_cache(["ack_exchange_id"])
+        self.assertEqual(
+            records._get_ack_records(), {records[0].id: ack3, records[1].id: ack4}
+        )
+        self.assertEqual(records[0].ack_exchange_id, ack3)
+        self.assertEqual(records[1].ack_exchange_id, ack4)
+        self.assertFalse(records[2].ack_exchange_id)
+
+    def test_ack_resolve_parents(self):
+        vals = {"model": self.partner._name, "res_id": self.partner.id}
+        records = self.backend.create_records("test_csv_output", [vals, vals])
+        records[1].external_identifier = "EXT-1"
+        acks = self.backend.create_records(
+            "test_csv_output_ack",
+            [
+                {"external_identifier": records[0].identifier},
+                {"external_identifier": "EXT-1"},
+                {"external_identifier": "UNKNOWN"},
+            ],
+        )
+        matched = acks._resolve_ack_parents()
+        self.assertEqual(matched, acks[:2])
+        self.assertEqual(acks[0].parent_id, records[0])
+        self.assertEqual(acks[1].parent_id, records[1])
+        self.assertEqual(acks[0].model, self.partner._name)
+        self.assertEqual(acks[0].res_id, self.partner.id)
+        self.assertFalse(acks[2].parent_id)
+        self.assertEqual(records[0].ack_exchange_id, acks[0])
+        self.assertEqual(records[1].ack_exchange_id, acks[1])
+        # Explicit references
+        ack = self.backend.create_record("test_csv_output_ack", {})
+        matched = ack._resolve_ack_parents(references={ack.id: "EXT-1"})
+        self.assertEqual(matched.parent_id, records[1])
+        self.assertEqual(records[1].ack_exchange_id, ack)
+
+    def test_ack_resolve_parents_incoming(self):
+        ack_type = self.exchange_type_out_ack
+        ack_type.direction = "input"
+        records = self.backend.create_records("test_csv_output", [{}, {}])
+        acks = self.backend.create_records(
+            "test_csv_output_ack",
+            [
+                {"external_identifier": records[0].identifier},
+                {"edi_exchange_state": "input_pending"},
+            ],
+        )
+        # Linked on creation
+        self.assertEqual(acks[0].parent_id, records[0])
+        self.assertFalse(acks[1].parent_id)
+        # Only records of the same backend are matched
+        other = self.env["edi.exchange.record"].create(
+            {
+                "type_id": ack_type.id,
+                "backend_id": self.backend.copy().id,
+                "external_identifier": records[1].identifier,
+            }
+        )
+        self.assertFalse(other.parent_id)
+        # Linked once received
+        acks[1].external_identifier = records[1].identifier
+        with mock.patch.object(
+            type(self.backend), "_exchange_receive", autospec=True, return_value="OK"
+        ):
+            acks[1].action_exchange_receive()
+        self.assertEqual(acks[1].edi_exchange_state, "input_received")
+        self.assertEqual(acks[1].parent_id, records[1])
+
+    def test_ack_overdue(self):
+        self.exchange_type_out.ack_timeout_hours = 2
+        records = self.backend.create_records("test_csv_output", [{}, {}, {}])
+        now = fields.Datetime.now()
+        records.write({"edi_exchange_state": "output_sent"})
+        records[:2].write({"exchanged_on": now - timedelta(hours=3)})
+        records[2].write({"exchanged_on": now - timedelta(hours=1)})
+        records[1].exchange_create_ack_record()
+        self.exchange_type_out._cron_check_overdue_acks()
+        self.assertEqual(records.mapped("ack_overdue"), [True, False, False])
+        records[0].exchange_create_ack_record()
+        self.assertFalse(records[0].ack_overdue)
+        # Not flagged twice
+        with mock.patch.object(
+            type(records), "_notify_ack_missing", autospec=True
+        ) as mocked:
+            self.exchange_type_out._cron_check_overdue_acks()
+        mocked.assert_not_called()
+
     def test_retry(self):
         vals = {
             "model": self.partner._name,
@@ -222,7 +385,7 @@ class EDIRecordTestCase(EDIBackendCommonTestCase):
 
     def test_checksum(self):
         filecontent = base64.b64encode(b"ABC")
-        checksum1 = get_checksum(filecontent)
+        checksum1 = get_checksum(b"ABC")
         vals = {
             "model": self.partner._name,
             "res_id": self.partner.id,
@@ -231,7 +394,92 @@ class EDIRecordTestCase(EDIBackendCommonTestCase):
         record0 = self.backend.create_record("test_csv_output", vals)
         self.assertEqual(record0.exchange_filechecksum, checksum1)
         filecontent = base64.b64encode(b"DEF")
-        checksum2 = get_checksum(filecontent)
+        checksum2 = get_checksum(b"DEF")
         record0.exchange_file = filecontent
         self.assertEqual(record0.exchange_filechecksum, checksum2)
         self.assertNotEqual(record0.exchange_filechecksum, checksum1)
+        # Same checksum when written as stream
+        record0._set_file_content(b"ABC")
+        self.assertEqual(record0.exchange_filechecksum, checksum1)
+        record0._set_file_content(b"")
+        self.assertFalse(record0.exchange_filechecksum)
+
+    def test_file_compression(self):
+        self.exchange_type_out.exchange_file_compression = "gzip"
+        content = b"ABC" * 100
+        record0 = self.backend.create_record(
+            "test_csv_output", {"exchange_file": base64.b64encode(content)}
+        )
+        self.assertEqual(record0.exchange_file_compression, "gzip")
+        self.assertEqual(record0.exchange_filechecksum, get_checksum(content))
+        self.assertEqual(record0._get_file_content(as_bytes=True), content)
+        self.assertLess(len(base64.b64decode(record0.exchange_file)), len(content))
+        # Readers get the actual content
+        self.assertEqual(
+            base64.b64decode(record0._get_file_content(binary=False)), content
+        )
+        self.assertEqual(base64.b64decode(record0.exchange_file_download), content)
+        self.assertEqual(
+            record0.with_context(bin_size=True).exchange_file_download, "300.00 bytes"
+        )
+        # Stream write
+        content = b"DEF" * 100
+        with record0._open_file_content(mode="w") as fd:
+            fd.write(content)
+        self.assertEqual(record0.exchange_file_compression, "gzip")
+        self.assertEqual(record0.exchange_filechecksum, get_checksum(content))
+        with record0._open_file_content() as fd:
+            self.assertEqual(fd.read(), content)
+        attachment = record0._get_file_attachment()
+        self.assertLess(attachment.file_size, len(content))
+        self.assertEqual(attachment.mimetype, "application/gzip")
+        # Not compressed anymore
+        self.exchange_type_out.exchange_file_compression = False
+        record0._set_file_content(b"GHI")
+        self.assertFalse(record0.exchange_file_compression)
+        self.assertEqual(base64.b64decode(record0.exchange_file), b"GHI")
+
+    def test_no_chatter(self):
+        env = self.env(context=dict(self.env.context, tracking_disable=False))
+        backend = self.backend.with_env(env)
+        vals = {"model": self.partner._name, "res_id": self.partner.id}
+        record0 = backend.create_record("test_csv_output", vals)
+        self.assertTrue(record0.message_ids)
+        self.assertFalse(record0.state_log_ids)
+        partner_messages = self.partner.message_ids
+        self.exchange_type_out.disable_chatter = True
+        records = backend.create_records("test_csv_output", [vals, vals])
+        self.assertTrue(all(records.mapped("chatter_disabled")))
+        self.assertFalse(records.message_ids)
+        self.assertFalse(records.message_follower_ids)
+        for rec in records:
+            self.assertEqual(len(rec.state_log_ids), 1)
+            self.assertFalse(rec.state_log_ids.previous_state)
+            self.assertEqual(rec.state_log_ids.edi_exchange_state, "new")
+        record1 = records[0]
+        record1.edi_exchange_state = "output_pending"
+        record1.edi_exchange_state = "output_pending"
+        record1._notify_related_record("Something happened", level="warning")
+        self.assertFalse(record1.message_ids)
+        self.assertEqual(self.partner.message_ids, partner_messages)
+        log = record1.state_log_ids.sorted("id")
+        self.assertEqual(len(log), 3)
+        self.assertEqual(log[1].previous_state, "new")
+        self.assertEqual(log[1].edi_exchange_state, "output_pending")
+        self.assertFalse(log[1].message)
+        self.assertEqual(log[2].edi_exchange_state, "output_pending")
+        self.assertEqual(log[2].message, "Something happened")
+        self.assertEqual(log[2].level, "warning")
+        # Creation order is kept w/ mixed types
+        vals_in = dict(vals, type_id=self.exchange_type_in.id)
+        mixed = self.env["edi.exchange.record"].with_env(env).create(
+            [
+                dict(vals, type_id=self.exchange_type_out.id, backend_id=backend.id),
+                dict(vals_in, backend_id=backend.id),
+            ]
+        )
+        self.assertEqual(
+            [x.type_id for x in mixed], [self.exchange_type_out, self.exchange_type_in]
+        )
+        self.assertFalse(mixed[0].message_ids)
+        self.assertTrue(mixed[1].message_ids)
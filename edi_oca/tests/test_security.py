@@ -2,6 +2,7 @@
 # @author: Enric Tobella
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+import mock
 from odoo_test_helper import FakeModelLoader
 
 from odoo.exceptions import AccessError
@@ -115,6 +116,28 @@ class TestEDIExchangeRecordSecurity(EDIBackendCommonTestCase):
         with self.assertRaisesRegex(AccessError, msg):
             exchange_record.with_user(self.user).read()
 
+    def test_read_access_memo(self):
+        exchange_record = self.create_record()
+        self.user.write({"groups_id": [(4, self.group.id)]})
+        exchange_record = exchange_record.with_user(self.user)
+        consumer_cls = type(self.consumer_record)
+        with mock.patch.object(
+            consumer_cls,
+            "check_access_rule",
+            autospec=True,
+            side_effect=consumer_cls.check_access_rule,
+        ) as mocked:
+            with exchange_record._access_memo_scope():
+                exchange_record.read(["identifier"])
+                exchange_record.read(["identifier"])
+                exchange_record.write({"external_identifier": "1234"})
+                exchange_record.write({"external_identifier": "5678"})
+            # Checked once per operation
+            self.assertEqual(mocked.call_count, 2)
+            # Out of the scope the memo is gone
+            exchange_record.read(["identifier"])
+            self.assertEqual(mocked.call_count, 3)
+
     @mute_logger("odoo.addons.base.models.ir_model")
     def test_no_group_no_unlink(self):
         exchange_record = self.create_record()
@@ -173,20 +196,37 @@ class TestEDIExchangeRecordSecurity(EDIBackendCommonTestCase):
         exchange_record = self.create_record()
         exchange_record.res_id = -1
         self.user.write({"groups_id": [(4, self.group.id)]})
-        logger_name = "odoo.addons.edi_oca.models.edi_exchange_record"
-        expected_msg = (
-            f"WARNING:{logger_name}:"
-            f"Deleted record {exchange_record.model},{exchange_record.res_id} "
-            f"is referenced by edi.exchange.record [{exchange_record.id}]"
+        self.assertEqual(
+            0,
+            self.env["edi.exchange.record"]
+            .with_user(self.user)
+            .search_count([("id", "=", exchange_record.id)]),
         )
-        with self.assertLogs(logger_name, "WARNING") as watcher:
-            self.assertEqual(
-                0,
-                self.env["edi.exchange.record"]
-                .with_user(self.user)
-                .search_count([("id", "=", exchange_record.id)]),
-            )
-            self.assertEqual(watcher.output, [expected_msg])
+
+    def test_search_paging(self):
+        consumer_record2 = self.env["edi.exchange.consumer.test"].create(
+            {"name": "no_rule"}
+        )
+        allowed = self.create_record()
+        self.create_record()
+        forbidden = self.backend.create_record(
+            "test_csv_output",
+            {"model": consumer_record2._name, "res_id": consumer_record2.id},
+        )
+        no_related = self.backend.create_record("test_csv_output", {})
+        self.user.write({"groups_id": [(4, self.group.id)]})
+        model = self.env["edi.exchange.record"].with_user(self.user)
+        domain = [("type_id", "=", self.exchange_type_out.id)]
+        found = model.search(domain, order="id")
+        self.assertNotIn(forbidden, found)
+        self.assertIn(allowed, found)
+        self.assertIn(no_related, found)
+        self.assertEqual(model.search_count(domain), len(found))
+        # Pages are full and consistent
+        page1 = model.search(domain, order="id", limit=2)
+        page2 = model.search(domain, order="id", limit=2, offset=2)
+        self.assertEqual(len(page1), 2)
+        self.assertEqual((page1 + page2).ids, found.ids[:4])
 
     def test_search_no_record_admin(self):
         # Consumer record no longer exists:
@@ -0,0 +1,141 @@
+# Copyright 2026 Camptocamp SA (http://www.camptocamp.com)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import base64
+
+import mock
+
+from odoo.addons.queue_job.tests.common import trap_jobs
+
+from .common import EDIBackendCommonComponentRegistryTestCase
+from .fake_components import FakeInputDocumentProcess, FakeInputSplit
+
+SPLIT_CHUNK_SIZE_PATH = "odoo.addons.edi_oca.models.edi_backend.SPLIT_CHUNK_SIZE"
+
+
+class EDIBackendTestSplitCase(EDIBackendCommonComponentRegistryTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._build_components(cls, FakeInputSplit, FakeInputDocumentProcess)
+        cls.exchange_type_document = cls._create_exchange_type(
+            name="Test CSV input document",
+            code="test_csv_input_document",
+            direction="input",
+            exchange_file_ext="csv",
+        )
+        cls.exchange_type_in.split_type_id = cls.exchange_type_document
+        cls.record = cls.backend.create_record(
+            "test_csv_input",
+            {
+                "edi_exchange_state": "input_received",
+                "exchange_file": base64.b64encode(b"A\nB\nC\n"),
+            },
+        )
+
+    def setUp(self):
+        super().setUp()
+        FakeInputSplit.reset_faked()
+        FakeInputDocumentProcess.reset_faked()
+
+    def test_split(self):
+        self.record.action_exchange_process()
+        self.assertTrue(FakeInputSplit.check_called_for(self.record))
+        self.assertEqual(self.record.edi_exchange_state, "input_split")
+        children = self.record._get_split_children()
+        self.assertEqual(
+            sorted(x._get_file_content() for x in children), ["A", "B", "C"]
+        )
+        self.assertRecordValues(
+            children,
+            [
+                {
+                    "type_id": self.exchange_type_document.id,
+                    "parent_id": self.record.id,
+                    "edi_exchange_state": "input_received",
+                }
+            ]
+            * 3,
+        )
+        self.assertEqual(self.record.split_count, 3)
+        for child in children:
+            self.assertEqual(self.record.edi_exchange_state, "input_split")
+            child.action_exchange_process()
+            self.env.cr.precommit.run()
+            self.assertTrue(FakeInputDocumentProcess.check_called_for(child))
+        self.assertEqual(self.record.edi_exchange_state, "input_processed")
+        self.assertEqual(self.record.split_done_count, 3)
+
+    def test_split_error_retry(self):
+        self.record.action_exchange_process()
+        child1, child2, child3 = self.record._get_split_children().sorted("id")
+        child1.action_exchange_process()
+        child2.with_context(test_break_process="OOPS!").action_exchange_process()
+        child3.action_exchange_process()
+        self.env.cr.precommit.run()
+        self.assertRecordValues(
+            self.record,
+            [
+                {
+                    "edi_exchange_state": "input_processed_error",
+                    "exchange_error": "1 of 3 documents failed.",
+                    "split_error_count": 1,
+                }
+            ],
+        )
+        # Only the failed child is retried, the file is not split again
+        FakeInputSplit.reset_faked()
+        self.record.action_retry()
+        self.record.action_exchange_process()
+        self.assertTrue(FakeInputSplit.check_not_called_for(self.record))
+        self.assertEqual(self.record.edi_exchange_state, "input_split")
+        self.assertEqual(self.record.split_count, 3)
+        self.assertEqual(child2.edi_exchange_state, "input_received")
+        child2.action_exchange_process()
+        self.env.cr.precommit.run()
+        self.assertEqual(self.record.edi_exchange_state, "input_processed")
+
+    def test_split_error_partway(self):
+        # Create children one by one to have some created before the error
+        with mock.patch(SPLIT_CHUNK_SIZE_PATH, 1):
+            self.record.with_context(test_break_split_at=2).action_exchange_process()
+        self.assertEqual(self.record.edi_exchange_state, "input_processed_error")
+        self.assertIn("Malformed document 2", self.record.exchange_error)
+        self.assertFalse(self.record._get_split_children())
+        # The whole file is split again on retry
+        self.record.action_retry()
+        with mock.patch(SPLIT_CHUNK_SIZE_PATH, 1):
+            self.record.action_exchange_process()
+        self.assertEqual(self.record.edi_exchange_state, "input_split")
+        self.assertEqual(len(self.record._get_split_children()), 3)
+
+    def test_split_state_job(self):
+        self.record.action_exchange_process()
+        child1, child2 = self.record._get_split_children().sorted("id")[:2]
+        with trap_jobs() as trap:
+            child1 = child1.with_context(test_queue_job_no_delay=False)
+            # Only finished children update their parent
+            child1.edi_exchange_state = "input_received"
+            self.env.cr.precommit.run()
+            trap.assert_jobs_count(0)
+            child1.action_exchange_process()
+            child2.with_context(
+                test_queue_job_no_delay=False
+            ).action_exchange_process()
+            self.env.cr.precommit.run()
+            # The parent is not written by children: one job updates it
+            self.assertEqual(self.record.edi_exchange_state, "input_split")
+            trap.assert_jobs_count(1, only=self.record._update_split_state)
+            trap.assert_enqueued_job(
+                self.record._update_split_state,
+                properties=dict(
+                    channel="root.edi.edi_split",
+                    identity_key="edi_split_state_update_%d" % self.record.id,
+                ),
+            )
+            trap.perform_enqueued_jobs()
+        # A child is pending
+        self.assertEqual(self.record.edi_exchange_state, "input_split")
+        self.record._get_split_children().sorted("id")[2:].action_exchange_process()
+        self.env.cr.precommit.run()
+        self.assertEqual(self.record.edi_exchange_state, "input_processed")
@@ -0,0 +1,73 @@
+# Copyright 2026 Camptocamp SA (http://www.camptocamp.com)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import mock
+
+from odoo.addons.queue_job.exception import RetryableJobError
+
+from .common import EDIBackendCommonComponentRegistryTestCase
+from .fake_components import FakeOutputGenerator, FakeOutputSender
+
+
+class EDIBackendTimingTestCase(EDIBackendCommonComponentRegistryTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._build_components(cls, FakeOutputGenerator, FakeOutputSender)
+        cls.record = cls.backend.create_record(
+            "test_csv_output", {"model": cls.partner._name, "res_id": cls.partner.id}
+        )
+        cls.timing_model = cls.env["edi.exchange.record.timing"]
+
+    def setUp(self):
+        super().setUp()
+        FakeOutputGenerator.reset_faked()
+        FakeOutputSender.reset_faked()
+
+    def _get_timings(self):
+        return self.timing_model.search(
+            [("exchange_record_id", "=", self.record.id)], order="id"
+        )
+
+    def test_timing_disabled(self):
+        self.record.action_exchange_generate()
+        self.assertFalse(self._get_timings())
+
+    def test_timing(self):
+        self.backend.exchange_timing_enabled = True
+        self.record.action_exchange_generate()
+        self.record.action_exchange_send()
+        timings = self._get_timings()
+        self.assertEqual(timings.mapped("action"), ["generate", "send"])
+        for timing in timings:
+            self.assertEqual(timing.backend_id, self.backend)
+            self.assertEqual(timing.type_id, self.exchange_type_out)
+            self.assertEqual(timing.attempt, 1)
+            self.assertTrue(timing.payload_size)
+            self.assertTrue(timing.query_count)
+            self.assertFalse(timing.failed)
+        # Retry: new attempt
+        self.record.edi_exchange_state = "output_pending"
+        self.record.action_exchange_send()
+        self.assertEqual(self._get_timings()[-1].attempt, 2)
+        stats = self.env["edi.exchange.record.timing.stats"].search(
+            [("type_id", "=", self.exchange_type_out.id), ("action", "=", "send")]
+        )
+        self.assertEqual(stats.count, 2)
+        self.assertTrue(stats.duration_p95 >= stats.duration_p50)
+
+    def test_timing_failed(self):
+        self.backend.exchange_timing_enabled = True
+        metric_model = self.env["edi.exchange.action.metric"]
+        self.env.cr.precommit.data.pop(metric_model._buffer_key, None)
+        # The transaction might be broken: nothing is read or written
+        with mock.patch.object(
+            type(self.timing_model), "_log", side_effect=AssertionError
+        ) as mocked:
+            with self.assertRaises(RetryableJobError):
+                self.record.with_context(
+                    test_break_generate=RetryableJobError("DB error")
+                ).action_exchange_generate()
+        mocked.assert_not_called()
+        metrics = metric_model._get_metrics(backend_ids=self.backend.ids)
+        self.assertEqual([key[2:4] for key in metrics], [("generate", True)])
@@ -2,11 +2,29 @@
 # @author Simone Orsi <simahawk@gmail.com>
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+import gzip
 import hashlib
+import io
+import logging
+from contextlib import contextmanager
 
 from odoo.addons.http_routing.models.ir_http import slugify
 from odoo.addons.queue_job.job import identity_exact_hasher
 
+_logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+    _logger.debug("`zstandard` lib is missing")
+
+
+COMPRESSION_MIMETYPES = {
+    "gzip": "application/gzip",
+    "zstd": "application/zstd",
+}
+
 
 def normalize_string(a_string, sep="_"):
     """Normalize given string, replace dashes with given separator."""
@@ -14,7 +32,100 @@ def normalize_string(a_string, sep="_"):
 
 
 def get_checksum(filecontent):
-    return hashlib.md5(filecontent).hexdigest()
+    """Return the checksum of the raw (not base64 encoded) content."""
+    return hashlib.sha256(filecontent).hexdigest()
+
+
+class HashingWriter:
+    """Write to a file object while computing checksums and size of the content.
+
+    Checksums are updated chunk by chunk:
+    the whole content never needs to be loaded in memory.
+    """
+
+    def __init__(self, fileobj, algorithms=("sha1",)):
+        self.fileobj = fileobj
+        self.hashers = {name: hashlib.new(name) for name in algorithms}
+        self.size = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        for hasher in self.hashers.values():
+            hasher.update(data)
+        self.size += len(data)
+        return self.fileobj.write(data)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        self.fileobj.flush()
+
+    def hexdigest(self, algorithm):
+        return self.hashers[algorithm].hexdigest()
+
+
+def _check_compression(compression):
+    if compression not in COMPRESSION_MIMETYPES:
+        raise ValueError("Unsupported compression: %s" % compression)
+    if compression == "zstd" and zstandard is None:
+        raise ImportError("`zstandard` lib is required for zstd compression")
+
+
+@contextmanager
+def compress_stream(fileobj, compression):
+    """Wrap a file object to compress what gets written on the fly.
+
+    :param fileobj: object w/ a `write` method receiving compressed data
+    :param compression: "gzip", "zstd" or False for no compression
+    """
+    if not compression:
+        yield fileobj
+        return
+    _check_compression(compression)
+    if compression == "gzip":
+        # mtime=0: same content, same compressed data
+        with gzip.GzipFile(fileobj=fileobj, mode="wb", mtime=0) as compressed:
+            yield compressed
+    else:
+        cctx = zstandard.ZstdCompressor()
+        with cctx.stream_writer(fileobj, closefd=False) as compressed:
+            yield compressed
+
+
+@contextmanager
+def decompress_stream(fileobj, compression):
+    """Wrap a file object to decompress what gets read on the fly.
+
+    :param fileobj: object w/ a `read` method returning compressed data
+    :param compression: "gzip", "zstd" or False for no compression
+    """
+    if not compression:
+        yield fileobj
+        return
+    _check_compression(compression)
+    if compression == "gzip":
+        with gzip.GzipFile(fileobj=fileobj, mode="rb") as decompressed:
+            yield decompressed
+    else:
+        dctx = zstandard.ZstdDecompressor()
+        with dctx.stream_reader(fileobj, closefd=False) as decompressed:
+            yield decompressed
+
+
+def compress(data, compression):
+    """Compress given bytes in one go."""
+    if not compression or not data:
+        return data
+    _check_compression(compression)
+    if compression == "gzip":
+        buff = io.BytesIO()
+        with gzip.GzipFile(fileobj=buff, mode="wb", mtime=0) as compressed:
+            compressed.write(data)
+        return buff.getvalue()
+    return zstandard.ZstdCompressor().compress(data)
 
 
 def exchange_record_job_identity_exact(job_):
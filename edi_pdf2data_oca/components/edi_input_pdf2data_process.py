@@ -2,6 +2,8 @@
 # @author: Enric Tobella
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+import base64
+
 from odoo.addons.component.core import Component
 
 
@@ -19,7 +21,9 @@ class EdiInputPdf2DataProcessAbstract(Component):
         _extracted_text, data, template = (
             self.env["pdf2data.template"]
             .search(self._pdf2data_template_domain())
-            ._parse_pdf(self.exchange_record.exchange_file)
+            ._parse_pdf(
+                base64.b64encode(self.exchange_record._get_file_content(as_bytes=True))
+            )
         )
         if not template:
             return
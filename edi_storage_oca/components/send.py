@@ -23,9 +23,17 @@ class EDIStorageSendComponent(Component):
         if not result:
             # all good here
             return True
-        filedata = self.exchange_record.exchange_file
+        stream = self._get_output_stream()
+        if stream:
+            # Pass-through: content generated on the fly.
+            # NOTE: `storage.add` takes the whole content,
+            # hence it is loaded in memory here (w/o base64 encoding though).
+            filedata = stream.read()
+        else:
+            # Read raw bytes straight from the filestore, no base64 round-trip
+            filedata = self.exchange_record._get_file_content(as_bytes=True)
         path = self._get_remote_file_path("pending")
-        self.storage.add(path.as_posix(), filedata, binary=False)
+        self.storage.add(path.as_posix(), filedata)
         # TODO: delegate this to generic storage backend
         # except paramiko.ssh_exception.AuthenticationException:
         #     # TODO this exc handling should be moved to sftp backend IMO
@@ -1,2 +1,3 @@
 from . import edi_backend
 from . import edi_exchange_type
+from . import edi_exchange_record
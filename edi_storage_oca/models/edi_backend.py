@@ -21,6 +21,13 @@ class EDIBackend(models.Model):
         help="Storage for in-out files",
         ondelete="restrict",
     )
+    offload_storage_id = fields.Many2one(
+        string="Cold storage backend",
+        comodel_name="storage.backend",
+        help="Storage where files of old exchanges are offloaded. "
+        "See `Offload files after (days)` on exchange types.",
+        ondelete="restrict",
+    )
     """
     We assume the exchanges happen it 2 ways (input, output)
     and we have a hierarchy of directory like:
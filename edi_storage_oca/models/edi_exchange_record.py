@@ -0,0 +1,36 @@
+# Copyright 2026 Camptocamp SA (http://www.camptocamp.com)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import io
+from contextlib import closing, contextmanager
+
+from odoo import models
+
+
+class EDIExchangeRecord(models.Model):
+
+    _inherit = "edi.exchange.record"
+
+    def _get_offload_storage(self):
+        if self.backend_id.offload_storage_id:
+            return "storage"
+        return super()._get_offload_storage()
+
+    def _offload_write_storage(self, fd):
+        storage = self.backend_id.offload_storage_id
+        path = self._get_offload_key()
+        storage.add(path, fd.read())
+        # Keep track of the storage as the backend config might change
+        return "{}/{}".format(storage.id, path)
+
+    @contextmanager
+    def _offload_open_storage(self, key):
+        storage_id, path = key.split("/", 1)
+        storage = self.env["storage.backend"].sudo().browse(int(storage_id))
+        with closing(io.BytesIO(storage.get(path, binary=True))) as fd:
+            yield fd
+
+    def _offload_delete_storage(self, key):
+        storage_id, path = key.split("/", 1)
+        storage = self.env["storage.backend"].sudo().browse(int(storage_id))
+        storage.delete(path)
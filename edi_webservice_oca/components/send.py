@@ -44,5 +44,9 @@ class EDIWebserviceSend(Component):
     def _get_data(self):
         # By sending as bytes `requests` won't try to guess and/or alter the encoding.
         # TODO: add tests
+        stream = getattr(self.work, "output_stream", None)
+        if stream:
+            # Pass-through: let `requests` stream the content
+            return stream
         as_bytes = self.ws_settings.get("send_as_bytes")
         return self.exchange_record._get_file_content(as_bytes=as_bytes)
@@ -47,9 +47,13 @@ class XMLHandler(Component):
 
     def parse_xml(self, file_content, **kw):
         """Read XML content.
-        :param file_content: str of XML file
+        :param file_content: str of XML file or file-like object
+            (eg: `exchange_record._open_file_content()`)
         :return: dict with final data
         """
+        if hasattr(file_content, "read"):
+            # Stream: do not load the whole content in memory
+            return self._parse_xml(file_content)
         with closing(io.StringIO(file_content)) as fd:
             return self._parse_xml(fd)
 